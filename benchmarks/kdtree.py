@@ -0,0 +1,83 @@
+"""Desde cuántos centros conviene el KD-tree en la búsqueda de la ganadora.
+
+    python benchmarks/kdtree.py [--ejemplos N] [--lote B] [--repeticiones R]
+
+Para cada dimensión d y cantidad de centros k se buscan los ganadores de
+--ejemplos puntos uniformes en [0, 1)^d por bloques de --lote filas, como
+_epocaLotesCPN en RN_Clustering: por fuerza bruta (||c||^2 - 2x.c con un
+producto por bloque) y armando un cKDTree con los centros en cada bloque y
+consultándolo. Se informa el mejor tiempo de --repeticiones corridas y, al
+final, la tupla (dimensión máxima, centros mínimos) que usa _CRUCE_KDTREE.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, RAIZ)
+
+from rna.fuentes.RN_Clustering import _CRUCE_KDTREE
+
+DIMENSIONES = [2, 3, 5, 8, 12, 32]
+CENTROS = [16, 64, 256, 1024, 4096]
+
+
+def bruta(X, centros, lote):
+    normas = np.sum(centros**2, axis=1)
+    for ini in range(0, X.shape[0], lote):
+        np.argmin(normas - 2 * (X[ini:ini+lote] @ centros.T), axis=1)
+
+def kdtree(X, centros, lote):
+    for ini in range(0, X.shape[0], lote):
+        cKDTree(centros).query(X[ini:ini+lote])
+
+def medir(funcion, X, centros, lote, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(X, centros, lote)
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+def cruce(ganancias):
+    """Menor k desde el que el KD-tree gana para todos los k mayores (None si nunca)"""
+    kMin = None
+    for (k, gana) in reversed(ganancias):
+        if not gana:
+            break
+        kMin = k
+    return kMin
+
+def tabla(cruces):
+    """(dimensión máxima, centros mínimos) como en _CRUCE_KDTREE: cada d
+    con cruce, salvo las que comparten el cruce con la siguiente"""
+    filas = [(d, k) for (d, k) in cruces if k is not None]
+    return tuple((d, k) for (i, (d, k)) in enumerate(filas)
+                 if (i+1==len(filas)) or (filas[i+1][1]!=k))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ejemplos', type=int, default=20000)
+    parser.add_argument('--lote', type=int, default=4096)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    rgen = np.random.RandomState(0)
+    cruces = []
+    for d in DIMENSIONES:
+        X = rgen.uniform(size=(args.ejemplos, d))
+        ganancias = []
+        for k in CENTROS:
+            centros = rgen.uniform(size=(k, d))
+            tb = medir(bruta, X, centros, args.lote, args.repeticiones)
+            tk = medir(kdtree, X, centros, args.lote, args.repeticiones)
+            ganancias.append((k, tk < tb))
+            print('d=%-3d k=%-5d bruta %.4f s  kdtree %.4f s  %s' % (d, k, tb, tk, 'kdtree' if tk < tb else ''))
+        cruces.append((d, cruce(ganancias)))
+    print('medido:        ', tabla(cruces))
+    print('_CRUCE_KDTREE: ', _CRUCE_KDTREE)
@@ -0,0 +1,114 @@
+"""Épocas que necesita cada optimizer para llegar a un errors_ objetivo.
+
+    python benchmarks/optimizadores.py [ng] [rn] [lineal] [--epocas N]
+
+Para cada tarea se entrena con sgd y los alpha de ALPHAS durante --epocas
+épocas (cotaE=0); el objetivo es 1.02 veces el menor errors_ que alcanzó sgd.
+Luego cada optimizer prueba los mismos alpha y se detiene al llegar al
+objetivo. Se informa el alpha que llega en menos épocas y el tiempo medio
+por época de esa corrida. Los datos se leen de descargas/datos.
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, RAIZ)
+
+from rna.fuentes import NeuronaGradiente, NeuronaLineal, RNMulticlase, CallbackEntrenamiento
+
+DATOS = os.path.join(RAIZ, 'descargas', 'datos')
+ALPHAS = [1e-4, 3e-4, 1e-3, 3e-3, 1e-2, 3e-2, 1e-1, 3e-1, 1, 3]
+OPTIMIZADORES = [('sgd', None), ('momentum', None), ('rmsprop', None), ('adam', None), ('adam', 'cosine')]
+
+
+class HastaObjetivo(CallbackEntrenamiento):
+    """Detiene el fit cuando el error de la época llega al objetivo (o deja de ser finito)"""
+    def __init__(self, objetivo):
+        self.objetivo = objetivo
+
+    def on_epoch_end(self, epoch, logs=None):
+        error = logs['error']
+        if (error <= self.objetivo) or not np.isfinite(error):
+            self.model.stop_training = True
+
+
+def _escalar(X):
+    #-- cada columna en [-1, 1], sin centrar, como en los cuadernos del curso --
+    return X / np.abs(X).max(axis=0)
+
+def beijing():
+    df = pd.read_csv(os.path.join(DATOS, 'beijing_air_quality.csv')).dropna()
+    X = _escalar(df[['SO2', 'NO2', 'CO', 'O3', 'TEMP', 'PRES', 'DEWP', 'WSPM']].to_numpy(float))
+    pm = df['PM2.5'].to_numpy()
+    return (X, (pm > 75) * 1.0, np.eye(3)[np.digitize(pm, [35, 115])])
+
+def automoviles():
+    df = pd.read_csv(os.path.join(DATOS, 'automobile_simple', 'automobile-simple.csv'))
+    df = df.dropna(subset=['horsepower', 'price'])
+    X = _escalar(df[['curb-weight', 'engine-size', 'horsepower', 'city-mpg', 'highway-mpg']].to_numpy(float))
+    y = df['price'].to_numpy(float) / 1000
+    #-- NeuronaLineal no tiene shuffle: las filas (ordenadas por marca) se mezclan una vez --
+    orden = np.random.RandomState(0).permutation(len(y))
+    return (X[orden], y[orden])
+
+def tareas():
+    #-- los datos de beijing están ordenados por fecha: sin shuffle los
+    #-- lotes seguidos se parecen y los optimizadores con momento oscilan --
+    (Xb, yb, Yb) = beijing()
+    (Xa, ya) = automoviles()
+    lotes = {'batch_size': 256, 'shuffle': True, 'accuracy_mode': 'fused'}
+    return {'ng': ('beijing_air_quality, NeuronaGradiente sigmoid, PM2.5>75, lotes de 256',
+                   NeuronaGradiente, Xb, yb, lotes),
+            'rn': ('beijing_air_quality, RNMulticlase softmax/EC, 3 franjas de PM2.5, lotes de 256',
+                   RNMulticlase, Xb, Yb, dict(lotes, FUN='softmax', COSTO='EC')),
+            'lineal': ('automobile-simple, NeuronaLineal LMS en línea, precio/1000',
+                       NeuronaLineal, Xa, ya, {})}
+
+def entrenar(clase, X, y, kw, alpha, optimizer, lr_schedule, epocas, objetivo=None):
+    """(errors_, segundos por época) de un fit"""
+    modelo = clase(alpha=alpha, n_iter=epocas, cotaE=0, random_state=1,
+                   optimizer=optimizer, lr_schedule=lr_schedule, **kw)
+    callbacks = [] if (objetivo is None) else [HastaObjetivo(objetivo)]
+    inicio = time.perf_counter()
+    modelo.fit(X, y, callbacks=callbacks)
+    segundos = time.perf_counter() - inicio
+    errores = np.asarray(modelo.errors_, dtype=float)
+    return (errores, segundos / max(len(errores), 1))
+
+def medir(nombre, clase, X, y, kw, epocas):
+    print(nombre)
+    corridas = [entrenar(clase, X, y, kw, a, 'sgd', None, epocas) for a in ALPHAS]
+    objetivo = 1.02 * min(np.nanmin(e) for (e, _) in corridas if np.isfinite(e).all())
+    print('   objetivo: errors_ <= %.4g (1.02 x el mejor sgd en %d épocas)' % (objetivo, epocas))
+    for (optimizer, lr_schedule) in OPTIMIZADORES:
+        mejor = None
+        for alpha in ALPHAS:
+            (e, seg) = entrenar(clase, X, y, kw, alpha, optimizer, lr_schedule, epocas, objetivo)
+            llega = np.flatnonzero(e <= objetivo)
+            if len(llega) and ((mejor is None) or (llega[0] + 1 < mejor[1])):
+                mejor = (alpha, llega[0] + 1, seg)
+        etiqueta = optimizer + ('+' + lr_schedule if lr_schedule else '')
+        if mejor is None:
+            print('   %-16s no llega en %d épocas' % (etiqueta, epocas))
+        else:
+            print('   %-16s alpha=%-7g épocas=%5d  %.2f ms/época' % (etiqueta, mejor[0], mejor[1], 1000 * mejor[2]))
+
+
+if __name__ == '__main__':
+    todas = tareas()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('tareas', nargs='*', help=', '.join(todas) + ' (por defecto todas)')
+    parser.add_argument('--epocas', type=int, default=600)
+    args = parser.parse_args()
+    for t in args.tareas:
+        if t not in todas:
+            parser.error('tarea desconocida: ' + t)
+    warnings.filterwarnings('ignore')
+    for t in (args.tareas or list(todas)):
+        medir(*todas[t], epocas=args.epocas)
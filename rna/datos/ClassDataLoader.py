@@ -104,7 +104,7 @@ class DataLoader:
         cls._download_repo_directory(github_path, local_path, force, verbose)
 
     @classmethod
-    def load_dataframe(cls, nombre, encoding=None, separator=None):
+    def _csv_file(cls, nombre, encoding=None, separator=None):
         (local_path, files) = cls._require_repo_directory(nombre)
 
         file_path = os.path.join(local_path, files[0])
@@ -112,14 +112,84 @@ class DataLoader:
             encoding = cls._detect_encoding(file_path)
         if separator is None:
             separator = cls._detect_separator(file_path, encoding)
+        return (file_path, encoding, separator)
+
+    @classmethod
+    def load_dataframe(cls, nombre, encoding=None, separator=None):
+        (file_path, encoding, separator) = cls._csv_file(nombre, encoding, separator)
 
         df = pd.read_csv(file_path, encoding=encoding, sep=separator)
         return df
 
     @classmethod
-    def load_array(cls, nombre, encoding=None, separator=None):
+    def load_array(cls, nombre, encoding=None, separator=None, dtype=None):
+        """(columnas, arreglo) del dataset. Con dtype (p.ej. np.float32) el
+        arreglo se construye directamente con ese tipo en lugar de object,
+        y los estimadores de rna.fuentes lo conservan al entrenar."""
+        df = cls.load_dataframe(nombre, encoding, separator)
+        return (df.columns, df.to_numpy(dtype=dtype))
+
+    @classmethod
+    def iter_array_chunks(cls, nombre, chunksize=10000, encoding=None, separator=None, dtype=None):
+        """Recorre el dataset por bloques de chunksize filas sin cargarlo entero.
+        Cada bloque se entrega como (columnas, arreglo), igual que load_array,
+        de modo que una época de partial_fit lee el CSV con memoria constante.
+        """
+        (file_path, encoding, separator) = cls._csv_file(nombre, encoding, separator)
+
+        with pd.read_csv(file_path, encoding=encoding, sep=separator, chunksize=chunksize) as reader:
+            for df in reader:
+                yield (df.columns, df.to_numpy(dtype=dtype))
+
+    @classmethod
+    def load_onehot_csr(cls, nombre, target=-1, drop=None, categorical=None, encoding=None, separator=None, dtype=np.float32):
+        """(columnas, X, y) con X como matriz CSR de scipy.sparse, lista para
+        el fit de los estimadores de rna.fuentes. Cada columna categórica (de
+        texto o listada en categorical) se codifica en one-hot directamente
+        en formato disperso, sin pasar por la matriz densa; las numéricas se
+        copian tal cual (sin guardar sus ceros).
+        target : nombre o posición de la columna objetivo, que se retorna sin
+            codificar en y; None si no hay (y es None).
+        drop : columnas a descartar, p.ej. identificadores como 'animal'.
+        columnas : nombres de las columnas de X ('columna=valor' en las one-hot).
+        """
+        try:
+            from scipy import sparse
+        except ImportError:
+            raise ImportError("load_onehot_csr necesita scipy (pip install scipy)")
+
         df = cls.load_dataframe(nombre, encoding, separator)
-        return (df.columns, df.to_numpy())
+        y = None
+        if target is not None:
+            columna_y = df.columns[target] if isinstance(target, int) else target
+            y = df[columna_y].to_numpy()
+            df = df.drop(columns=[columna_y])
+        if drop:
+            df = df.drop(columns=list(drop))
+        categorical = set(categorical or [])
+
+        nRow = len(df)
+        todas = np.arange(nRow)
+        (filas, cols, datos, columnas) = ([], [], [], [])
+        for c in df.columns:
+            serie = df[c]
+            if (c in categorical) or not pd.api.types.is_numeric_dtype(serie):
+                (codigos, valores) = pd.factorize(serie, sort=True)
+                ok = (codigos >= 0)     # un valor faltante deja la fila sin ningún uno
+                filas.append(todas[ok])
+                cols.append(len(columnas) + codigos[ok])
+                datos.append(np.ones(np.count_nonzero(ok), dtype=dtype))
+                columnas.extend(f"{c}={v}" for v in valores)
+            else:
+                valores = serie.to_numpy(dtype=dtype)
+                ok = (valores != 0)
+                filas.append(todas[ok])
+                cols.append(np.full(np.count_nonzero(ok), len(columnas)))
+                datos.append(valores[ok])
+                columnas.append(c)
+        X = sparse.csr_matrix((np.concatenate(datos), (np.concatenate(filas), np.concatenate(cols))),
+                              shape=(nRow, len(columnas)), dtype=dtype)
+        return (pd.Index(columnas), X, y)
 
     @classmethod
     def _require_repo_directory(cls, nombre):
@@ -213,6 +283,11 @@ class DataLoader:
 
         return info_data
 
+    @classmethod
+    def model_path(cls, nombre):
+        """Ruta de un modelo guardado dentro de la carpeta de modelos"""
+        return os.path.join(cls._models_path, nombre)
+
     @classmethod
     def dataset_path(cls, nombre):
         (local_path, files) = cls._require_repo_directory(nombre)
@@ -0,0 +1,269 @@
+import copy
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from rna.fuentes.entradas import resolver_dtype, como_arreglo, es_dispersa, sparse
+from rna.fuentes.prediccion import _cantidad_hilos
+from rna.fuentes.ClassPerceptron import Perceptron
+
+#-- arreglos compartidos visibles en cada proceso trabajador (nombre -> ndarray
+#-- o matriz CSR armada sobre los segmentos de sus data, indices e indptr) --
+_compartidos = {}
+_segmentos = []
+_PARTES_CSR = ('data', 'indices', 'indptr')
+
+
+def puntaje_defecto(modelo, X, y):
+    """accuracy si el modelo la define (o es un Perceptron); para regresión
+    (NeuronaLineal) el error cuadrático medio con signo negativo, de modo que
+    siempre mayor es mejor"""
+    if hasattr(modelo, 'accuracy'):
+        return modelo.accuracy(X, y)
+    if isinstance(modelo, Perceptron):
+        return np.mean(modelo.predict(X)==y)
+    return -np.mean((y - modelo.predict(X))**2)
+
+
+def _crear_segmento(A):
+    """Copia A a un bloque de memoria compartida y retorna (segmento, descriptor)"""
+    shm = shared_memory.SharedMemory(create=True, size=max(A.nbytes, 1))
+    vista = np.ndarray(A.shape, dtype=A.dtype, buffer=shm.buf)
+    vista[...] = A
+    return shm, (shm.name, A.shape, A.dtype.str)
+
+
+def _publicar(A):
+    """Segmentos y descriptor de A en memoria compartida; una matriz CSR se
+    publica como sus tres arreglos, sin densificarla"""
+    if not es_dispersa(A):
+        (shm, descriptor) = _crear_segmento(A)
+        return ([shm], descriptor)
+    (segmentos, partes) = ([], {})
+    for parte in _PARTES_CSR:
+        (shm, partes[parte]) = _crear_segmento(getattr(A, parte))
+        segmentos.append(shm)
+    return (segmentos, {'csr': partes, 'shape': A.shape})
+
+
+def _adjuntar(descriptor):
+    (shm_nombre, forma, tipo) = descriptor
+    try:
+        shm = shared_memory.SharedMemory(name=shm_nombre, track=False)
+    except TypeError:   #-- Python < 3.13
+        shm = shared_memory.SharedMemory(name=shm_nombre)
+    _segmentos.append(shm)
+    return np.ndarray(forma, dtype=np.dtype(tipo), buffer=shm.buf)
+
+
+def _adjuntar_segmentos(descriptores):
+    """Inicializador de cada trabajador: mapea X e y sin copiarlos"""
+    for nombre, descriptor in descriptores.items():
+        if isinstance(descriptor, dict):
+            partes = [_adjuntar(descriptor['csr'][parte]) for parte in _PARTES_CSR]
+            _compartidos[nombre] = sparse.csr_matrix(tuple(partes), shape=descriptor['shape'], copy=False)
+        else:
+            _compartidos[nombre] = _adjuntar(descriptor)
+
+
+def _evaluar_tarea(estimador, params, semilla, idx_train, idx_test, scoring):
+    """Entrena una copia del estimador sobre un pliegue y retorna su puntaje"""
+    X = _compartidos['X']
+    y = _compartidos['y']
+
+    modelo = copy.deepcopy(estimador)
+    for nombre, valor in params.items():
+        setattr(modelo, nombre, valor)
+    if ('random_state' not in params) and (getattr(modelo, 'random_state', None) is None):
+        #-- sin semilla propia, cada tarea recibe un hijo independiente del SeedSequence raíz --
+        modelo.random_state = int(semilla.generate_state(1)[0])
+
+    modelo.fit(X[idx_train], y[idx_train])
+    return scoring(modelo, X[idx_test], y[idx_test])
+
+
+def _pliegues(nRow, cv, rng):
+    """Índices (train, test) de k pliegues sobre una permutación de los ejemplos"""
+    if (cv<2) or (cv>nRow):
+        raise ValueError("cv debe estar entre 2 y la cantidad de ejemplos")
+    orden = rng.permutation(nRow)
+    partes = np.array_split(orden, cv)
+    return [(np.concatenate(partes[:f] + partes[f+1:]), partes[f]) for f in range(cv)]
+
+
+def _datos(estimador, X, y):
+    """X e y con el dtype con el que entrenará el estimador; X dispersa
+    queda en CSR, así los pliegues se toman con X[idx] sin densificarla"""
+    tipo = resolver_dtype(getattr(estimador, 'dtype', None), X)
+    return (como_arreglo(X, tipo), como_arreglo(y, tipo))
+
+
+def _ejecutar(estimador, configs, X, y, cv, scoring, n_jobs, raiz):
+    """Evalúa cada configuración en cada pliegue; retorna matriz (configs, cv)"""
+    (X, y) = _datos(estimador, X, y)
+    if scoring is None:
+        scoring = puntaje_defecto
+
+    pliegues = _pliegues(X.shape[0], cv, np.random.default_rng(raiz.spawn(1)[0]))
+    tareas = [(c, f) for c in range(len(configs)) for f in range(cv)]
+    semillas = raiz.spawn(len(tareas))
+
+    #-- como en predecir_por_bloques: None es 1 y -1 todos los procesadores --
+    n_jobs = min(_cantidad_hilos(n_jobs), len(tareas))
+
+    puntajes = np.zeros((len(configs), cv))
+    if n_jobs==1:
+        _compartidos['X'] = X
+        _compartidos['y'] = y
+        try:
+            for (c, f), semilla in zip(tareas, semillas):
+                (idx_train, idx_test) = pliegues[f]
+                puntajes[c, f] = _evaluar_tarea(estimador, configs[c], semilla,
+                                                idx_train, idx_test, scoring)
+        finally:
+            _compartidos.clear()
+        return puntajes
+
+    segmentos = []
+    try:
+        descriptores = {}
+        for nombre, A in (('X', X), ('y', y)):
+            (nuevos, descriptores[nombre]) = _publicar(A)
+            segmentos.extend(nuevos)
+
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_adjuntar_segmentos,
+                                 initargs=(descriptores,)) as pool:
+            futuros = {}
+            for (c, f), semilla in zip(tareas, semillas):
+                (idx_train, idx_test) = pliegues[f]
+                fut = pool.submit(_evaluar_tarea, estimador, configs[c], semilla,
+                                  idx_train, idx_test, scoring)
+                futuros[fut] = (c, f)
+            for fut, (c, f) in futuros.items():
+                puntajes[c, f] = fut.result()
+    finally:
+        for shm in segmentos:
+            shm.close()
+            shm.unlink()
+    return puntajes
+
+
+def validacion_cruzada(estimador, X, y, cv=5, scoring=None, n_jobs=None, random_state=None):
+    """Validación cruzada de k pliegues repartida en un ProcessPoolExecutor.
+    Parameters
+    ----------
+    estimador : Perceptron, NeuronaLineal, NeuronaGradiente o RNMulticlase (sin entrenar)
+    X, y : datos completos (X puede ser dispersa); se comparten con los
+        trabajadores por memoria compartida
+    cv : int
+        cantidad de pliegues
+    scoring : callable(modelo, X, y) -> float, mayor es mejor
+        por defecto puntaje_defecto; con n_jobs > 1 tiene que poder
+        serializarse con pickle (una función de módulo, no una lambda)
+    n_jobs : int
+        cantidad de procesos (None o 1 = sin procesos, -1 = todos los núcleos)
+    random_state : int
+        semilla del SeedSequence del que se derivan los pliegues y la
+        semilla de cada tarea cuyo estimador no tenga random_state propio
+    Returns
+    -------
+    puntajes : 1d-array con el puntaje de cada pliegue
+    """
+    raiz = np.random.SeedSequence(random_state)
+    return _ejecutar(estimador, [{}], X, y, cv, scoring, n_jobs, raiz)[0]
+
+
+class BusquedaHiperparametros(object):
+    """Búsqueda en grilla o aleatoria de hiperparámetros con validación cruzada.
+    Cada par (configuración, pliegue) es una tarea independiente de un
+    ProcessPoolExecutor; X e y se publican una sola vez en memoria compartida
+    y cada tarea recibe un hijo propio del SeedSequence raíz.
+    Parameters
+    ------------
+    estimador : object
+        Perceptron, NeuronaLineal, NeuronaGradiente o RNMulticlase sin entrenar.
+        Los parámetros no buscados se toman de esta instancia, también
+        random_state si no es None.
+    parametros : dict
+        nombre -> lista de valores. En la búsqueda aleatoria un valor también
+        puede ser un callable que recibe un np.random.Generator y retorna el valor.
+    n_configs : int or None
+        None recorre la grilla completa; N sortea N configuraciones.
+    cv : int
+        cantidad de pliegues.
+    scoring : callable(modelo, X, y) -> float
+        mayor es mejor; por defecto puntaje_defecto. Con n_jobs > 1 tiene
+        que poder serializarse con pickle (una función de módulo, no una
+        lambda).
+    n_jobs : int
+        cantidad de procesos (None o 1 = sin procesos, -1 = todos los núcleos).
+    random_state : int
+        semilla del SeedSequence raíz.
+    refit : bool
+        reentrena la mejor configuración con todos los datos.
+
+    Attributes
+    -----------
+    resultados_ : list
+        un diccionario por configuración con 'params', 'scores', 'mean' y 'std'.
+    best_params_ : dict
+    best_score_ : float
+    best_estimator_ : object
+        sólo si refit es True.
+    """
+    def __init__(self, estimador, parametros, n_configs=None, cv=5, scoring=None,
+                 n_jobs=None, random_state=None, refit=True):
+        self.estimador = estimador
+        self.parametros = parametros
+        self.n_configs = n_configs
+        self.cv = cv
+        self.scoring = scoring
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.refit = refit
+
+    def _configuraciones(self, raiz):
+        nombres = list(self.parametros.keys())
+        if self.n_configs is None:
+            for valores in self.parametros.values():
+                if callable(valores):
+                    raise ValueError("La búsqueda en grilla necesita listas de valores")
+            return [dict(zip(nombres, v)) for v in itertools.product(*self.parametros.values())]
+
+        rng = np.random.default_rng(raiz.spawn(1)[0])
+        configs = []
+        for n in range(self.n_configs):
+            config = {}
+            for nombre, valores in self.parametros.items():
+                if callable(valores):
+                    config[nombre] = valores(rng)
+                else:
+                    config[nombre] = valores[rng.integers(len(valores))]
+            configs.append(config)
+        return configs
+
+    def fit(self, X, y):
+        """Evalúa todas las configuraciones.
+        Returns
+        -------
+        self : object
+        """
+        raiz = np.random.SeedSequence(self.random_state)
+        configs = self._configuraciones(raiz)
+        puntajes = _ejecutar(self.estimador, configs, X, y, self.cv, self.scoring,
+                             self.n_jobs, raiz)
+
+        self.resultados_ = [{'params': c, 'scores': p, 'mean': np.mean(p), 'std': np.std(p)}
+                            for c, p in zip(configs, puntajes)]
+        mejor = int(np.argmax(puntajes.mean(axis=1)))
+        self.best_params_ = configs[mejor]
+        self.best_score_ = self.resultados_[mejor]['mean']
+
+        if self.refit:
+            modelo = copy.deepcopy(self.estimador)
+            for nombre, valor in self.best_params_.items():
+                setattr(modelo, nombre, valor)
+            self.best_estimator_ = modelo.fit(*_datos(modelo, X, y))
+        return self
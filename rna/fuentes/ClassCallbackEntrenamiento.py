@@ -0,0 +1,268 @@
+import copy
+import time
+
+import numpy as np
+
+from rna.fuentes.puntocontrol import guardar_punto_control
+
+class CallbackEntrenamiento(object):
+    """Callback para los entrenamientos propios de rna.fuentes.
+    Sigue el mismo protocolo que keras.callbacks.Callback (ver
+    rna.callbacks.EpochTiming): el estimador llama a set_model al comenzar
+    y luego a los métodos on_* con el número de época o de lote y un
+    diccionario logs. Se redefinen sólo los eventos que interesan; poniendo
+    model.stop_training = True el entrenamiento termina al final de la época.
+    """
+    def set_model(self, model):
+        self.model = model
+
+    def on_train_begin(self, logs=None):
+        pass
+
+    def on_train_end(self, logs=None):
+        pass
+
+    def on_epoch_begin(self, epoch, logs=None):
+        pass
+
+    def on_epoch_end(self, epoch, logs=None):
+        pass
+
+    def on_batch_end(self, batch, logs=None):
+        pass
+
+
+class _CronometroNulo(object):
+    # sin perfilador las marcas no miden nada
+    def inicio(self):
+        pass
+
+    def marca(self, fase):
+        pass
+
+
+class Cronometro(object):
+    """Acumula el tiempo de pared transcurrido entre marcas sucesivas por fase"""
+    def __init__(self):
+        self.tiempos = {}
+        self._t = time.perf_counter()
+
+    def inicio(self):
+        self._t = time.perf_counter()
+
+    def marca(self, fase):
+        t = time.perf_counter()
+        self.tiempos[fase] = self.tiempos.get(fase, 0.0) + (t - self._t)
+        self._t = t
+
+
+class ListaCallbacks(object):
+    """Reparte los eventos de un fit entre sus callbacks.
+    medir indica si algún callback mide fases; en ese caso cronometro es un
+    Cronometro compartido y si no un objeto nulo, así las marcas fuera de
+    los lazos pueden llamarse siempre. Dentro del lazo ejemplo a ejemplo se
+    consulta medir (y por_lote) para no pagar una llamada por ejemplo.
+    """
+    def __init__(self, callbacks=None, modelo=None):
+        self.callbacks = list(callbacks or [])
+        for c in self.callbacks:
+            c.set_model(modelo)
+        self.por_lote = any(type(c).on_batch_end is not CallbackEntrenamiento.on_batch_end
+                            for c in self.callbacks)
+        self.medir = any(getattr(c, 'mide_fases', False) for c in self.callbacks)
+        if self.medir:
+            self.cronometro = Cronometro()
+            for c in self.callbacks:
+                if getattr(c, 'mide_fases', False):
+                    c.cronometro = self.cronometro
+        else:
+            self.cronometro = _CronometroNulo()
+
+    def on_train_begin(self, logs=None):
+        for c in self.callbacks:
+            c.on_train_begin(logs)
+
+    def on_train_end(self, logs=None):
+        for c in self.callbacks:
+            c.on_train_end(logs)
+
+    def on_epoch_begin(self, epoch, logs=None):
+        for c in self.callbacks:
+            c.on_epoch_begin(epoch, logs)
+        self.cronometro.inicio()
+
+    def on_epoch_end(self, epoch, logs=None):
+        for c in self.callbacks:
+            c.on_epoch_end(epoch, logs)
+
+    def on_batch_end(self, batch, logs=None):
+        for c in self.callbacks:
+            c.on_batch_end(batch, logs)
+
+SIN_CALLBACKS = ListaCallbacks()
+
+
+class Perfilador(CallbackEntrenamiento):
+    """Perfil de tiempos de un fit de rna.fuentes.
+    Mide el tiempo de pared de cada fase del entrenamiento: 'forward'
+    (salida de la red), 'actualizacion' (pesos), 'costo', 'accuracy'
+    (reevaluación de accuracy_ al final de cada época) y 'dibujo'
+    (dibuPtosRecta), además del tiempo de cada época y los ejemplos
+    procesados por segundo. Con jit=True la época compilada completa se
+    cuenta como 'actualizacion'.
+
+    Attributes
+    -----------
+    tiempos_ : dict
+        segundos acumulados por fase.
+    tiempos_epoca_ : 1d-array
+        duración de cada época.
+    muestras_ : int
+        ejemplos procesados.
+    """
+    mide_fases = True
+
+    def on_train_begin(self, logs=None):
+        self._epocas = []
+        self.muestras_ = 0
+        self._t0 = time.perf_counter()
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._inicio_epoca = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self._epocas.append(time.perf_counter() - self._inicio_epoca)
+        if logs is not None:
+            self.muestras_ += logs.get('muestras', 0)
+
+    def on_train_end(self, logs=None):
+        self.tiempo_total_ = time.perf_counter() - self._t0
+        self.tiempos_epoca_ = np.array(self._epocas)
+        self.tiempos_ = dict(self.cronometro.tiempos)
+
+    def resumen(self):
+        """Diccionario con los segundos por fase, el total y los ejemplos por segundo"""
+        res = dict(self.tiempos_)
+        res['total'] = self.tiempo_total_
+        res['epocas'] = len(self.tiempos_epoca_)
+        entrenamiento = self.tiempos_epoca_.sum()
+        res['muestras_por_segundo'] = float(self.muestras_ / entrenamiento) if entrenamiento > 0 else 0.0
+        return res
+
+    def reporte(self):
+        """Imprime la tabla de tiempos por fase"""
+        res = self.resumen()
+        total = res['total']
+        print(f"{'fase':<15}{'segundos':>12}{'%':>8}")
+        for fase in ('forward', 'actualizacion', 'costo', 'accuracy', 'dibujo'):
+            if fase in res:
+                print(f"{fase:<15}{res[fase]:>12.4f}{100*res[fase]/total:>8.1f}")
+        print(f"{'total':<15}{total:>12.4f}")
+        print(f"épocas: {res['epocas']}  -  ejemplos/s: {res['muestras_por_segundo']:.0f}")
+
+
+class ParadaTemprana(CallbackEntrenamiento):
+    """Detiene el entrenamiento cuando el costo de validación no mejora.
+    Parameters
+    ------------
+    patience : int
+        épocas seguidas sin mejora que se toleran.
+    restore_best_weights : bool
+        al terminar deja en el modelo los pesos de la mejor época.
+    min_delta : float
+        mejora mínima para considerar que el costo bajó.
+    monitor : string
+        clave de logs a vigilar; si la época no la informa (fit sin datos
+        de validación) se vigila 'error', el costo de entrenamiento.
+
+    Attributes
+    -----------
+    best_epoch_ : int
+        época con el menor costo vigilado (también queda en el modelo).
+    stopped_epoch_ : int or None
+        época en la que se detuvo, None si no se detuvo.
+    """
+    def __init__(self, patience=5, restore_best_weights=False, min_delta=0.0, monitor='val_error'):
+        self.patience = patience
+        self.restore_best_weights = restore_best_weights
+        self.min_delta = min_delta
+        self.monitor = monitor
+
+    def on_train_begin(self, logs=None):
+        self._espera = 0
+        self._mejor = np.inf
+        self._pesos = None
+        self.best_epoch_ = None
+        self.stopped_epoch_ = None
+
+    def on_epoch_end(self, epoch, logs=None):
+        logs = logs or {}
+        valor = logs.get(self.monitor, logs.get('error'))
+        if valor < self._mejor - self.min_delta:
+            self._mejor = valor
+            self._espera = 0
+            self.best_epoch_ = epoch
+            if self.restore_best_weights:
+                #-- deepcopy: w_ y b_ son listas de capas en RNMulticapa --
+                self._pesos = copy.deepcopy((self.model.w_, self.model.b_))
+        else:
+            self._espera += 1
+            if self._espera >= self.patience:
+                self.stopped_epoch_ = epoch
+                self.model.stop_training = True
+
+    def on_train_end(self, logs=None):
+        if self.restore_best_weights and (self._pesos is not None):
+            (self.model.w_, self.model.b_) = self._pesos
+        self.model.best_epoch_ = self.best_epoch_
+
+
+class PuntoControl(CallbackEntrenamiento):
+    """Guarda periódicamente el estado del entrenamiento con guardar_punto_control,
+    para retomarlo con cargar_punto_control y fit con warm_start=True.
+    Parameters
+    ------------
+    ruta : string
+        archivo .npz; cada guardado reemplaza al anterior.
+    cada : int
+        guarda una de cada `cada` épocas.
+    intervalo : float or None
+        segundos mínimos entre dos guardados.
+    Al terminar el fit siempre se guarda el estado final.
+    """
+    def __init__(self, ruta, cada=1, intervalo=None):
+        if cada < 1:
+            raise ValueError("cada debe ser un entero positivo")
+        self.ruta = ruta
+        self.cada = cada
+        self.intervalo = intervalo
+
+    def on_train_begin(self, logs=None):
+        self._ultimo = time.perf_counter()
+        self._guardado = True
+
+    def on_epoch_end(self, epoch, logs=None):
+        self._guardado = False
+        if (epoch+1) % self.cada != 0:
+            return
+        ahora = time.perf_counter()
+        if (self.intervalo is not None) and (ahora - self._ultimo < self.intervalo):
+            return
+        self._ultimo = ahora
+        self._guardar()
+
+    def on_train_end(self, logs=None):
+        if not self._guardado:
+            self._guardar()
+
+    def _guardar(self):
+        guardar_punto_control(self.model, self.ruta)
+        self._guardado = True
+
+
+def con_parada_temprana(callbacks, modelo):
+    """callbacks más una ParadaTemprana si el modelo define patience"""
+    callbacks = list(callbacks or [])
+    if modelo.patience is not None:
+        callbacks.append(ParadaTemprana(modelo.patience, modelo.restore_best_weights))
+    return callbacks
@@ -0,0 +1,124 @@
+import queue
+import threading
+import time
+
+import numpy as np
+
+from rna.fuentes.entradas import como_arreglo
+
+MODOS_DIBUJO = ('sync', 'thread', 'record')
+
+class DibujoEntrenamiento(object):
+    """Decide cuándo y dónde se dibuja el estado (w, b) durante un fit.
+    Parameters
+    ------------
+    dibujar : callable(w, b, ph) -> ph
+        dibuja la recta de los pesos w, b; ph es el manejador del cuadro
+        anterior (0 la primera vez), como en dibuPtosRecta.
+    modo : string
+        'sync' dibuja en el mismo hilo del entrenamiento,
+        'thread' encola una copia de los pesos para un hilo dibujante, de
+        modo que fit nunca espera a matplotlib (si el dibujante está
+        ocupado se descarta el cuadro pendiente y queda sólo el más nuevo;
+        con backends de ventana que exigen el hilo principal usar 'record'),
+        'record' sólo guarda las copias en cuadros para verlas luego con
+        reproducir.
+    cada : int
+        toma un cuadro cada `cada` épocas.
+    intervalo : float or None
+        presupuesto de tiempo: segundos mínimos entre dos cuadros.
+    El estado final siempre se dibuja (o se guarda) al llamar a cerrar.
+    """
+    def __init__(self, dibujar, modo='sync', cada=1, intervalo=None):
+        if modo not in MODOS_DIBUJO:
+            raise ValueError("draw_mode debe ser 'sync', 'thread' o 'record'")
+        if cada < 1:
+            raise ValueError("draw_every debe ser un entero positivo")
+        self.dibujar = dibujar
+        self.modo = modo
+        self.cada = cada
+        self.intervalo = intervalo
+        self.cuadros = []
+        self._ph = 0
+        self._ultimo = None
+        self._ultima_epoca = None
+        self._error = None
+        if modo=='thread':
+            self._cola = queue.Queue(maxsize=1)
+            self._hilo = threading.Thread(target=self._dibujante, daemon=True)
+            self._hilo.start()
+
+    def epoca(self, i, w, b):
+        """Avisa el fin de la época i; dibuja si corresponde según cada e intervalo"""
+        if (i+1) % self.cada != 0:
+            return
+        ahora = time.perf_counter()
+        if (self.intervalo is not None) and (self._ultimo is not None) and (ahora - self._ultimo < self.intervalo):
+            return
+        self._ultimo = ahora
+        self._tomar(i, w, b)
+
+    def cerrar(self, i, w, b):
+        """Toma el cuadro final (época i) si no se tomó y espera al hilo dibujante"""
+        if self._ultima_epoca!=i:
+            self._tomar(i, w, b)
+        if self.modo=='thread':
+            self._cola.put(None)
+            self._hilo.join()
+            if self._error is not None:
+                raise self._error
+
+    def _tomar(self, i, w, b):
+        self._ultima_epoca = i
+        w = np.array(w, copy=True)
+        b = np.array(b, copy=True)
+        if self.modo=='sync':
+            self._ph = self.dibujar(w, b, self._ph)
+        elif self.modo=='record':
+            self.cuadros.append((i, w, b))
+        else:
+            #-- nunca bloquea: si hay un cuadro sin dibujar se reemplaza por el nuevo --
+            while True:
+                try:
+                    self._cola.put_nowait((w, b))
+                    break
+                except queue.Full:
+                    try:
+                        self._cola.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def _dibujante(self):
+        while True:
+            cuadro = self._cola.get()
+            if cuadro is None:
+                return
+            if self._error is None:
+                try:
+                    self._ph = self.dibujar(cuadro[0], cuadro[1], self._ph)
+                except Exception as e:
+                    self._error = e
+
+
+def reproducir(cuadros, dibujar, pausa=0.0):
+    """Dibuja en orden los cuadros (epoca, w, b) guardados con draw_mode='record'"""
+    ph = 0
+    for (i, w, b) in cuadros:
+        ph = dibujar(w, b, ph)
+        if pausa > 0:
+            time.sleep(pausa)
+    return ph
+
+
+class ConDibujo(object):
+    """Parte común de los estimadores que dibujan durante el fit; cada uno
+    define _funcion_dibujo(X, y) -> callable(w, b, ph)."""
+
+    def reproducir(self, X, y, pausa=0.0):
+        """Dibuja los pesos guardados en snapshots_ durante un fit con draw_mode='record'"""
+        reproducir(self.snapshots_, self._funcion_dibujo(como_arreglo(X, self.w_.dtype), y), pausa)
+
+    def _cerrar_dibujo(self, dib, i):
+        dib.cerrar(i, self.w_, self.b_)
+        if dib.modo=='record':
+            self.snapshots_ = dib.cuadros
@@ -0,0 +1,239 @@
+import numpy as np
+
+from rna.fuentes.entradas import resolver_dtype, como_arreglo, es_dispersa
+from rna.fuentes.ClassNeuronaGral import NeuronaGradiente
+from rna.fuentes.ClassRNMulticlase import RNMulticlase, _jacobiano_softmax
+from rna.fuentes.activaciones import activacion, costo
+from rna.fuentes.puntocontrol import _restaurar_historias
+
+class EntrenadorApilado(object):
+    """Entrena varias configuraciones de NeuronaGradiente o RNMulticlase sobre
+    los mismos datos en una única pasada vectorizada.
+    Los pesos de los K modelos se apilan en un tensor (K, nIn) para
+    NeuronaGradiente o (K, nOut, nIn) para RNMulticlase y se actualizan juntos
+    con cada ejemplo (o bloque) leído.
+    Parameters
+    ------------
+    modelos : list
+        Instancias sin entrenar, todas de la misma clase. Pueden diferir en
+        alpha, n_iter, cotaE, FUN, COSTO, random_state y history; deben
+        compartir batch_size y dtype y usar optimizer='sgd' sin
+        lr_schedule. shuffle, validation_split, patience, warm_start,
+        draw y accuracy_mode, accuracy_every o accuracy_sample distintos
+        de los valores por defecto dan ValueError.
+
+    Attributes
+    -----------
+    modelos_ : list
+        Los mismos modelos ya entrenados, con w_, b_, errors_ y accuracy_
+        propios (iguales a los que obtendría cada fit por separado); se
+        pueden seguir entrenando con partial_fit o con warm_start.
+    """
+    def __init__(self, modelos):
+        self.modelos = modelos
+
+    def fit(self, X, y):
+        """Fit training data.
+        Parameters
+        ----------
+        X : {array-like}, shape = [n_examples, n_features]
+            Training vectors.
+        y : array-like, shape = [n_examples] o [n_examples, n_class]
+            Target values (one-hot para RNMulticlase).
+        Returns
+        -------
+        self : object
+        """
+        modelos = list(self.modelos)
+        if len(modelos)==0:
+            raise ValueError("Se necesita al menos un modelo")
+        clase = type(modelos[0])
+        if (clase not in (NeuronaGradiente, RNMulticlase)) or any(type(m) is not clase for m in modelos):
+            raise ValueError("Todos los modelos deben ser NeuronaGradiente o todos RNMulticlase")
+        batch_size = modelos[0].batch_size
+        if any(m.batch_size!=batch_size for m in modelos):
+            raise ValueError("Todos los modelos deben usar el mismo batch_size")
+        if any(m.shuffle for m in modelos):
+            raise ValueError("El entrenamiento apilado no admite shuffle")
+        if any(m.dtype!=modelos[0].dtype for m in modelos):
+            raise ValueError("Todos los modelos deben usar el mismo dtype")
+        if any((m.optimizer!='sgd') or (m.lr_schedule is not None) for m in modelos):
+            raise ValueError("El entrenamiento apilado sólo admite optimizer='sgd' sin lr_schedule")
+        if any((m.validation_split!=0) or (m.patience is not None) for m in modelos):
+            raise ValueError("El entrenamiento apilado no admite validation_split ni patience")
+        if any((m.accuracy_mode!='full') or (m.accuracy_every!=1) or (m.accuracy_sample is not None) for m in modelos):
+            raise ValueError("El entrenamiento apilado sólo admite accuracy_mode='full' en cada época sobre todos los ejemplos")
+        if any(m.warm_start or getattr(m, 'draw', 0) for m in modelos):
+            raise ValueError("El entrenamiento apilado no admite warm_start ni draw")
+        if es_dispersa(X):
+            raise ValueError("El entrenamiento apilado no admite X dispersa; usar fit de cada modelo")
+        tipo = resolver_dtype(modelos[0].dtype, X)
+        X = como_arreglo(X, tipo)
+        y = como_arreglo(y, tipo)
+
+        multiclase = (clase is RNMulticlase)
+        K = len(modelos)
+        nRow = X.shape[0]
+        nIn = X.shape[1]
+
+        #-- pesos iniciales: los mismos que generaría cada fit por separado;
+        #-- cada generador queda luego en su modelo, como lo deja fit --
+        rgens = [np.random.RandomState(m.random_state) for m in modelos]
+        if multiclase:
+            nOut = y.shape[1]
+            W = np.zeros((K, nOut, nIn), dtype=tipo)
+            b = np.zeros((K, nOut), dtype=tipo)
+            for k, rgen in enumerate(rgens):
+                W[k] = rgen.uniform(-0.5, 0.5, [nOut, nIn])
+                b[k] = rgen.uniform(-0.5, 0.5, [nOut,1])[:,0]
+        else:
+            W = np.zeros((K, nIn), dtype=tipo)
+            b = np.zeros(K, dtype=tipo)
+            for k, rgen in enumerate(rgens):
+                W[k] = rgen.uniform(-0.5, 0.5, size=nIn)
+                b[k] = rgen.uniform(-0.5, 0.5)
+
+        alphas = np.array([m.alpha for m in modelos], dtype=tipo)
+        n_iter = np.array([m.n_iter for m in modelos])
+        cotaE = np.array([m.cotaE for m in modelos], dtype=float)
+        grupos_FUN = self._agrupar([activacion(m.FUN) for m in modelos])
+        #-- como en cada fit: NeuronaGradiente usa 'EA' si no conoce el COSTO --
+        grupos_COSTO = self._agrupar([costo(m.COSTO, defecto=None if multiclase else 'EA') for m in modelos])
+
+        if (batch_size is not None) and (batch_size!=-1) and (batch_size<1):
+            raise ValueError("batch_size debe ser None, -1 o un entero positivo")
+        tam = 1 if (batch_size is None) else (nRow if batch_size==-1 else batch_size)
+
+        errors = [[] for m in modelos]
+        accuracy = [[] for m in modelos]
+        ErrorAnt = np.zeros(K)
+        ErrorAct = np.ones(K)
+        activos = np.ones(K, dtype=bool)
+
+        i = 0
+        while True:
+            activos = activos & (i<n_iter) & (np.abs(ErrorAnt - ErrorAct) > cotaE)
+            if not activos.any():
+                break
+            ErrorAnt = ErrorAct
+            ErrorAct = np.zeros(K)
+
+            tasa = alphas * activos   #-- los modelos detenidos no se modifican
+            for ini in range(0, nRow, tam):
+                Xb = X[ini:ini+tam]
+                yb = y[ini:ini+tam]
+                B = Xb.shape[0]
+
+                if multiclase:
+                    netas = np.einsum('koi,bi->kbo', W, Xb) + b[:, None, :]
+                else:
+                    netas = W @ Xb.T + b[:, None]
+
+                (salida, delta) = self._salida_delta(netas, yb, modelos, grupos_FUN, multiclase)
+
+                paso = tasa / B
+                if multiclase:
+                    W += paso[:, None, None] * np.einsum('kbo,bi->koi', delta, Xb)
+                    b += paso[:, None] * np.sum(delta, axis=1)
+                else:
+                    W += paso[:, None] * (delta @ Xb)
+                    b += paso * np.sum(delta, axis=1)
+
+                ErrorAct += self._costo(yb, salida, grupos_COSTO)
+
+            if multiclase:
+                ErrorAct = ErrorAct / nRow
+            acc = self._accuracy(W, b, X, y, modelos, grupos_FUN, multiclase)
+            for k in np.flatnonzero(activos):
+                errors[k].append(ErrorAct[k])
+                accuracy[k].append(acc[k])
+            i = i + 1
+
+        for k, m in enumerate(modelos):
+            if multiclase:
+                m.w_ = W[k].copy()
+                m.b_ = b[k].reshape(-1,1).copy()
+            else:
+                m.w_ = W[k].copy()
+                m.b_ = b[k]
+            #-- el mismo estado que deja fit, para seguir con partial_fit o warm_start --
+            m._preparar_estado()
+            m._rgen = rgens[k]
+            m._t_epoca = len(errors[k])
+            _restaurar_historias(m, errors[k], accuracy[k])
+
+        self.modelos_ = modelos
+        return self
+
+    def _agrupar(self, funciones):
+        """Diccionario Activacion (o Costo) -> índices de los modelos que la
+        usan. Se agrupa por nombre, así un alias como 'tansig' cae en el
+        mismo grupo que 'tanh'."""
+        (grupos, primera) = ({}, {})
+        for k, f in enumerate(funciones):
+            f = primera.setdefault(f.nombre, f)
+            grupos.setdefault(f, []).append(k)
+        return {f: np.array(idx) for f, idx in grupos.items()}
+
+    def _salida_delta(self, netas, y, modelos, grupos_FUN, multiclase):
+        """Aplica la función de activación de cada grupo de modelos y calcula
+        el delta de actualización con la misma regla que usa su fit"""
+        salida = np.empty_like(netas)
+        delta = np.empty_like(netas)
+        if multiclase:
+            yk = y[None, :, :]
+        else:
+            yk = y[None, :]
+        for act, idx in grupos_FUN.items():
+            n = netas[idx]
+            if act.nombre=='softmax':
+                n = n - np.max(n, axis=-1, keepdims=True)
+                s = np.exp(n)
+                s /= np.sum(s, axis=-1, keepdims=True)
+                g = yk - s
+                usaEC = np.array([costo(modelos[k].COSTO).nombre=='EC' for k in idx])
+                d = np.where(usaEC[:, None, None], g, _jacobiano_softmax(s, g, axis=-1))
+            else:
+                s = act.evaluar(n)
+                d = (yk - s) * act.derivar(s)
+            salida[idx] = s
+            delta[idx] = d
+        return (salida, delta)
+
+    def _costo(self, y, salida, grupos_COSTO):
+        """Costo de cada modelo sobre el bloque, vector de longitud K"""
+        yk = y[None, ...]
+        total = np.zeros(salida.shape[0])
+        ejes = tuple(range(1, salida.ndim))
+        for cst, idx in grupos_COSTO.items():
+            c = cst.valor(yk, salida[idx])
+            total[idx] = np.sum(c, axis=ejes)
+        return total
+
+    def _accuracy(self, W, b, X, y, modelos, grupos_FUN, multiclase):
+        """Accuracy de los K modelos sobre (X, y) con una única pasada"""
+        acc = np.zeros(len(modelos))
+        if multiclase:
+            netas = np.einsum('koi,bi->kbo', W, X) + b[:, None, :]
+            clases = np.argmax(y, axis=1)
+        else:
+            netas = W @ X.T + b[:, None]
+        for act, idx in grupos_FUN.items():
+            #-- las mismas etiquetas que el predict de cada modelo; sin umbral
+            #-- (softmax, lineal) el argmax de las netas es el de las salidas --
+            s = netas[idx] if (act.umbral is None) else act.evaluar(netas[idx])
+            if multiclase:
+                if act.umbral is not None:
+                    s = (s>act.umbral)*1
+                acc[idx] = np.mean(np.argmax(s, axis=-1)==clases, axis=1)
+            elif act.umbral==0:
+                acc[idx] = np.mean((2*(s>0)*1-1)==y, axis=1)
+            elif act.umbral is not None:
+                acc[idx] = np.mean(((s>act.umbral)*1)==y, axis=1)
+            else:
+                #-- la salida lineal no tiene umbral, se usa la del propio modelo --
+                for k in idx:
+                    m = modelos[k]
+                    (m.w_, m.b_) = (W[k], b[k])
+                    acc[k] = m.accuracy(X, y)
+        return acc
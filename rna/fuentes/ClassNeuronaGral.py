@@ -5,8 +5,16 @@ from matplotlib import pylab as plt
 from IPython import display
 
 from rna.fuentes.grafica import *
+from rna.fuentes.entradas import resolver_dtype, como_arreglo, separar_validacion, es_dispersa, fila_dispersa
+from rna.fuentes.prediccion import predecir_por_bloques
+from rna.fuentes.serializacion import Guardable, verificar_escritura
+from rna.fuentes.activaciones import activacion, costo
+from rna.fuentes.historia import ConHistoria
+from rna.fuentes.ClassOptimizador import crear_optimizador, crear_programa, ConTasa
+from rna.fuentes.ClassCallbackEntrenamiento import ListaCallbacks, SIN_CALLBACKS, con_parada_temprana
+from rna.fuentes.ClassDibujoEntrenamiento import DibujoEntrenamiento, ConDibujo
 
-class NeuronaGradiente(object):
+class NeuronaGradiente(ConHistoria, ConTasa, ConDibujo, Guardable):
     """
     Parameters
     ------------
@@ -16,23 +24,70 @@ class NeuronaGradiente(object):
         Passes over the training dataset.
     cotaE : float
         minimum error threshold
-    FUN : string
+    FUN : string or Activacion
         activation function: 'sigmoid', 'tanh', otherwise linear
+    COSTO : string or Costo
+        'ECM', 'EC_binaria', 'EC', 'EA' o uno registrado
     random_state : int
         Random number generator seed for random weight initialization.
     draw : int
         1 si dibuja -  0 si no
     title : list con 2 elementos
         titulos de los ejes - sólo 2D
+    batch_size : int or None
+        None en línea, N mini-lotes de N ejemplos, -1 lote completo
+    shuffle : bool
+        mezcla los ejemplos en cada época
+    dtype : numpy dtype or None
+        tipo de punto flotante; None usa el de X o float64
+    draw_every : int
+        dibuja una de cada draw_every épocas
+    draw_interval : float or None
+        segundos mínimos entre dos dibujos
+    draw_mode : string
+        'sync', 'thread' o 'record' (sólo guarda snapshots_)
+    accuracy_mode : string
+        'full' evalúa accuracy(X, y) y 'fused' usa las salidas del entrenamiento
+    accuracy_every : int
+        con 'full', evalúa una de cada accuracy_every épocas
+    accuracy_sample : int, float or None
+        con 'full', tamaño o fracción de la submuestra evaluada
+    history : string
+        'list' o 'array' para errors_ y accuracy_
+    optimizer : string or Optimizador
+        'sgd', 'momentum', 'rmsprop', 'adam' o una instancia
+    lr_schedule : string, callable or None
+        'step', 'exponential', 'cosine' o epoca -> factor de alpha
+    validation_split : float
+        fracción de los ejemplos separada para validar
+    patience : int or None
+        épocas sin mejora antes de detener fit
+    restore_best_weights : bool
+        con patience, deja los pesos de la mejor época
+    warm_start : bool
+        fit continúa desde los pesos actuales
         
     Attributes
     -----------
     w_ : 1d-array
         Weights after fitting.
-    errors_ : list
+    errors_ : list or 1d-array
         Number of misclassifications (updates) in each epoch.
+    accuracy_ : list or 1d-array
+        accuracy de cada época (NaN si no se evaluó).
+    snapshots_ : list
+        (epoca, w, b) de cada cuadro con draw_mode='record'.
+    val_errors_ : list
+        costo sobre los datos de validación en cada época.
     """
-    def __init__(self, alpha=0.01, n_iter=50, cotaE=10e-07, FUN='sigmoid', COSTO='ECM', random_state=None, draw=0, title=['X1','X2']):
+    def __init__(self, alpha=0.01, n_iter=50, cotaE=10e-07, FUN='sigmoid', COSTO='ECM', random_state=None,
+                 draw=0, title=['X1','X2'],
+                 batch_size=None, shuffle=False, dtype=None,
+                 draw_every=1, draw_interval=None, draw_mode='sync',
+                 accuracy_mode='full', accuracy_every=1, accuracy_sample=None, history='list',
+                 optimizer='sgd', lr_schedule=None,
+                 validation_split=0.0, patience=None, restore_best_weights=False,
+                 warm_start=False):
         self.alpha = alpha
         self.n_iter = n_iter
         self.cotaE = cotaE
@@ -41,107 +96,328 @@ class NeuronaGradiente(object):
         self.random_state = random_state #-- asignar el valor 1 para fijar la semilla por defecto es aleatorio
         self.draw = draw
         self.title = title
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.dtype = dtype
+        self.draw_every = draw_every
+        self.draw_interval = draw_interval
+        self.draw_mode = draw_mode
+        self.accuracy_mode = accuracy_mode
+        self.accuracy_every = accuracy_every
+        self.accuracy_sample = accuracy_sample
+        self.history = history
+        self.optimizer = optimizer
+        self.lr_schedule = lr_schedule
+        self.validation_split = validation_split
+        self.patience = patience
+        self.restore_best_weights = restore_best_weights
+        self.warm_start = warm_start
 
-    def fit(self, X, y):
+    def fit(self, X, y, callbacks=None, validation_data=None):
         """Fit training data.
         Parameters
         ----------
-        X : {array-like}, shape = [n_examples, n_features]
+        X : {array-like, sparse matrix}, shape = [n_examples, n_features]
             Training vectors, where n_examples is the number of
             examples and n_features is the number of features.
         y : array-like, shape = [n_examples]
             Target values.
+        callbacks : list of CallbackEntrenamiento, optional
+            reciben on_train_begin/end, on_epoch_begin/end y on_batch_end
+            (ver Perfilador para medir el tiempo de cada fase).
+        validation_data : tuple (X_val, y_val), optional
+            datos para val_errors_ y patience; reemplaza a validation_split.
         Returns
         -------
         self : object
         """
 
-          
-        rgen = np.random.RandomState(self.random_state)
 
-        # self.w_ = rgen.normal(loc=0.0, scale=0.01,size=1 + X.shape[1])
-
-        self.w_ = rgen.uniform(-0.5, 0.5, size= X.shape[1]) 
-        self.b_ = rgen.uniform(-0.5, 0.5)
-        self.errors_ = []
-        self.accuracy_ = []
+        tipo = resolver_dtype(self.dtype, X)
+        X = como_arreglo(X, tipo)
+        y = como_arreglo(y, tipo)
+        (X, y, Xv, yv) = separar_validacion(X, y, self.validation_split, validation_data, self.random_state, tipo)
+        if not (self.warm_start and hasattr(self, 'w_')):
+            self._inicializar(X, y)
+        else:
+            verificar_escritura(self)
+        (Xa, ya) = self._muestra_accuracy(X, y)
+        cbs = ListaCallbacks(con_parada_temprana(callbacks, self), self)
+        cr = cbs.cronometro
+        self.stop_training = False
+        if (self.draw):
+            dib = DibujoEntrenamiento(self._funcion_dibujo(X, y), self.draw_mode, self.draw_every, self.draw_interval)
         
-        ph = 0  # manejador de la recta mientras se dibuja
         ErrorAnt = 0
         ErrorAct = 1
         
-        i = 0
-        while ((i<self.n_iter) and (np.absolute(ErrorAnt- ErrorAct) > self.cotaE)):
+        cbs.on_train_begin()
+        inicio = i = len(self.errors_)
+        while ((i<inicio+self.n_iter) and (np.absolute(ErrorAnt- ErrorAct) > self.cotaE) and not self.stop_training):
+            cbs.on_epoch_begin(i)
             ErrorAnt = ErrorAct
-            ErrorAct = 0
-            
-            for xi, target in zip(X, y):
-                salida = self.predict_nOut(xi)
-                errorXi = (target - salida)
-                
-                update = self.alpha * errorXi * self.derivar(salida)
-                
-                self.w_ += update * xi
-                self.b_ += update
-                
-                ErrorAct += self.fCosto(target, salida)
-                
-            self.errors_.append(ErrorAct)
-            self.accuracy_.append(self.accuracy(X,y))
+            ErrorAct = self._epoca(X, y, cbs)
+            cr.inicio()
+            acc = self._accuracy_epoca(i, Xa, ya, X.shape[0])
+            cr.marca('accuracy')
+            self._registrar(ErrorAct, acc)
             
             # graficar la recta
             if (self.draw):
-                ph = dibuPtosRecta(X,y, self.w_, self.b_, self.title, ph)
+                dib.epoca(i, self.w_, self.b_)
+                cr.marca('dibujo')
             
+            logs = {'error': ErrorAct, 'accuracy': acc, 'muestras': X.shape[0]}
+            if Xv is not None:
+                logs['val_error'] = self._costo_validacion(Xv, yv)
+                self.val_errors_.append(logs['val_error'])
+            cbs.on_epoch_end(i, logs)
             i = i + 1
+        if (self.draw):
+            self._cerrar_dibujo(dib, i-1)
+        if (i>inicio) and np.isnan(self.accuracy_[-1]):
+            self.accuracy_[-1] = self.accuracy(Xa, ya)
+        cbs.on_train_end()
+        return self
+
+    def partial_fit(self, X, y):
+        """Una pasada de entrenamiento sobre un bloque de ejemplos.
+        Si todavía no hay pesos (ni de fit ni de una llamada anterior) los
+        inicializa; si no, continúa desde los pesos actuales, también los
+        que dejó fit, de modo que un conjunto que no entra en memoria se
+        recorre bloque a bloque.
+        Cada llamada agrega el costo del bloque a errors_.
+        Returns
+        -------
+        self : object
+        """
+        tipo = self.w_.dtype if hasattr(self, 'w_') else resolver_dtype(self.dtype, X)
+        X = como_arreglo(X, tipo)
+        y = como_arreglo(y, tipo)
+        if not hasattr(self, 'w_'):
+            self._inicializar(X, y)
+        else:
+            verificar_escritura(self)
+        ErrorAct = self._epoca(X, y)
+        self._registrar(ErrorAct, self._aciertos / X.shape[0] if self._fusionar else np.nan)
         return self
 
+    def _inicializar(self, X, y):
+        if (self.batch_size is not None) and (self.batch_size!=-1) and (self.batch_size<1):
+            raise ValueError("batch_size debe ser None, -1 o un entero positivo")
+        
+        self._rgen = np.random.RandomState(self.random_state)
+
+        # self.w_ = rgen.normal(loc=0.0, scale=0.01,size=1 + X.shape[1])
+
+        self.w_ = self._rgen.uniform(-0.5, 0.5, size= X.shape[1]).astype(X.dtype)
+        self.b_ = X.dtype.type(self._rgen.uniform(-0.5, 0.5))
+        self._preparar_estado()
+
+    def _preparar_estado(self):
+        """Historias, optimizador y época de lr_schedule para pesos nuevos o restaurados"""
+        self.val_errors_ = []
+        self._opt = crear_optimizador(self.optimizer, [self.w_, self.b_])
+        self._programa = crear_programa(self.lr_schedule, self.n_iter)
+        self._t_epoca = 0
+        self._preparar_historia()
+        #-- FUN y COSTO se resuelven una vez; un COSTO desconocido es el error absoluto --
+        self._activacion = activacion(self.FUN)
+        if self._activacion.por_filas:
+            raise ValueError("NeuronaGradiente tiene una sola salida; usar RNMulticlase para " + self._activacion.nombre)
+        self._funcion_costo = costo(self.COSTO, defecto='EA')
+        #-- sólo las salidas con umbral (tanh, sigmoid) tienen etiqueta de clase --
+        self._fusionar = (self.accuracy_mode=='fused') and (self._activacion.umbral is not None)
+        self._aciertos = 0
+
+    def _epoca(self, X, y, cbs=SIN_CALLBACKS):
+        """Una pasada sobre (X, y); retorna el costo acumulado"""
+        if self.shuffle:
+            orden = self._rgen.permutation(X.shape[0])
+            X, y = X[orden], y[orden]
+        
+        alpha = self._tasa()
+        opt = self._opt
+        if self.batch_size is not None:
+            return self._epoca_lotes(X, y, alpha, cbs)
+        
+        (cr, medir, por_lote) = (cbs.cronometro, cbs.medir, cbs.por_lote)
+        fusionar = self._fusionar
+        if fusionar:
+            #-- las salidas se guardan y se clasifican juntas al final de la pasada --
+            salidas = np.empty(X.shape[0], dtype=self.w_.dtype)
+        if es_dispersa(X):
+            return self._epoca_dispersa(X, y, alpha, cbs, salidas if fusionar else None)
+        (act, cst) = (self._activacion, self._funcion_costo)
+        cr.inicio()
+        ErrorAct = 0
+        for e, (xi, target) in enumerate(zip(X, y)):
+            #-- net_input sin sus conversiones, que se pagarían por ejemplo --
+            salida = act.evaluar(np.dot(xi, self.w_) + self.b_)
+            if fusionar:
+                salidas[e] = salida
+            if medir: cr.marca('forward')
+            errorXi = (target - salida)
+            
+            if opt is None:
+                update = alpha * errorXi * act.derivar(salida)
+                
+                self.w_ += update * xi
+                self.b_ += update
+            else:
+                g = errorXi * act.derivar(salida)
+                (pw, pb) = opt.pasos((g * xi, g), alpha)
+                self.w_ += pw
+                self.b_ += pb
+            if medir: cr.marca('actualizacion')
+            
+            ErrorAct += cst.valor(target, salida)
+            if medir: cr.marca('costo')
+            if por_lote:
+                cbs.on_batch_end(e, {'size': 1})
+        if fusionar:
+            self._aciertos = np.sum(self._etiquetas(salidas)==y)
+        return ErrorAct
+
+    def _epoca_dispersa(self, X, y, alpha, cbs, salidas):
+        """Pasada en línea sobre una matriz CSR: cada ejemplo sólo lee y
+        actualiza los pesos de sus atributos no nulos (con un optimizer con
+        memoria el paso alcanza a todos los pesos)"""
+        (cr, medir, por_lote) = (cbs.cronometro, cbs.medir, cbs.por_lote)
+        opt = self._opt
+        (act, cst) = (self._activacion, self._funcion_costo)
+        cr.inicio()
+        ErrorAct = 0
+        for e in range(X.shape[0]):
+            (idx, val) = fila_dispersa(X, e)
+            target = y[e]
+            salida = act.evaluar(self.w_[idx] @ val + self.b_)
+            if salidas is not None:
+                salidas[e] = salida
+            if medir: cr.marca('forward')
+            g = (target - salida) * act.derivar(salida)
+            if opt is None:
+                update = alpha * g
+                self.w_[idx] += update * val
+                self.b_ += update
+            else:
+                direccion = np.zeros_like(self.w_)
+                direccion[idx] = g * val
+                (pw, pb) = opt.pasos((direccion, g), alpha)
+                self.w_ += pw
+                self.b_ += pb
+            if medir: cr.marca('actualizacion')
+
+            ErrorAct += cst.valor(target, salida)
+            if medir: cr.marca('costo')
+            if por_lote:
+                cbs.on_batch_end(e, {'size': 1})
+        if salidas is not None:
+            self._aciertos = np.sum(self._etiquetas(salidas)==y)
+        return ErrorAct
+
+    def _epoca_lotes(self, X, y, alpha, cbs=SIN_CALLBACKS):
+        """Una pasada sobre (X, y) actualizando los pesos por bloques.
+        El gradiente de cada bloque se promedia, por lo que batch_size=1
+        equivale al entrenamiento en línea. Retorna el costo acumulado.
+        """
+        nRow = X.shape[0]
+        tam = nRow if (self.batch_size==-1) else self.batch_size
+        
+        (cr, medir, por_lote) = (cbs.cronometro, cbs.medir, cbs.por_lote)
+        fusionar = self._fusionar
+        if fusionar:
+            salidas = np.empty(nRow, dtype=self.w_.dtype)
+        (act, cst) = (self._activacion, self._funcion_costo)
+        cr.inicio()
+        ErrorAct = 0
+        for ini in range(0, nRow, tam):
+            Xb = X[ini:ini+tam]
+            yb = y[ini:ini+tam]
+            
+            #-- la activación se aplica sobre las netas recién calculadas, sin copiarlas --
+            netas = self.net_input(Xb)
+            salida = act.evaluar(netas, out=netas)
+            if fusionar:
+                salidas[ini:ini+tam] = salida
+            if medir: cr.marca('forward')
+            #-- costo y error y - salida salen de una misma pasada --
+            (costo, delta) = cst.costo_gradiente(yb, salida)
+            if not act.lineal:
+                delta *= act.derivar(salida)
+            
+            if self._opt is None:
+                paso = alpha / Xb.shape[0]
+                self.w_ += paso * (Xb.T @ delta)
+                self.b_ += paso * np.sum(delta)
+            else:
+                B = Xb.shape[0]
+                (pw, pb) = self._opt.pasos(((Xb.T @ delta) / B, np.sum(delta) / B), alpha)
+                self.w_ += pw
+                self.b_ += pb
+            if medir: cr.marca('actualizacion')
+            
+            ErrorAct += costo
+            if por_lote:
+                cbs.on_batch_end(ini // tam, {'size': Xb.shape[0]})
+        if fusionar:
+            self._aciertos = np.sum(self._etiquetas(salidas)==y)
+        return ErrorAct
+
+    def _costo_validacion(self, X, y):
+        """Costo sobre (X, y) en una sola pasada vectorizada, con la misma
+        escala que errors_ (suma sobre los ejemplos)"""
+        return self._funcion_costo.suma(y, self.predict_nOut(X))
+
     def fCosto(self,y, y_hat):
         #-- y es el valor esperado e y_hat el valor obtenido (ambos escalares)
-        EPS = EPS = np.finfo(float).eps
-        if (self.COSTO=='ECM'):
-            return((y-y_hat)**2)
-        if (self.COSTO=='EC_binaria'):
-            return(-y*np.log(y_hat+EPS)-(1-y)*np.log(1-y_hat+EPS))
-        if (self.COSTO=='EC'):
-            return(-y*np.log(y_hat+EPS))
-        else:
-            return(np.absolute(y-y_hat))
+        return costo(self.COSTO, defecto='EA').valor(y, y_hat)
 
 
+    def _funcion_dibujo(self, X, y):
+        return lambda w, b, ph: dibuPtosRecta(X, y, w, b, self.title, ph)
+
     def net_input(self, X):
         """Calculate net input"""
+        X = como_arreglo(X, self.w_.dtype)
+        if es_dispersa(X):
+            return X @ self.w_ + self.b_
         return np.dot(X, self.w_) + self.b_
     
     def evaluar(self, x):
-        if (self.FUN=='tanh'):
-            return (2.0 / (1+np.exp(-2*x)) - 1)
-        elif (self.FUN=='sigmoid'):
-            return (1.0/(1+np.exp(-x)))
-        else:
-            return(x)
+        return activacion(self.FUN).evaluar(x)
         
     def derivar(self,x):
-        if (self.FUN=='tanh'):
-            return (1-x**2)
-        elif (self.FUN=='sigmoid'):
-            return (x*(1-x))
-        else:
-            return(1)    
+        return activacion(self.FUN).derivar(x)
 
-    def predict_nOut(self, X):
-        """Return class label after unit step"""
-        return self.evaluar(self.net_input(X))
+    def predict_nOut(self, X, chunk_size=None, n_jobs=None, out=None):
+        """Return class label after unit step (chunk_size, n_jobs y out como en predict)"""
+        return predecir_por_bloques(lambda Xb: self.evaluar(self.net_input(Xb)),
+                                    X, chunk_size, n_jobs, out)
     
-    def predict(self, X):
-        """Retorna un entero con el índice de la clase más probable """
+    def predict(self, X, chunk_size=None, n_jobs=None, out=None):
+        """Retorna un entero con el índice de la clase más probable
+        chunk_size, n_jobs, out : predicen X por bloques de chunk_size
+            ejemplos en n_jobs hilos, escribiendo en out si se indica (ver
+            predecir_por_bloques); X puede ser un np.memmap.
+        """
+        return predecir_por_bloques(self._predict, X, chunk_size, n_jobs, out)
+
+    def _predict(self, X):
         y_hat = self.predict_nOut(X)
-        if (self.FUN=='tanh'):
-            return (2*(y_hat>0)*1-1)
-        elif (self.FUN=='sigmoid'):
-            return ((y_hat>0.5)*1)
+        if activacion(self.FUN).umbral is not None:
+            return self._etiquetas(y_hat)
         else:
             return(X)
+
+    def _etiquetas(self, y_hat):
+        """Clase de cada salida según el umbral de la activación: -1/1 si
+        es 0 (tanh), 0/1 si no (sigmoid)"""
+        umbral = activacion(self.FUN).umbral
+        if (umbral==0):
+            return (2*(y_hat>0)*1-1)
+        else:
+            return ((y_hat>umbral)*1)
             
     def accuracy(self, X, y):
         y_hat = self.predict(X)
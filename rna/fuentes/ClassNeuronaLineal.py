@@ -5,8 +5,15 @@ from matplotlib import pylab as plt
 from IPython import display
 
 from rna.fuentes.grafica import *
+from rna.fuentes.entradas import resolver_dtype, como_arreglo, separar_validacion, es_dispersa, fila_dispersa
+from rna.fuentes.prediccion import predecir_por_bloques
+from rna.fuentes.serializacion import Guardable, verificar_escritura
+from rna.fuentes.nucleos import usar_jit, lineal_epoca
+from rna.fuentes.ClassOptimizador import crear_optimizador, crear_programa, ConTasa
+from rna.fuentes.ClassCallbackEntrenamiento import ListaCallbacks, SIN_CALLBACKS, con_parada_temprana
+from rna.fuentes.ClassDibujoEntrenamiento import DibujoEntrenamiento, ConDibujo
 
-class NeuronaLineal(object):
+class NeuronaLineal(ConTasa, ConDibujo, Guardable):
     """
     Parameters
     ------------
@@ -14,12 +21,40 @@ class NeuronaLineal(object):
         Learning rate (between 0.0 and 1.0)
     n_iter : int
         Passes over the training dataset.
+    cotaE : float
+        minimum error threshold
     random_state : int
         Random number generator seed for random weight initialization.
     draw : int
         1 si dibuja -  0 si no
     title : list con 2 elementos
         titulos de los ejes - sólo 2D
+    solver : string
+        'lms' (regla delta), 'lstsq' o 'streaming' (ver fit_streaming)
+    chunk_size : int
+        filas por bloque con solver='streaming'
+    dtype : numpy dtype or None
+        tipo de punto flotante; None usa el de X o float64
+    jit : bool
+        compila el lazo LMS con Numba si está instalado
+    draw_every : int
+        dibuja una de cada draw_every épocas
+    draw_interval : float or None
+        segundos mínimos entre dos dibujos
+    draw_mode : string
+        'sync', 'thread' o 'record' (sólo guarda snapshots_)
+    optimizer : string or Optimizador
+        'sgd', 'momentum', 'rmsprop', 'adam' o una instancia
+    lr_schedule : string, callable or None
+        'step', 'exponential', 'cosine' o epoca -> factor de alpha
+    validation_split : float
+        fracción de los ejemplos separada para validar
+    patience : int or None
+        épocas sin mejora antes de detener fit
+    restore_best_weights : bool
+        con patience, deja los pesos de la mejor época
+    warm_start : bool
+        fit continúa desde los pesos actuales (sólo solver='lms')
         
     Attributes
     -----------
@@ -27,73 +62,323 @@ class NeuronaLineal(object):
         Weights after fitting.
     errors_ : list
         Number of misclassifications (updates) in each epoch.
+    snapshots_ : list
+        (epoca, w, b) de cada cuadro con draw_mode='record'.
+    val_errors_ : list
+        costo sobre los datos de validación en cada época.
     """
-    def __init__(self, alpha=0.01, n_iter=50, cotaE=10E-07, random_state=None, draw=0, title=['X1','X2']):
+    def __init__(self, alpha=0.01, n_iter=50, cotaE=10E-07, random_state=None,
+                 draw=0, title=['X1','X2'],
+                 solver='lms', chunk_size=10000, dtype=None, jit=False,
+                 draw_every=1, draw_interval=None, draw_mode='sync',
+                 optimizer='sgd', lr_schedule=None,
+                 validation_split=0.0, patience=None, restore_best_weights=False,
+                 warm_start=False):
         self.alpha = alpha
         self.n_iter = n_iter
         self.cotaE = cotaE
         self.random_state = random_state #-- asignar el valor 1 para fijar la semilla por defecto es aleatorio
         self.draw = draw
         self.title = title
+        self.solver = solver
+        self.chunk_size = chunk_size
+        self.dtype = dtype
+        self.jit = jit
+        self.draw_every = draw_every
+        self.draw_interval = draw_interval
+        self.draw_mode = draw_mode
+        self.optimizer = optimizer
+        self.lr_schedule = lr_schedule
+        self.validation_split = validation_split
+        self.patience = patience
+        self.restore_best_weights = restore_best_weights
+        self.warm_start = warm_start
 
-    def fit(self, X, y):
+    def fit(self, X, y, callbacks=None, validation_data=None):
         """Fit training data.
         Parameters
         ----------
-        X : {array-like}, shape = [n_examples, n_features]
+        X : {array-like, sparse matrix}, shape = [n_examples, n_features]
             Training vectors, where n_examples is the number of
             examples and n_features is the number of features.
         y : array-like, shape = [n_examples]
             Target values.
+        callbacks : list of CallbackEntrenamiento, optional
+            reciben on_train_begin/end, on_epoch_begin/end y on_batch_end
+            (ver Perfilador para medir el tiempo de cada fase).
+        validation_data : tuple (X_val, y_val), optional
+            datos para val_errors_ y patience; reemplaza a validation_split.
+            callbacks y validación sólo se usan con solver='lms'.
         Returns
         -------
         self : object
         """
 
-        # graficar la recta
-        if (self.draw):
-            ycol=y.reshape(-1,1)
-            puntos = np.concatenate((X,ycol), axis=1)
-            T = np.zeros(X.shape[0])
-            
-        rgen = np.random.RandomState(self.random_state)
+        tipo = resolver_dtype(self.dtype, X)
+        X = como_arreglo(X, tipo)
+        y = como_arreglo(y, tipo)
 
-        # self.w_ = rgen.normal(loc=0.0, scale=0.01,size=1 + X.shape[1])
+        if (self.solver=='lstsq') and es_dispersa(X):
+            #-- con X dispersa se resuelven las ecuaciones normales, sin densificar X --
+            self.fit_streaming([(X, y)])
+            self._dibujar_solucion(X, y)
+            return self
+        elif (self.solver=='lstsq'):
+            A = np.column_stack((X, np.ones(X.shape[0], dtype=tipo)))
+            sol = np.linalg.lstsq(A, y, rcond=None)[0]
+            self.w_ = sol[:-1]
+            self.b_ = sol[-1]
+            self.errors_ = [np.sum((y - self.predict(X))**2)]
+            self._dibujar_solucion(X, y)
+            return self
+        elif (self.solver=='streaming'):
+            c = self.chunk_size
+            self.fit_streaming((X[ini:ini+c], y[ini:ini+c]) for ini in range(0, X.shape[0], c))
+            self._dibujar_solucion(X, y)
+            return self
+        elif (self.solver!='lms'):
+            raise ValueError("solver debe ser 'lms', 'lstsq' o 'streaming'")
 
-        self.w_ = rgen.uniform(-0.5, 0.5, size= X.shape[1]) 
-        self.b_ = rgen.uniform(-0.5, 0.5)
-        self.errors_ = []
-        ph = 0  # manejador de la recta mientras se dibuja
+        (X, y, Xv, yv) = separar_validacion(X, y, self.validation_split, validation_data, self.random_state, tipo)
+        if not (self.warm_start and hasattr(self, '_t_epoca')):
+            self._inicializar(X, y)
+        else:
+            verificar_escritura(self)
+        cbs = ListaCallbacks(con_parada_temprana(callbacks, self), self)
+        cr = cbs.cronometro
+        self.stop_training = False
+        # graficar la recta
+        if (self.draw):
+            dib = DibujoEntrenamiento(self._funcion_dibujo(X, y), self.draw_mode, self.draw_every, self.draw_interval)
         ErrorAnt = 0
         ErrorAct = 1
         
-        i = 0
-        while ((i<self.n_iter) and (np.abs(ErrorAnt- ErrorAct) > self.cotaE)):
+        cbs.on_train_begin()
+        inicio = i = len(self.errors_)
+        while ((i<inicio+self.n_iter) and (np.abs(ErrorAnt- ErrorAct) > self.cotaE) and not self.stop_training):
+            cbs.on_epoch_begin(i)
             ErrorAnt = ErrorAct
-            ErrorAct = 0
-            for xi, target in zip(X, y):
-                
-                errorXi = (target - self.predict(xi))
-                update = self.alpha * errorXi
-                self.w_ += update * xi
-                self.b_ += update
-                
-                ErrorAct += errorXi**2
+            ErrorAct = self._epoca(X, y, cbs)
                 
             self.errors_.append(ErrorAct)
             
             # graficar la recta
             if (self.draw):
-                ph = dibuPtosRecta(puntos,T, np.array([self.w_, -1],dtype=object), self.b_, self.title, ph)
+                cr.inicio()
+                dib.epoca(i, self.w_, self.b_)
+                cr.marca('dibujo')
             
+            logs = {'error': ErrorAct, 'muestras': X.shape[0]}
+            if Xv is not None:
+                logs['val_error'] = self._costo_validacion(Xv, yv)
+                self.val_errors_.append(logs['val_error'])
+            cbs.on_epoch_end(i, logs)
             i = i + 1
+        if (self.draw):
+            self._cerrar_dibujo(dib, i-1)
+        cbs.on_train_end()
         
         return self
 
+    def partial_fit(self, X, y):
+        """Entrenamiento incremental sobre un bloque de ejemplos.
+        Con solver='lms' hace una pasada de la regla delta desde los pesos
+        actuales y agrega a errors_ el error cuadrático del bloque.
+        Con 'lstsq' o 'streaming' suma el bloque a XᵀX y Xᵀy y vuelve a
+        resolver, de modo que tras el último bloque w_ y b_ son la solución
+        de mínimos cuadrados de todos los bloques vistos; errors_ guarda el
+        error cuadrático acumulado tras cada bloque.
+        Returns
+        -------
+        self : object
+        """
+        if (self.solver=='lms'):
+            tipo = self.w_.dtype if hasattr(self, 'w_') else resolver_dtype(self.dtype, X)
+            X = como_arreglo(X, tipo)
+            y = como_arreglo(y, tipo)
+            if not hasattr(self, 'w_'):
+                self._inicializar(X, y)
+            else:
+                verificar_escritura(self)
+            self.errors_.append(self._epoca(X, y))
+            return self
+
+        if not hasattr(self, '_momentos'):
+            self._momentos = None
+            self.errors_ = []
+        self._acumular(X, y)
+        self._resolver()
+        self.errors_.append(self._sse)
+        return self
+
+    def fit_streaming(self, bloques):
+        """Solución de mínimos cuadrados leyendo los datos una sola vez.
+        Parameters
+        ----------
+        bloques : iterable de tuplas (X_chunk, y_chunk)
+            Por ejemplo los bloques de un CSV leído por partes. Sólo se
+            mantienen en memoria XᵀX, Xᵀy, yᵀy y las sumas de columnas.
+        Returns
+        -------
+        self : object
+        """
+        self._momentos = None
+        for Xb, yb in bloques:
+            self._acumular(Xb, yb)
+        if self._momentos is None:
+            raise ValueError("No se recibieron ejemplos")
+        self._resolver()
+        self.errors_ = [self._sse]
+        return self
+
+    def _inicializar(self, X, y):
+        rgen = np.random.RandomState(self.random_state)
+
+        # self.w_ = rgen.normal(loc=0.0, scale=0.01,size=1 + X.shape[1])
+
+        self.w_ = rgen.uniform(-0.5, 0.5, size= X.shape[1]).astype(X.dtype)
+        self.b_ = X.dtype.type(rgen.uniform(-0.5, 0.5))
+        self._preparar_estado()
+
+    def _preparar_estado(self):
+        """Historias, optimizador y época de lr_schedule para pesos nuevos o restaurados"""
+        self.errors_ = []
+        self.val_errors_ = []
+        self._opt = crear_optimizador(self.optimizer, [self.w_, self.b_])
+        self._programa = crear_programa(self.lr_schedule, self.n_iter)
+        self._t_epoca = 0
+
+    def _epoca(self, X, y, cbs=SIN_CALLBACKS):
+        """Una pasada LMS sobre (X, y); retorna el error cuadrático acumulado"""
+        (cr, medir, por_lote) = (cbs.cronometro, cbs.medir, cbs.por_lote)
+        cr.inicio()
+        alpha = self._tasa()
+        opt = self._opt
+        if es_dispersa(X):
+            return self._epoca_dispersa(X, y, alpha, cbs)
+        #-- el núcleo compilado sólo implementa la regla delta --
+        if (opt is None) and usar_jit(self.jit):
+            (self.b_, ErrorAct) = lineal_epoca(X, y, self.w_, self.b_, alpha)
+            if medir: cr.marca('actualizacion')
+            return ErrorAct
+        
+        ErrorAct = 0
+        for e, (xi, target) in enumerate(zip(X, y)):
+            
+            #-- net_input sin las conversiones de predict, que se pagarían por ejemplo --
+            errorXi = (target - (np.dot(xi, self.w_) + self.b_))
+            if medir: cr.marca('forward')
+            if opt is None:
+                update = alpha * errorXi
+                self.w_ += update * xi
+                self.b_ += update
+            else:
+                (pw, pb) = opt.pasos((errorXi * xi, errorXi), alpha)
+                self.w_ += pw
+                self.b_ += pb
+            if medir: cr.marca('actualizacion')
+            
+            ErrorAct += errorXi**2
+            if medir: cr.marca('costo')
+            if por_lote:
+                cbs.on_batch_end(e, {'size': 1})
+        return ErrorAct
+
+    def _epoca_dispersa(self, X, y, alpha, cbs):
+        """Pasada LMS sobre una matriz CSR: cada ejemplo sólo lee y actualiza
+        los pesos de sus atributos no nulos (con un optimizer con memoria el
+        paso alcanza a todos los pesos)"""
+        (cr, medir, por_lote) = (cbs.cronometro, cbs.medir, cbs.por_lote)
+        opt = self._opt
+        ErrorAct = 0
+        for e in range(X.shape[0]):
+            (idx, val) = fila_dispersa(X, e)
+            errorXi = (y[e] - (self.w_[idx] @ val + self.b_))
+            if medir: cr.marca('forward')
+            if opt is None:
+                update = alpha * errorXi
+                self.w_[idx] += update * val
+                self.b_ += update
+            else:
+                direccion = np.zeros_like(self.w_)
+                direccion[idx] = errorXi * val
+                (pw, pb) = opt.pasos((direccion, errorXi), alpha)
+                self.w_ += pw
+                self.b_ += pb
+            if medir: cr.marca('actualizacion')
+
+            ErrorAct += errorXi**2
+            if medir: cr.marca('costo')
+            if por_lote:
+                cbs.on_batch_end(e, {'size': 1})
+        return ErrorAct
+
+    def _costo_validacion(self, X, y):
+        """Error cuadrático sobre (X, y) en una sola pasada vectorizada"""
+        return np.sum((y - self.predict(X))**2)
+
+    def _acumular(self, X, y):
+        """Suma un bloque a las ecuaciones normales (con la columna de unos del sesgo)"""
+        if self._momentos is None:
+            nIn = np.shape(X)[1]
+            self._momentos = {'M': np.zeros((nIn+1, nIn+1)), 'v': np.zeros(nIn+1), 'yty': 0.0,
+                              'dtype': resolver_dtype(self.dtype, X)}
+        y = np.asarray(y, dtype=float).ravel()
+        if es_dispersa(X):
+            X = X.astype(float)
+            XtX = (X.T @ X).toarray()
+            sumX = np.asarray(X.sum(axis=0)).ravel()
+        else:
+            X = np.asarray(X, dtype=float)
+            XtX = X.T @ X
+            sumX = np.sum(X, axis=0)
+        nIn = X.shape[1]
+        M = self._momentos['M']
+        M[:nIn, :nIn] += XtX
+        M[:nIn, nIn] += sumX
+        M[nIn, :nIn] += sumX
+        M[nIn, nIn] += X.shape[0]
+        self._momentos['v'][:nIn] += X.T @ y
+        self._momentos['v'][nIn] += np.sum(y)
+        self._momentos['yty'] += y @ y
+
+    def _resolver(self):
+        M = self._momentos['M']
+        v = self._momentos['v']
+        try:
+            sol = np.linalg.solve(M, v)
+        except np.linalg.LinAlgError:   #-- columnas dependientes
+            sol = np.linalg.lstsq(M, v, rcond=None)[0]
+
+        #-- las ecuaciones normales se acumulan en float64; los pesos toman el dtype pedido --
+        tipo = self._momentos['dtype']
+        self.w_ = sol[:-1].astype(tipo)
+        self.b_ = tipo.type(sol[-1])
+        #-- suma de errores al cuadrado sin volver a leer los datos --
+        self._sse = max(self._momentos['yty'] - 2*(sol @ v) + sol @ M @ sol, 0.0)
+
+    def _dibujar_solucion(self, X, y):
+        if (self.draw):
+            dib = DibujoEntrenamiento(self._funcion_dibujo(X, y), self.draw_mode)
+            self._cerrar_dibujo(dib, 0)
+
+    def _funcion_dibujo(self, X, y):
+        #-- la recta de regresión se dibuja como frontera w·x - y + b = 0 sobre (x, y) --
+        puntos = np.concatenate((X, np.reshape(y, (-1,1))), axis=1)
+        T = np.zeros(X.shape[0])
+        return lambda w, b, ph: dibuPtosRecta(puntos, T, np.array([w, -1],dtype=object), b, self.title, ph)
+
     def net_input(self, X):
         """Calculate net input"""
+        X = como_arreglo(X, self.w_.dtype)
+        if es_dispersa(X):
+            return X @ self.w_ + self.b_
         return np.dot(X, self.w_) + self.b_
 
-    def predict(self, X):
-        """Return class label after unit step"""
-        return self.net_input(X) 
\ No newline at end of file
+    def predict(self, X, chunk_size=None, n_jobs=None, out=None):
+        """Return class label after unit step
+        chunk_size, n_jobs, out : predicen X por bloques de chunk_size
+            ejemplos en n_jobs hilos, escribiendo en out si se indica (ver
+            predecir_por_bloques); X puede ser un np.memmap.
+        """
+        return predecir_por_bloques(self.net_input, X, chunk_size, n_jobs, out) 
\ No newline at end of file
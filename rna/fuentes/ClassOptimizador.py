@@ -0,0 +1,234 @@
+import copy
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+class Optimizador(ABC):
+    """Regla de actualización de los pesos de un entrenamiento por gradiente.
+    pasos recibe la dirección de descenso de cada parámetro (el mismo signo
+    que usa la regla delta: error * derivada * entrada) y retorna el
+    incremento a sumarle. El estado (velocidades, momentos) se guarda en un
+    único arreglo plano por cada magnitud; cada parámetro usa una vista.
+    Las direcciones, los incrementos y los cálculos intermedios también
+    usan arreglos planos reservados al inicializar: un paso no crea
+    arreglos y hace las mismas operaciones sea cual sea la cantidad de
+    parámetros.
+    Los optimizadores con memoria suponen que los lotes seguidos son
+    parecidos entre sí: con datos ordenados (p.ej. por fecha) conviene
+    shuffle=True. benchmarks/optimizadores.py los compara con sgd.
+    """
+    _magnitudes = ()
+
+    def inicializar(self, params):
+        """Reserva el estado para parámetros con las formas y el tipo de params"""
+        self.t = 0
+        self._formas = [np.shape(p) for p in params]
+        self._tipo = np.result_type(*params)
+        self._planos = {}
+        self._vistas = {}
+        for nombre in self._magnitudes:
+            (self._planos[nombre], self._vistas[nombre]) = self._reservar()
+        #-- espacio de trabajo: no es estado, no se guarda con estado() --
+        (self._g, self._vistas_g) = self._reservar()
+        (self._p, self._pasos) = self._reservar()
+        self._tmp = self._reservar()[0]
+        return self
+
+    def _reservar(self):
+        tam = [int(np.prod(f)) for f in self._formas]
+        plano = np.zeros(sum(tam), dtype=self._tipo)
+        vistas = []
+        ini = 0
+        for f, n in zip(self._formas, tam):
+            vistas.append(plano[ini:ini+n].reshape(f))
+            ini += n
+        return (plano, vistas)
+
+    def _direccion(self, direcciones):
+        """Copia las direcciones en un único arreglo plano y lo retorna"""
+        for v, g in zip(self._vistas_g, direcciones):
+            np.copyto(v, g)
+        return self._g
+
+    @abstractmethod
+    def pasos(self, direcciones, alpha):
+        """Incrementos de los parámetros para las direcciones dadas.
+        Parameters
+        ------------
+        direcciones : list
+            una dirección por parámetro, con la forma de los params de
+            inicializar (o escalares para los de forma ()).
+        alpha : float
+            tasa de aprendizaje de la época.
+        Returns
+        -------
+        list con un incremento por parámetro. Son vistas de un espacio que
+        reutiliza la llamada siguiente: hay que sumarlas antes de volver a
+        llamar a pasos.
+        """
+
+    def estado(self):
+        """Diccionario de arreglos con el estado (para guardarlo en un .npz)"""
+        est = {nombre: plano.copy() for nombre, plano in self._planos.items()}
+        est['t'] = np.array(self.t)
+        return est
+
+    def cargar_estado(self, estado):
+        """Restaura un estado retornado por estado()"""
+        self.t = int(estado['t'])
+        for nombre, plano in self._planos.items():
+            plano[...] = estado[nombre]
+        return self
+
+
+class SGD(Optimizador):
+    """Descenso por gradiente sin memoria: paso = alpha * dirección"""
+    def pasos(self, direcciones, alpha):
+        self.t += 1
+        np.multiply(self._direccion(direcciones), alpha, out=self._p)
+        return self._pasos
+
+
+class Momentum(Optimizador):
+    """Momento clásico: v = beta * v + dirección ; paso = alpha * v"""
+    _magnitudes = ('v',)
+
+    def __init__(self, beta=0.9):
+        self.beta = beta
+
+    def pasos(self, direcciones, alpha):
+        self.t += 1
+        v = self._planos['v']
+        v *= self.beta
+        v += self._direccion(direcciones)
+        np.multiply(v, alpha, out=self._p)
+        return self._pasos
+
+
+class RMSProp(Optimizador):
+    """Escala cada peso por la raíz del promedio móvil de su dirección al
+    cuadrado. Con rho=0.99 el promedio abarca unas 100 actualizaciones, lo
+    que también estabiliza el entrenamiento en línea."""
+    _magnitudes = ('s',)
+
+    def __init__(self, rho=0.99, eps=1e-8):
+        self.rho = rho
+        self.eps = eps
+
+    def pasos(self, direcciones, alpha):
+        self.t += 1
+        (g, p, t, s) = (self._direccion(direcciones), self._p, self._tmp, self._planos['s'])
+        #-- s += (1 - rho) * g * g ; p = alpha * g / (np.sqrt(s) + eps), en ese orden --
+        np.multiply(g, 1 - self.rho, out=t)
+        t *= g
+        s *= self.rho
+        s += t
+        np.multiply(g, alpha, out=t)
+        np.sqrt(s, out=p)
+        p += self.eps
+        np.divide(t, p, out=p)
+        return self._pasos
+
+
+class Adam(Optimizador):
+    """Adam (Kingma y Ba, 2015) con corrección de sesgo de ambos momentos"""
+    _magnitudes = ('m', 'v')
+
+    def __init__(self, beta1=0.9, beta2=0.999, eps=1e-8):
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+
+    def pasos(self, direcciones, alpha):
+        self.t += 1
+        corr1 = 1 - self.beta1**self.t
+        corr2 = 1 - self.beta2**self.t
+        (g, p, t) = (self._direccion(direcciones), self._p, self._tmp)
+        (m, v) = (self._planos['m'], self._planos['v'])
+        np.multiply(g, 1 - self.beta1, out=t)
+        m *= self.beta1
+        m += t
+        np.multiply(g, 1 - self.beta2, out=t)
+        t *= g
+        v *= self.beta2
+        v += t
+        #-- p = alpha * (m / corr1) / (np.sqrt(v / corr2) + eps) --
+        np.divide(m, corr1, out=t)
+        t *= alpha
+        np.divide(v, corr2, out=p)
+        np.sqrt(p, out=p)
+        p += self.eps
+        np.divide(t, p, out=p)
+        return self._pasos
+
+
+class TasaEscalonada(object):
+    """Multiplica alpha por gamma cada `cada` épocas"""
+    def __init__(self, cada=10, gamma=0.5):
+        self.cada = cada
+        self.gamma = gamma
+
+    def __call__(self, epoca):
+        return self.gamma ** (epoca // self.cada)
+
+
+class TasaExponencial(object):
+    """alpha * gamma**epoca"""
+    def __init__(self, gamma=0.95):
+        self.gamma = gamma
+
+    def __call__(self, epoca):
+        return self.gamma ** epoca
+
+
+class TasaCoseno(object):
+    """Baja alpha desde 1 hasta `minimo` (fracción) siguiendo medio coseno en
+    n_epocas épocas; None usa el n_iter del estimador"""
+    def __init__(self, n_epocas=None, minimo=0.0):
+        self.n_epocas = n_epocas
+        self.minimo = minimo
+
+    def __call__(self, epoca):
+        frac = min(epoca, self.n_epocas) / self.n_epocas
+        return self.minimo + (1 - self.minimo) * 0.5 * (1 + np.cos(np.pi * frac))
+
+
+OPTIMIZADORES = {'sgd': SGD, 'momentum': Momentum, 'rmsprop': RMSProp, 'adam': Adam}
+PROGRAMAS_TASA = {'step': TasaEscalonada, 'exponential': TasaExponencial, 'cosine': TasaCoseno}
+
+def crear_optimizador(optimizer, params):
+    """Optimizador listo para params o None para la regla delta original.
+    optimizer es un nombre de OPTIMIZADORES o una instancia de Optimizador
+    (se copia, así la misma instancia sirve para varios estimadores)."""
+    if isinstance(optimizer, str):
+        if optimizer not in OPTIMIZADORES:
+            raise ValueError("optimizer debe ser uno de " + ", ".join(OPTIMIZADORES))
+        optimizer = OPTIMIZADORES[optimizer]()
+    elif not isinstance(optimizer, Optimizador):
+        raise ValueError("optimizer debe ser un nombre o una instancia de Optimizador")
+    if type(optimizer) is SGD:
+        return None
+    return copy.deepcopy(optimizer).inicializar(params)
+
+def crear_programa(lr_schedule, n_iter):
+    """Función epoca -> factor de alpha, o None si la tasa es fija"""
+    if lr_schedule is None:
+        return None
+    if isinstance(lr_schedule, str):
+        if lr_schedule not in PROGRAMAS_TASA:
+            raise ValueError("lr_schedule debe ser uno de " + ", ".join(PROGRAMAS_TASA))
+        lr_schedule = PROGRAMAS_TASA[lr_schedule]()
+    if isinstance(lr_schedule, TasaCoseno) and (lr_schedule.n_epocas is None):
+        lr_schedule = copy.copy(lr_schedule)
+        lr_schedule.n_epocas = max(n_iter, 1)
+    return lr_schedule
+
+class ConTasa(object):
+    """Parte común de los estimadores con lr_schedule: _preparar_estado
+    deja en _programa el resultado de crear_programa y en _t_epoca 0."""
+
+    def _tasa(self):
+        """alpha de la época actual según lr_schedule"""
+        alpha = self.alpha if (self._programa is None) else self.alpha * float(self._programa(self._t_epoca))
+        self._t_epoca += 1
+        return alpha
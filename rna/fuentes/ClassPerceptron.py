@@ -5,8 +5,14 @@ from matplotlib import pylab as plt
 from IPython import display
 
 from rna.fuentes.grafica import *
+from rna.fuentes.entradas import resolver_dtype, como_arreglo, es_dispersa, fila_dispersa
+from rna.fuentes.prediccion import predecir_por_bloques
+from rna.fuentes.serializacion import Guardable, verificar_escritura
+from rna.fuentes.nucleos import usar_jit, perceptron_epoca
+from rna.fuentes.ClassCallbackEntrenamiento import ListaCallbacks, SIN_CALLBACKS
+from rna.fuentes.ClassDibujoEntrenamiento import DibujoEntrenamiento, ConDibujo
 
-class Perceptron(object):
+class Perceptron(ConDibujo, Guardable):
     """Perceptron classifier.
     Parameters
     ------------
@@ -20,6 +26,18 @@ class Perceptron(object):
         1 si dibuja -  0 si no
     title : list con 2 elementos
         titulos de los ejes - sólo 2D
+    dtype : numpy dtype or None
+        tipo de punto flotante; None usa el de X o float64
+    jit : bool
+        compila el lazo ejemplo a ejemplo con Numba si está instalado
+    draw_every : int
+        dibuja una de cada draw_every épocas
+    draw_interval : float or None
+        segundos mínimos entre dos dibujos
+    draw_mode : string
+        'sync', 'thread' o 'record' (sólo guarda snapshots_)
+    warm_start : bool
+        fit continúa desde los pesos actuales
         
     Attributes
     -----------
@@ -27,63 +45,173 @@ class Perceptron(object):
         Weights after fitting.
     errors_ : list
         Number of misclassifications (updates) in each epoch.
+    snapshots_ : list
+        (epoca, w, b) de cada cuadro con draw_mode='record'.
     """
-    def __init__(self, alpha=0.01, n_iter=50, random_state=None, draw=0, title=['X1','X2']):
+    def __init__(self, alpha=0.01, n_iter=50, random_state=None,
+                 draw=0, title=['X1','X2'],
+                 dtype=None, jit=False,
+                 draw_every=1, draw_interval=None, draw_mode='sync',
+                 warm_start=False):
         self.alpha = alpha
         self.n_iter = n_iter
         self.random_state = random_state #-- asignar el valor 1 para fijar la semilla por defecto es aleatorio
         self.draw = draw
         self.title = title
+        self.dtype = dtype
+        self.jit = jit
+        self.draw_every = draw_every
+        self.draw_interval = draw_interval
+        self.draw_mode = draw_mode
+        self.warm_start = warm_start
 
-    def fit(self, X, y):
+    def fit(self, X, y, callbacks=None):
         """Fit training data.
         Parameters
         ----------
-        X : {array-like}, shape = [n_examples, n_features]
+        X : {array-like, sparse matrix}, shape = [n_examples, n_features]
             Training vectors, where n_examples is the number of
             examples and n_features is the number of features.
         y : array-like, shape = [n_examples]
             Target values.
+        callbacks : list of CallbackEntrenamiento, optional
+            reciben on_train_begin/end, on_epoch_begin/end y on_batch_end
+            (ver Perfilador para medir el tiempo de cada fase).
         Returns
         -------
         self : object
         """
 
-        rgen = np.random.RandomState(self.random_state)
-
-        # self.w_ = rgen.normal(loc=0.0, scale=0.01,size=1 + X.shape[1])
-
-        self.w_ = rgen.uniform(-0.5, 0.5, size= X.shape[1]) 
-        self.b_ = rgen.uniform(-0.5, 0.5)
-        self.errors_ = []
-        ph = 0  # manejador de la recta mientras se dibuja
+        tipo = resolver_dtype(self.dtype, X)
+        X = como_arreglo(X, tipo)
+        y = como_arreglo(y, tipo)
+        if not (self.warm_start and hasattr(self, 'w_')):
+            self._inicializar(X, y)
+        else:
+            verificar_escritura(self)
+        cbs = ListaCallbacks(callbacks, self)
+        cr = cbs.cronometro
+        self.stop_training = False
+        if (self.draw):
+            dib = DibujoEntrenamiento(self._funcion_dibujo(X, y), self.draw_mode, self.draw_every, self.draw_interval)
         errors=1
-        i = 0
-        while ((i<self.n_iter) and (errors > 0.0)):
-            errors = 0
-            for xi, target in zip(X, y):
-                update = self.alpha * (target - self.predict(xi))
-                self.w_ += update * xi
-                self.b_ += update
-                errors += int(update != 0.0)
+        cbs.on_train_begin()
+        inicio = i = len(self.errors_)
+        while ((i<inicio+self.n_iter) and (errors > 0.0) and not self.stop_training):
+            cbs.on_epoch_begin(i)
+            errors = self._epoca(X, y, cbs)
             self.errors_.append(errors)
             
             # graficar la recta
             if (self.draw):
-                ph = dibuPtosRecta(X,y, self.w_, self.b_, self.title, ph)
+                cr.inicio()
+                dib.epoca(i, self.w_, self.b_)
+                cr.marca('dibujo')
             
+            cbs.on_epoch_end(i, {'error': errors, 'muestras': X.shape[0]})
             i = i + 1
+        if (self.draw):
+            self._cerrar_dibujo(dib, i-1)
+        cbs.on_train_end()
+        return self
+
+    def partial_fit(self, X, y):
+        """Una pasada de entrenamiento sobre un bloque de ejemplos.
+        Si todavía no hay pesos (ni de fit ni de una llamada anterior) los
+        inicializa; si no, continúa desde los pesos actuales, también los
+        que dejó fit.
+        Cada llamada agrega a errors_ las actualizaciones hechas en el bloque.
+        Returns
+        -------
+        self : object
+        """
+        tipo = self.w_.dtype if hasattr(self, 'w_') else resolver_dtype(self.dtype, X)
+        X = como_arreglo(X, tipo)
+        y = como_arreglo(y, tipo)
+        if not hasattr(self, 'w_'):
+            self._inicializar(X, y)
+        else:
+            verificar_escritura(self)
+        self.errors_.append(self._epoca(X, y))
         return self
 
+    def _inicializar(self, X, y):
+        rgen = np.random.RandomState(self.random_state)
+
+        # self.w_ = rgen.normal(loc=0.0, scale=0.01,size=1 + X.shape[1])
+
+        self.w_ = rgen.uniform(-0.5, 0.5, size= X.shape[1]).astype(X.dtype)
+        self.b_ = X.dtype.type(rgen.uniform(-0.5, 0.5))
+        self._preparar_estado()
+
+    def _preparar_estado(self):
+        """Historia vacía para pesos nuevos o restaurados"""
+        self.errors_ = []
+
+    def _epoca(self, X, y, cbs=SIN_CALLBACKS):
+        """Una pasada sobre (X, y); retorna la cantidad de actualizaciones"""
+        (cr, medir, por_lote) = (cbs.cronometro, cbs.medir, cbs.por_lote)
+        cr.inicio()
+        if es_dispersa(X):
+            return self._epoca_dispersa(X, y, cbs)
+        if usar_jit(self.jit):
+            (self.b_, errors) = perceptron_epoca(X, y, self.w_, self.b_, self.alpha)
+            if medir: cr.marca('actualizacion')
+            return errors
+        
+        errors = 0
+        for e, (xi, target) in enumerate(zip(X, y)):
+            #-- equivale a predict(xi) pero sin pasar por enteros, así conserva el dtype,
+            #-- y sin las conversiones de net_input, que se pagarían por ejemplo --
+            salida = (np.dot(xi, self.w_) + self.b_ >= 0.0)
+            if medir: cr.marca('forward')
+            update = self.alpha * (target - salida)
+            self.w_ += update * xi
+            self.b_ += update
+            errors += int(update != 0.0)
+            if medir: cr.marca('actualizacion')
+            if por_lote:
+                cbs.on_batch_end(e, {'size': 1})
+        return errors
+
+    def _epoca_dispersa(self, X, y, cbs):
+        """Pasada sobre una matriz CSR: cada ejemplo sólo lee y actualiza los
+        pesos de sus atributos no nulos"""
+        (cr, medir, por_lote) = (cbs.cronometro, cbs.medir, cbs.por_lote)
+        errors = 0
+        for e in range(X.shape[0]):
+            (idx, val) = fila_dispersa(X, e)
+            salida = (self.w_[idx] @ val + self.b_ >= 0.0)
+            if medir: cr.marca('forward')
+            update = self.alpha * (y[e] - salida)
+            self.w_[idx] += update * val
+            self.b_ += update
+            errors += int(update != 0.0)
+            if medir: cr.marca('actualizacion')
+            if por_lote:
+                cbs.on_batch_end(e, {'size': 1})
+        return errors
+
+    def _funcion_dibujo(self, X, y):
+        return lambda w, b, ph: dibuPtosRecta(X, y, w, b, self.title, ph)
+
     def net_input(self, X):
         """Calculate net input"""
+        X = como_arreglo(X, self.w_.dtype)
+        if es_dispersa(X):
+            return X @ self.w_ + self.b_
         return np.dot(X, self.w_) + self.b_
 
-    def predict(self, X):
-        """Return class label"""
-        return np.where(self.net_input(X) >= 0.0, 1, 0)
+    def predict(self, X, chunk_size=None, n_jobs=None, out=None):
+        """Return class label
+        chunk_size, n_jobs, out : predicen X por bloques de chunk_size
+            ejemplos en n_jobs hilos, escribiendo en out si se indica (ver
+            predecir_por_bloques); X puede ser un np.memmap.
+        """
+        return predecir_por_bloques(lambda Xb: np.where(self.net_input(Xb) >= 0.0, 1, 0),
+                                    X, chunk_size, n_jobs, out)
 
-    def prob_positive_class(self, X):
-        """Confidence level for class > 0 """
-        netas = self.net_input(X)
-        return 1/(1+np.exp(-netas))
\ No newline at end of file
+    def prob_positive_class(self, X, chunk_size=None, n_jobs=None, out=None):
+        """Confidence level for class > 0 (chunk_size, n_jobs y out como en predict)"""
+        return predecir_por_bloques(lambda Xb: 1/(1+np.exp(-self.net_input(Xb))),
+                                    X, chunk_size, n_jobs, out)
\ No newline at end of file
@@ -0,0 +1,275 @@
+import numpy as np
+
+from rna.fuentes.entradas import resolver_dtype, como_arreglo, es_dispersa
+from rna.fuentes.prediccion import predecir_por_bloques
+from rna.fuentes.serializacion import verificar_escritura
+from rna.fuentes.ClassOptimizador import crear_optimizador, crear_programa
+from rna.fuentes.ClassCallbackEntrenamiento import SIN_CALLBACKS
+from rna.fuentes.ClassRNMulticlase import RNMulticlase
+from rna.fuentes.activaciones import activacion, costo
+
+class RNMulticapa(RNMulticlase):
+    """Perceptrón multicapa entrenado con backpropagation por lotes.
+    Tiene la misma interfaz que RNMulticlase; FUN y COSTO corresponden a
+    la capa de salida. Los buffers de cada capa se reservan una sola vez.
+    Parameters
+    ------------
+    hidden_layers : tuple of int
+        neuronas de cada capa oculta
+    FUN_hidden : string or Activacion
+        activation function of the hidden layers
+    batch_size : int or None
+        None usa lotes de 1, N mini-lotes de N ejemplos, -1 lote completo
+    Los demás parámetros son los de RNMulticlase.
+
+    Attributes
+    -----------
+    w_ : list of 2d-array
+        pesos de cada capa, de forma [nOut_capa, nIn_capa].
+    b_ : list of 2d-array
+        umbrales de cada capa, de forma [nOut_capa, 1].
+    errors_ : list or 1d-array
+        costo medio por ejemplo de cada época.
+    accuracy_ : list or 1d-array
+        accuracy de cada época (NaN si no se evaluó).
+    val_errors_ : list
+        costo sobre los datos de validación en cada época.
+    """
+    def __init__(self, hidden_layers=(10,), FUN_hidden='tanh',
+                 alpha=0.01, n_iter=50, cotaE=10e-07, FUN='sigmoid', COSTO='ECM', random_state=None,
+                 batch_size=None, shuffle=False, dtype=None,
+                 accuracy_mode='full', accuracy_every=1, accuracy_sample=None, history='list',
+                 optimizer='sgd', lr_schedule=None,
+                 validation_split=0.0, patience=None, restore_best_weights=False,
+                 warm_start=False):
+        super().__init__(alpha=alpha, n_iter=n_iter, cotaE=cotaE, FUN=FUN, COSTO=COSTO, random_state=random_state,
+                         batch_size=batch_size, shuffle=shuffle, dtype=dtype,
+                         accuracy_mode=accuracy_mode, accuracy_every=accuracy_every,
+                         accuracy_sample=accuracy_sample, history=history,
+                         optimizer=optimizer, lr_schedule=lr_schedule,
+                         validation_split=validation_split, patience=patience,
+                         restore_best_weights=restore_best_weights, warm_start=warm_start)
+        self.hidden_layers = hidden_layers
+        self.FUN_hidden = FUN_hidden
+
+    def partial_fit(self, X, y):
+        """Una pasada de entrenamiento sobre un bloque de ejemplos (ver
+        RNMulticlase.partial_fit).
+        Returns
+        -------
+        self : object
+        """
+        tipo = self.w_[0].dtype if hasattr(self, 'w_') else resolver_dtype(self.dtype, X)
+        X = como_arreglo(X, tipo)
+        y = como_arreglo(y, tipo)
+        if not hasattr(self, 'w_'):
+            self._inicializar(X, y)
+        else:
+            verificar_escritura(self)
+        ErrorAct = self._epoca(X, y)
+        self._registrar(ErrorAct, self._aciertos / X.shape[0] if self._fusionar else np.nan)
+        return self
+
+    def _inicializar(self, X, y):
+        if (self.batch_size is not None) and (self.batch_size!=-1) and (self.batch_size<1):
+            raise ValueError("batch_size debe ser None, -1 o un entero positivo")
+        if any(n < 1 for n in self.hidden_layers):
+            raise ValueError("hidden_layers debe contener enteros positivos")
+        if activacion(self.FUN_hidden).por_filas:
+            raise ValueError("softmax sólo puede usarse en la capa de salida")
+
+        self._rgen = np.random.RandomState(self.random_state)
+
+        #-- cantidad de neuronas de cada capa, empezando por los atributos de entrada --
+        capas = [X.shape[1]] + list(self.hidden_layers) + [y.shape[1]]
+        self.w_ = []
+        self.b_ = []
+        for (nIn, nOut) in zip(capas[:-1], capas[1:]):
+            self.w_.append(self._rgen.uniform(-0.5, 0.5, [nOut, nIn]).astype(X.dtype))
+            self.b_.append(self._rgen.uniform(-0.5, 0.5, [nOut,1]).astype(X.dtype))
+        self._preparar_estado()
+
+    def _preparar_estado(self):
+        """Historias, optimizador y época de lr_schedule para pesos nuevos o restaurados"""
+        self.val_errors_ = []
+        self._opt = crear_optimizador(self.optimizer, self.w_ + self.b_)
+        self._programa = crear_programa(self.lr_schedule, self.n_iter)
+        self._t_epoca = 0
+
+        self._preparar_historia()
+        self._activacion = activacion(self.FUN)
+        self._activacion_oculta = activacion(self.FUN_hidden)
+        self._funcion_costo = costo(self.COSTO)
+        self._fusionar = (self.accuracy_mode=='fused')
+        self._aciertos = 0
+        self._tam_buffers = 0
+
+    def _reservar_buffers(self, tam):
+        """Buffers de cada capa para lotes de hasta tam ejemplos"""
+        tipo = self.w_[0].dtype
+        self._A = [np.empty((tam, W.shape[0]), dtype=tipo) for W in self.w_]   # salidas
+        self._D = [np.empty_like(A) for A in self._A]                          # deltas
+        self._T = [np.empty_like(A) for A in self._A]                          # derivadas y costo
+        self._GW = [np.empty_like(W) for W in self.w_]
+        self._Gb = [np.empty_like(b) for b in self.b_]
+        self._S = np.empty((tam, 1), dtype=tipo)                               # sumas por fila
+        self._tam_buffers = tam
+
+    def _epoca(self, X, y, cbs=SIN_CALLBACKS):
+        """Una pasada sobre (X, y); retorna el costo medio por ejemplo"""
+        nRow = X.shape[0]  # cantidad de ejemplos
+        if self.shuffle:
+            orden = self._rgen.permutation(nRow)
+            X, y = X[orden], y[orden]
+
+        alpha = self._tasa()
+        return self._epoca_lotes(X, y, alpha, cbs) / nRow
+
+    def _epoca_lotes(self, X, y, alpha, cbs=SIN_CALLBACKS):
+        """Una pasada sobre (X, y) actualizando todas las capas por bloques de
+        ejemplos; el gradiente se promedia dentro de cada bloque.
+        Retorna el costo acumulado de la pasada.
+        """
+        nRow = X.shape[0]
+        tam = nRow if (self.batch_size==-1) else (self.batch_size or 1)
+        tam = min(tam, nRow)
+        if self._tam_buffers < tam:
+            self._reservar_buffers(tam)
+
+        (cr, medir, por_lote) = (cbs.cronometro, cbs.medir, cbs.por_lote)
+        fusionar = self._fusionar
+        if fusionar:
+            salidas = np.empty(y.shape, dtype=self.w_[0].dtype)
+        params = self.w_ + self.b_
+        grads = self._GW + self._Gb
+        cr.inicio()
+        ErrorAct = 0
+        for ini in range(0, nRow, tam):
+            Xb = X[ini:ini+tam]
+            yb = y[ini:ini+tam]
+            B = Xb.shape[0]
+
+            #-- salida, costo y delta de la capa de salida se cuentan como 'forward' --
+            self._adelante(Xb, B)
+            costo = self._delta_salida(yb, B)
+            if fusionar:
+                salidas[ini:ini+B] = self._A[-1][:B]
+            if medir: cr.marca('forward')
+
+            self._atras(Xb, B)
+            if self._opt is None:
+                paso = alpha / B
+                for (P, G) in zip(params, grads):
+                    G *= paso
+                    P += G
+            else:
+                for G in grads:
+                    G /= B
+                for (P, p) in zip(params, self._opt.pasos(grads, alpha)):
+                    P += p
+            if medir: cr.marca('actualizacion')
+
+            ErrorAct += costo
+            if por_lote:
+                cbs.on_batch_end(ini // tam, {'size': B})
+        if fusionar:
+            self._aciertos = np.sum(self._etiquetas(salidas)==np.argmax(y, axis=1))
+        return ErrorAct
+
+    def _adelante(self, Xb, B):
+        """Propaga el bloque Xb dejando la salida de cada capa en _A"""
+        L = len(self.w_)
+        (act, oculta) = (self._activacion, self._activacion_oculta)
+        entrada = Xb
+        for k in range(L):
+            Z = self._A[k][:B]
+            if es_dispersa(entrada):
+                #-- primera capa con Xb en CSR: el producto disperso crea su resultado --
+                Z[...] = entrada @ self.w_[k].T
+            else:
+                np.matmul(entrada, self.w_[k].T, out=Z)
+            Z += self.b_[k].T
+            if (k==L-1) and (act.nombre=='softmax'):
+                S = self._S[:B]
+                np.max(Z, axis=1, keepdims=True, out=S)
+                Z -= S
+                if (self._funcion_costo.nombre=='EC'):
+                    #-- netas desplazadas: el costo se calcula con log-softmax estable --
+                    np.copyto(self._T[k][:B], Z)
+                np.exp(Z, out=Z)
+                np.sum(Z, axis=1, keepdims=True, out=S)
+                Z /= S
+            else:
+                (act if (k==L-1) else oculta).evaluar(Z, out=Z)
+            entrada = Z
+
+    def _delta_salida(self, yb, B):
+        """Costo del bloque y delta de la capa de salida (con signo de
+        actualización, como en RNMulticlase._propagar_lote)"""
+        A = self._A[-1][:B]
+        D = self._D[-1][:B]
+        T = self._T[-1][:B]
+        (act, cst) = (self._activacion, self._funcion_costo)
+        if (act.nombre=='softmax') and (cst.nombre=='EC'):
+            S = self._S[:B]
+            np.log(S, out=S)
+            T -= S
+            T *= yb
+            costo = -np.sum(T)
+            np.subtract(yb, A, out=D)
+            return costo
+
+        #-- D = yb - A y el costo, con T como espacio de trabajo --
+        (costo, _) = cst.costo_gradiente(yb, A, G=D, tmp=T)
+        if (act.nombre=='softmax'):
+            np.multiply(D, A, out=T)
+            S = self._S[:B]
+            np.sum(T, axis=1, keepdims=True, out=S)
+            D -= S
+            D *= A
+        elif not act.lineal:
+            D *= act.derivar(A, out=T)
+        return costo
+
+    def _atras(self, Xb, B):
+        """Deltas de las capas ocultas y gradientes de todas las capas en _GW, _Gb"""
+        L = len(self.w_)
+        oculta = self._activacion_oculta
+        for k in range(L-2, -1, -1):
+            D = self._D[k][:B]
+            np.matmul(self._D[k+1][:B], self.w_[k+1], out=D)
+            if not oculta.lineal:
+                D *= oculta.derivar(self._A[k][:B], out=self._T[k][:B])
+        for k in range(L):
+            entrada = Xb if (k==0) else self._A[k-1][:B]
+            D = self._D[k][:B]
+            if es_dispersa(entrada):
+                self._GW[k][...] = (entrada.T @ D).T
+            else:
+                np.matmul(D.T, entrada, out=self._GW[k])
+            np.sum(D, axis=0, out=self._Gb[k][:,0])
+
+    def _costo_validacion(self, X, y):
+        """Costo medio por ejemplo sobre (X, y) en una sola pasada vectorizada"""
+        return self.fCosto(y, self.predict_nOut(X)) / X.shape[0]
+
+    def _ocultas(self, X):
+        """Salida de la última capa oculta (X si no hay capas ocultas)"""
+        A = como_arreglo(X, self.w_[0].dtype)
+        oculta = activacion(self.FUN_hidden)
+        for (W, b) in zip(self.w_[:-1], self.b_[:-1]):
+            Z = A @ W.T + b.T
+            A = oculta.evaluar(Z, out=Z)
+        return A
+
+    def net_input(self, X):
+        """Calculate net input of the output layer"""
+        return self._ocultas(X) @ self.w_[-1].T + self.b_[-1].T
+
+    def predict_nOut(self, X, chunk_size=None, n_jobs=None, out=None):
+        """Salidas de la red para cada ejemplo (chunk_size, n_jobs y out como en predict)"""
+        return predecir_por_bloques(self._salidas, X, chunk_size, n_jobs, out)
+
+    def _salidas(self, X):
+        Z = self.net_input(X)
+        return activacion(self.FUN).evaluar(Z, out=Z)
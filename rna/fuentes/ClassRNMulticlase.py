@@ -5,8 +5,20 @@ from matplotlib import pylab as plt
 from IPython import display
 
 from rna.fuentes.grafica import *
+from rna.fuentes.entradas import resolver_dtype, como_arreglo, separar_validacion, es_dispersa, fila_dispersa
+from rna.fuentes.prediccion import predecir_por_bloques
+from rna.fuentes.serializacion import Guardable, verificar_escritura
+from rna.fuentes.ClassOptimizador import crear_optimizador, crear_programa, ConTasa
+from rna.fuentes.ClassCallbackEntrenamiento import ListaCallbacks, SIN_CALLBACKS, con_parada_temprana
+from rna.fuentes.activaciones import activacion, costo
+from rna.fuentes.historia import ConHistoria
 
-class RNMulticlase(object):
+def _jacobiano_softmax(salida, g, axis=1):
+    """Producto del jacobiano de softmax por g, sin construirlo; axis es
+    el eje de las salidas de cada ejemplo"""
+    return salida * (g - np.sum(g * salida, axis=axis, keepdims=True))
+
+class RNMulticlase(ConHistoria, ConTasa, Guardable):
     """
     Parameters
     ------------
@@ -16,123 +28,401 @@ class RNMulticlase(object):
         Passes over the training dataset.
     cotaE : float
         minimum error threshold
-    FUN : string
-        activation function: 'sigmoid', 'tanh', otherwise linear
+    FUN : string or Activacion
+        activation function: 'sigmoid', 'tanh', 'softmax', otherwise linear
+    COSTO : string or Costo
+        'ECM', 'EC_binaria', 'EC', 'EA' o uno registrado
     random_state : int
         Random number generator seed for random weight initialization.
+    batch_size : int or None
+        None en línea, N mini-lotes de N ejemplos, -1 lote completo
+    shuffle : bool
+        mezcla los ejemplos en cada época
+    dtype : numpy dtype or None
+        tipo de punto flotante; None usa el de X o float64
+    accuracy_mode : string
+        'full' evalúa accuracy(X, y) y 'fused' usa las salidas del entrenamiento
+    accuracy_every : int
+        con 'full', evalúa una de cada accuracy_every épocas
+    accuracy_sample : int, float or None
+        con 'full', tamaño o fracción de la submuestra evaluada
+    history : string
+        'list' o 'array' para errors_ y accuracy_
+    optimizer : string or Optimizador
+        'sgd', 'momentum', 'rmsprop', 'adam' o una instancia
+    lr_schedule : string, callable or None
+        'step', 'exponential', 'cosine' o epoca -> factor de alpha
+    validation_split : float
+        fracción de los ejemplos separada para validar
+    patience : int or None
+        épocas sin mejora antes de detener fit
+    restore_best_weights : bool
+        con patience, deja los pesos de la mejor época
+    warm_start : bool
+        fit continúa desde los pesos actuales
         
     Attributes
     -----------
     w_ : 1d-array
         Weights after fitting.
-    errors_ : list
+    errors_ : list or 1d-array
         Number of misclassifications (updates) in each epoch.
+    accuracy_ : list or 1d-array
+        accuracy de cada época (NaN si no se evaluó).
+    val_errors_ : list
+        costo sobre los datos de validación en cada época.
     """
-    def __init__(self, alpha=0.01, n_iter=50, cotaE=10e-07, FUN='sigmoid', COSTO='ECM', random_state=None):
+    def __init__(self, alpha=0.01, n_iter=50, cotaE=10e-07, FUN='sigmoid', COSTO='ECM', random_state=None,
+                 batch_size=None, shuffle=False, dtype=None,
+                 accuracy_mode='full', accuracy_every=1, accuracy_sample=None, history='list',
+                 optimizer='sgd', lr_schedule=None,
+                 validation_split=0.0, patience=None, restore_best_weights=False,
+                 warm_start=False):
         self.alpha = alpha
         self.n_iter = n_iter
         self.cotaE = cotaE
         self.FUN = FUN
         self.COSTO = COSTO
         self.random_state = random_state #-- asignar el valor 1 para fijar la semilla por defecto es aleatorio
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.dtype = dtype
+        self.accuracy_mode = accuracy_mode
+        self.accuracy_every = accuracy_every
+        self.accuracy_sample = accuracy_sample
+        self.history = history
+        self.optimizer = optimizer
+        self.lr_schedule = lr_schedule
+        self.validation_split = validation_split
+        self.patience = patience
+        self.restore_best_weights = restore_best_weights
+        self.warm_start = warm_start
 
-    def fit(self, X, y):
+    def fit(self, X, y, callbacks=None, validation_data=None):
         """Fit training data.
         Parameters
         ----------
-        X : {array-like}, shape = [n_examples, n_features]
+        X : {array-like, sparse matrix}, shape = [n_examples, n_features]
             Training vectors, where n_examples is the number of
             examples and n_features is the number of features.
         y : array-like, shape = [n_examples, n_class]
             Target values (instances created with one-hot-encoder)
+        callbacks : list of CallbackEntrenamiento, optional
+            reciben on_train_begin/end, on_epoch_begin/end y on_batch_end
+            (ver Perfilador para medir el tiempo de cada fase).
+        validation_data : tuple (X_val, y_val), optional
+            datos para val_errors_ y patience; reemplaza a validation_split.
         Returns
         -------
         self : object
         """
 
-          
-        rgen = np.random.RandomState(self.random_state)
+
+        tipo = resolver_dtype(self.dtype, X)
+        X = como_arreglo(X, tipo)
+        y = como_arreglo(y, tipo)
+        (X, y, Xv, yv) = separar_validacion(X, y, self.validation_split, validation_data, self.random_state, tipo)
+        if not (self.warm_start and hasattr(self, 'w_')):
+            self._inicializar(X, y)
+        else:
+            verificar_escritura(self)
+        (Xa, ya) = self._muestra_accuracy(X, y)
+        cbs = ListaCallbacks(con_parada_temprana(callbacks, self), self)
+        cr = cbs.cronometro
+        self.stop_training = False
+        
+        ErrorAnt = 0
+        ErrorAct = 1
+        
+        cbs.on_train_begin()
+        inicio = i = len(self.errors_)
+        while ((i<inicio+self.n_iter) and (np.abs(ErrorAnt- ErrorAct) > self.cotaE) and not self.stop_training):
+            cbs.on_epoch_begin(i)
+            ErrorAnt = ErrorAct
+            ErrorAct = self._epoca(X, y, cbs)
+            cr.inicio()
+            acc = self._accuracy_epoca(i, Xa, ya, X.shape[0])
+            cr.marca('accuracy')
+            self._registrar(ErrorAct, acc)
+            
+            logs = {'error': ErrorAct, 'accuracy': acc, 'muestras': X.shape[0]}
+            if Xv is not None:
+                logs['val_error'] = self._costo_validacion(Xv, yv)
+                self.val_errors_.append(logs['val_error'])
+            cbs.on_epoch_end(i, logs)
+            i = i + 1
+        if (i>inicio) and np.isnan(self.accuracy_[-1]):
+            self.accuracy_[-1] = self.accuracy(Xa, ya)
+        cbs.on_train_end()
+        return self
+
+    def partial_fit(self, X, y):
+        """Una pasada de entrenamiento sobre un bloque de ejemplos.
+        Si todavía no hay pesos (ni de fit ni de una llamada anterior) los
+        inicializa, por lo que ese primer bloque debe traer las nOut
+        columnas de y; si no, continúa desde los pesos actuales, también
+        los que dejó fit.
+        Cada llamada agrega el costo medio del bloque a errors_.
+        Returns
+        -------
+        self : object
+        """
+        tipo = self.w_.dtype if hasattr(self, 'w_') else resolver_dtype(self.dtype, X)
+        X = como_arreglo(X, tipo)
+        y = como_arreglo(y, tipo)
+        if not hasattr(self, 'w_'):
+            self._inicializar(X, y)
+        else:
+            verificar_escritura(self)
+        ErrorAct = self._epoca(X, y)
+        self._registrar(ErrorAct, self._aciertos / X.shape[0] if self._fusionar else np.nan)
+        return self
+
+    def _inicializar(self, X, y):
+        if (self.batch_size is not None) and (self.batch_size!=-1) and (self.batch_size<1):
+            raise ValueError("batch_size debe ser None, -1 o un entero positivo")
+        
+        self._rgen = np.random.RandomState(self.random_state)
 
         # self.w_ = rgen.normal(loc=0.0, scale=0.01,size=1 + X.shape[1])
-        nRow = X.shape[0]  # cantidad de ejemplos
         nIn = X.shape[1]  # cantidad de atributos de entrada ---
         nOut = y.shape[1] # -- cantidad de neuronas de salida (deben ser por lo menos 2)
 
-        self.w_ = np.random.uniform(-0.5, 0.5, [nOut, nIn])
-        self.b_ = np.random.uniform(-0.5, 0.5, [nOut,1])
+        self.w_ = self._rgen.uniform(-0.5, 0.5, [nOut, nIn]).astype(X.dtype)
+        self.b_ = self._rgen.uniform(-0.5, 0.5, [nOut,1]).astype(X.dtype)
+        self._preparar_estado()
 
-        self.errors_ = []
-        self.accuracy_ = []
-        ErrorAnt = 0
-        ErrorAct = 1
+    def _preparar_estado(self):
+        """Historias, optimizador y época de lr_schedule para pesos nuevos o restaurados"""
+        self.val_errors_ = []
+        self._opt = crear_optimizador(self.optimizer, [self.w_, self.b_])
+        self._programa = crear_programa(self.lr_schedule, self.n_iter)
+        self._t_epoca = 0
+
+        self._preparar_historia()
+        self._activacion = activacion(self.FUN)
+        self._funcion_costo = costo(self.COSTO)
+        #-- softmax con 'EC' usa el error y - salida; con otro costo, su jacobiano --
+        self._jacobiano = (self._activacion.nombre=='softmax') and (self._funcion_costo.nombre!='EC')
+        self._fusionar = (self.accuracy_mode=='fused')
+        self._aciertos = 0
+
+    def _epoca(self, X, y, cbs=SIN_CALLBACKS):
+        """Una pasada sobre (X, y); retorna el costo medio por ejemplo"""
+        nRow = X.shape[0]  # cantidad de ejemplos
+        if self.shuffle:
+            orden = self._rgen.permutation(nRow)
+            X, y = X[orden], y[orden]
         
-        i = 0
-        while ((i<self.n_iter) and (np.abs(ErrorAnt- ErrorAct) > self.cotaE)):
-            ErrorAnt = ErrorAct
-            ErrorAct = 0
-            for e in range(nRow):
-                
-                xi = X[e:e+1,:]
-                
-                salida = self.predict_nOut(xi).T
-                errorXi = (y[e:e+1, :].T - salida)
-                
-                update = self.alpha * errorXi * self.derivar(salida)
+        alpha = self._tasa()
+        opt = self._opt
+        if self.batch_size is not None:
+            return self._epoca_lotes(X, y, alpha, cbs) / nRow
+        
+        (cr, medir, por_lote) = (cbs.cronometro, cbs.medir, cbs.por_lote)
+        (act, cst) = (self._activacion, self._funcion_costo)
+        fusionar = self._fusionar
+        if fusionar:
+            #-- las salidas se guardan y se clasifican juntas al final de la pasada --
+            salidas = np.empty(y.shape, dtype=self.w_.dtype)
+        if es_dispersa(X):
+            return self._epoca_dispersa(X, y, alpha, cbs, salidas if fusionar else None) / nRow
+        cr.inicio()
+        ErrorAct = 0
+        for e in range(nRow):
+            
+            xi = X[e:e+1,:]
+            
+            #-- net_input sin sus conversiones, que se pagarían por ejemplo --
+            salida = act.evaluar((self.w_ @ xi.T + self.b_).T).T
+            if fusionar:
+                salidas[e] = salida[:,0]
+            if medir: cr.marca('forward')
+            errorXi = self._error_salida(y[e:e+1, :].T, salida)
+            
+            if opt is None:
+                update = alpha * errorXi * act.derivar(salida)
                 self.w_ += update * xi
                 self.b_ += update
-                
-                ErrorAct += self.fCosto(y[e:e+1, :].T , salida)
-                
-            ErrorAct = ErrorAct / nRow    
-            self.errors_.append(ErrorAct)
-            self.accuracy_.append(self.accuracy(X,y))
-                       
-            i = i + 1
-        return self
+            else:
+                g = errorXi * act.derivar(salida)
+                (pw, pb) = opt.pasos((g * xi, g), alpha)
+                self.w_ += pw
+                self.b_ += pb
+            if medir: cr.marca('actualizacion')
+            
+            ErrorAct += cst.suma(y[e:e+1, :].T , salida)
+            if medir: cr.marca('costo')
+            if por_lote:
+                cbs.on_batch_end(e, {'size': 1})
+        if fusionar:
+            self._aciertos = np.sum(self._etiquetas(salidas)==np.argmax(y, axis=1))
+        return ErrorAct / nRow
+
+    def _epoca_dispersa(self, X, y, alpha, cbs, salidas):
+        """Pasada en línea sobre una matriz CSR: cada ejemplo sólo lee y
+        actualiza las columnas de w_ de sus atributos no nulos (con un
+        optimizer con memoria el paso alcanza a todos los pesos).
+        Retorna el costo acumulado de la pasada.
+        """
+        (cr, medir, por_lote) = (cbs.cronometro, cbs.medir, cbs.por_lote)
+        opt = self._opt
+        (act, cst) = (self._activacion, self._funcion_costo)
+        cr.inicio()
+        ErrorAct = 0
+        for e in range(X.shape[0]):
+            (idx, val) = fila_dispersa(X, e)
+            netas = self.w_[:, idx] @ val + self.b_[:, 0]
+            salida = act.evaluar(netas.reshape(1, -1)).T
+            if salidas is not None:
+                salidas[e] = salida[:,0]
+            if medir: cr.marca('forward')
+            g = self._error_salida(y[e:e+1, :].T, salida) * act.derivar(salida)
+            if opt is None:
+                update = alpha * g
+                self.w_[:, idx] += update * val
+                self.b_ += update
+            else:
+                direccion = np.zeros_like(self.w_)
+                direccion[:, idx] = g * val
+                (pw, pb) = opt.pasos((direccion, g), alpha)
+                self.w_ += pw
+                self.b_ += pb
+            if medir: cr.marca('actualizacion')
+
+            ErrorAct += cst.suma(y[e:e+1, :].T , salida)
+            if medir: cr.marca('costo')
+            if por_lote:
+                cbs.on_batch_end(e, {'size': 1})
+        if salidas is not None:
+            self._aciertos = np.sum(self._etiquetas(salidas)==np.argmax(y, axis=1))
+        return ErrorAct
+
+    def _error_salida(self, y, salida):
+        """Error con el que la regla delta en línea corrige la salida de un
+        ejemplo (una columna por salida), con la misma regla que
+        _propagar_lote; el delta es este error por act.derivar(salida)."""
+        g = self._funcion_costo.gradiente(y, salida)
+        if self._jacobiano:
+            g = _jacobiano_softmax(salida, g, axis=0)
+        return g
+
+    def _epoca_lotes(self, X, y, alpha, cbs=SIN_CALLBACKS):
+        """Una pasada sobre (X, y) actualizando w_ y b_ por bloques de ejemplos.
+        Cada bloque es un producto (batch, nIn) @ (nIn, nOut); el gradiente se
+        promedia y la regla es la de _epoca, por lo que batch_size=1 equivale
+        al entrenamiento en línea (salvo el redondeo).
+        Retorna el costo acumulado de la pasada.
+        """
+        nRow = X.shape[0]
+        tam = nRow if (self.batch_size==-1) else self.batch_size
+        
+        (cr, medir, por_lote) = (cbs.cronometro, cbs.medir, cbs.por_lote)
+        fusionar = self._fusionar
+        if fusionar:
+            salidas = np.empty(y.shape, dtype=self.w_.dtype)
+        cr.inicio()
+        ErrorAct = 0
+        for ini in range(0, nRow, tam):
+            Xb = X[ini:ini+tam]
+            yb = y[ini:ini+tam]
+            
+            #-- salida, costo y delta salen juntos: todo se cuenta como 'forward' --
+            (salida, costo, delta) = self._propagar_lote(Xb, yb)
+            if fusionar:
+                salidas[ini:ini+tam] = salida
+            if medir: cr.marca('forward')
+            
+            #-- con Xb dispersa el producto se hace como Xbᵀ @ delta (CSC por denso) --
+            gw = (Xb.T @ delta).T if es_dispersa(Xb) else (delta.T @ Xb)
+            if self._opt is None:
+                paso = alpha / Xb.shape[0]
+                self.w_ += paso * gw
+                self.b_ += paso * np.sum(delta, axis=0).reshape(-1,1)
+            else:
+                B = Xb.shape[0]
+                (pw, pb) = self._opt.pasos((gw / B, np.sum(delta, axis=0).reshape(-1,1) / B), alpha)
+                self.w_ += pw
+                self.b_ += pb
+            if medir: cr.marca('actualizacion')
+            
+            ErrorAct += costo
+            if por_lote:
+                cbs.on_batch_end(ini // tam, {'size': Xb.shape[0]})
+        if fusionar:
+            self._aciertos = np.sum(self._etiquetas(salidas)==np.argmax(y, axis=1))
+        return ErrorAct
+
+    def _propagar_lote(self, X, y):
+        """Salida, costo y delta (gradiente del costo respecto de la neta, con
+        signo de actualización) de un bloque de ejemplos.
+        Para softmax se trabaja directamente sobre las netas: con 'EC' se usa
+        log-softmax estable y delta = y - salida; con otros costos se aplica
+        el jacobiano de softmax sin construirlo.
+        """
+        (act, cst) = (self._activacion, self._funcion_costo)
+        if (act.nombre!='softmax'):
+            netas = self.net_input(X)
+            salida = act.evaluar(netas, out=netas)
+            (costo, delta) = cst.costo_gradiente(y, salida)
+            if not act.lineal:
+                delta *= act.derivar(salida)
+            return (salida, costo, delta)
+        
+        netas = self.net_input(X)
+        netas = netas - np.max(netas, axis=1, keepdims=True)
+        expo = np.exp(netas)
+        suma = np.sum(expo, axis=1, keepdims=True)
+        salida = expo / suma
+        if (cst.nombre=='EC'):
+            costo = -np.sum(y * (netas - np.log(suma)))
+            delta = y - salida
+        else:
+            (costo, g) = cst.costo_gradiente(y, salida)
+            delta = _jacobiano_softmax(salida, g)
+        return (salida, costo, delta)
+
+    def _costo_validacion(self, X, y):
+        """Costo medio por ejemplo sobre (X, y) en una sola pasada vectorizada
+        (para softmax con 'EC' usa el log-softmax estable de _propagar_lote)"""
+        return self._propagar_lote(X, y)[1] / X.shape[0]
 
     def fCosto(self,y, y_hat):
-        EPS = EPS = np.finfo(float).eps
-        if (self.COSTO=='ECM'):
-            return(np.sum((y-y_hat)**2))
-        if (self.COSTO=='EC_binaria'):
-            return(np.sum(-y*np.log(y_hat+EPS)-(1-y)*np.log(1-y_hat+EPS)))
-        if (self.COSTO=='EC'):
-            return(np.sum(-y*np.log(y_hat+EPS)))
+        return costo(self.COSTO).suma(y, y_hat)
                
     def net_input(self, X):
         """Calculate net input"""
+        X = como_arreglo(X, self.w_.dtype)
+        if es_dispersa(X):
+            return X @ self.w_.T + self.b_.T
         netas = self.w_ @ X.T + self.b_
         return netas.T
     
     def evaluar(self, x):
-        if (self.FUN=='tanh'):
-            return (2.0 / (1+np.exp(-2*x)) - 1)
-        elif (self.FUN=='sigmoid'):
-            return (1.0/(1+np.exp(-x)))
-        elif (self.FUN=='softmax'):
-            return (np.exp(x)/(np.sum(np.exp(x),axis=1).reshape(-1,1)))
-        else:
-            return(x)
+        return activacion(self.FUN).evaluar(x)
         
     def derivar(self,x):
-        if (self.FUN=='tanh'):
-            return (1-x**2)
-        elif (self.FUN=='sigmoid'):
-            return (x*(1-x))
-        else:
-            return(1)    
+        return activacion(self.FUN).derivar(x)
 
-    def predict_nOut(self, X):
-        """Return class label after unit step"""
-        return self.evaluar(self.net_input(X))
+    def predict_nOut(self, X, chunk_size=None, n_jobs=None, out=None):
+        """Return class label after unit step (chunk_size, n_jobs y out como en predict)"""
+        return predecir_por_bloques(lambda Xb: self.evaluar(self.net_input(Xb)),
+                                    X, chunk_size, n_jobs, out)
     
-    def predict(self, X):
-        """Retorna un entero con el ìndice de la clase más probable """
-        y_hat = self.predict_nOut(X)
-        if (self.FUN=='tanh'):
-            y_hat = (y_hat>0)*1
-        if (self.FUN=='sigmoid'):
-            y_hat = (y_hat>0.5)*1
+    def predict(self, X, chunk_size=None, n_jobs=None, out=None):
+        """Retorna un entero con el ìndice de la clase más probable
+        chunk_size, n_jobs, out : predicen X por bloques de chunk_size
+            ejemplos en n_jobs hilos, escribiendo en out si se indica (ver
+            predecir_por_bloques); X puede ser un np.memmap.
+        """
+        return predecir_por_bloques(lambda Xb: self._etiquetas(self.predict_nOut(Xb)),
+                                    X, chunk_size, n_jobs, out)
+
+    def _etiquetas(self, y_hat):
+        """Índice de la clase de cada fila de salidas"""
+        umbral = activacion(self.FUN).umbral
+        if umbral is not None:
+            y_hat = (y_hat>umbral)*1
 
         return(np.argmax(y_hat,axis=1))
             
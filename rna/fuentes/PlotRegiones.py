@@ -2,7 +2,12 @@ from matplotlib.colors import ListedColormap
 import numpy as np
 import matplotlib.pyplot as plt
 
-def plot_decision_regions(X, y, classifier, resolution=0.02):
+from rna.fuentes.prediccion import predecir_por_bloques
+
+def plot_decision_regions(X, y, classifier, resolution=0.02, chunk_size=100000, n_jobs=None):
+    #-- la grilla se clasifica por bloques de chunk_size puntos (en n_jobs hilos)
+    #-- para no crear las salidas de toda la grilla a la vez; sirve para
+    #-- cualquier classifier con predict, no sólo los de rna.fuentes
     # setup marker generator and color map
     markers = ('s', 'x', 'o', '^', 'v')
     colors = ('red', 'blue', 'lightgreen', 'gray', 'cyan')
@@ -12,7 +17,7 @@ def plot_decision_regions(X, y, classifier, resolution=0.02):
     x1_min, x1_max = X[:, 0].min() - 1, X[:, 0].max() + 1
     x2_min, x2_max = X[:, 1].min() - 1, X[:, 1].max() + 1
     xx1, xx2 = np.meshgrid(np.arange(x1_min, x1_max, resolution), np.arange(x2_min, x2_max, resolution))
-    Z = classifier.predict(np.array([xx1.ravel(), xx2.ravel()]).T)
+    Z = predecir_por_bloques(classifier.predict, np.array([xx1.ravel(), xx2.ravel()]).T, chunk_size, n_jobs)
     Z = Z.reshape(xx1.shape)
     plt.contourf(xx1, xx2, Z, alpha=0.3 , cmap=cmap)
     plt.xlim(xx1.min(), xx1.max())
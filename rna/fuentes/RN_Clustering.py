@@ -1,55 +1,231 @@
 import numpy as np
 #from matplotlib import pyplot as plt
 from rna.fuentes.grafica_SOM import *
+from rna.fuentes.nucleos import usar_jit, cpn_epoca, som_epoca
+from rna.fuentes.prediccion import predecir_por_bloques, _cantidad_hilos
 
-def calcSilohuette(entradas, centros):
+#-- scipy es opcional: sin él la búsqueda de la ganadora es siempre por fuerza bruta --
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+#-- (dimensión máxima, cantidad mínima de centros) a partir de la cual armar un
+#-- KD-tree con los centros y consultarlo es más rápido que calcular todas las
+#-- distancias (medido con 20000 ejemplos uniformes por bloques de 4096; con
+#-- más dimensiones el KD-tree no llega a ganarle a la fuerza bruta). Para
+#-- volver a medirlo: python benchmarks/kdtree.py
+_CRUCE_KDTREE = ((2, 64), (5, 256), (8, 1024))
+
+def calcSilohuette(entradas, centros, por_ejemplo=False, n_jobs=None, memoria_mb=16,
+                   sample_size=None, random_state=None, simplificado=False, n_bootstrap=0, nivel=0.95):
     # ENTRADAS es una matriz de CantEjemplos x nAtrib
     # CENTROS es una matriz de k x nAtrib
+    # El silhouette de cada ejemplo compara la distancia media a su grupo
+    # con la distancia media al grupo del centro más cercano al suyo.
+    # Las distancias entre ejemplos se calculan por bloques de filas que
+    # ocupan a lo sumo memoria_mb por hilo (n_jobs hilos, ver
+    # predecir_por_bloques); de cada bloque sólo se guardan las sumas de
+    # distancias a cada grupo. Con por_ejemplo=True retorna también el
+    # silhouette de cada ejemplo: (promedio, silhouette).
+    #
+    # Para tablas grandes (p.ej. al elegir k para CPN_entrena):
+    # sample_size   calcula el silhouette sobre sample_size ejemplos elegidos
+    #               al azar con random_state (distancias sólo entre ellos).
+    # simplificado  usa la distancia al centro de su grupo y al del grupo
+    #               vecino en lugar de las distancias medias a los ejemplos:
+    #               O(CantEjemplos*k) en vez de cuadrático.
+    # n_bootstrap   > 0 agrega el intervalo de confianza bootstrap (percentil,
+    #               de nivel nivel) del promedio: retorna (promedio, (inf, sup))
+    #               o, con por_ejemplo, (promedio, (inf, sup), silhouette).
+    entradas = np.asarray(entradas, dtype=float)
+    centros = np.asarray(centros, dtype=float)
+    rgen = np.random.RandomState(random_state)
     
+    if (sample_size is not None) and (sample_size < entradas.shape[0]):
+        muestra = np.sort(rgen.choice(entradas.shape[0], sample_size, replace=False))
+        entradas = entradas[muestra]
+
     CantEjemplos = entradas.shape[0]  #cantidad de filas de ENTRADAS
     nAtrib = entradas.shape[1]
     
     k = centros.shape[0]
     
+    #-- filas por bloque: distancias a todos los ejemplos y diferencias con los centros --
+    hilos = _cantidad_hilos(n_jobs)
+    porFila = k*nAtrib + k + (0 if simplificado else CantEjemplos)
+    filas = max(1, int(memoria_mb * 2**20 / (8 * porFila * hilos)))
+    todos = np.arange(CantEjemplos)
+
     #asignar los ejemplos a los centros
-    asignaciones = np.zeros(CantEjemplos)
-    for e in range(CantEjemplos):
-        m = (centros - np.outer(np.ones(k),entradas[e,:]))**2
-        dists = np.sqrt(np.sum(m,axis=1))
-        asignaciones[e] = np.argmin(dists)
+    def distCentros(idx):
+        m = (centros[None, :, :] - entradas[idx, None, :])**2
+        return np.sqrt(np.sum(m, axis=2))
+    if simplificado:
+        distC = predecir_por_bloques(distCentros, todos, filas, n_jobs)
+        asignaciones = np.argmin(distC, axis=1)
+    else:
+        asignaciones = predecir_por_bloques(lambda idx: np.argmin(distCentros(idx), axis=1), todos, filas, n_jobs)
 
     # se supone que ambas matrices tienen la misma cantidad de columnas
-    silhouette =np.zeros(CantEjemplos)
-    for e in range(CantEjemplos):
-        c = int(asignaciones[e])
-            
-        miGrupo = entradas[asignaciones==c, :]
-        N = miGrupo.shape[0]
-        dist_miGrupo = np.mean(np.sqrt(np.sum((miGrupo - np.outer(np.ones(N), entradas[e,:]))**2, axis=1)))
-        
+    N = np.bincount(asignaciones, minlength=k)
+    masCercano = np.zeros(k, dtype=int)
+    for c in range(k):
         dist = np.argsort(np.sum((centros - np.outer(np.ones(k),centros[c,:]))**2, axis=1))
-        masCercano = dist[1]
-        
-        otroGrupo = entradas[asignaciones==masCercano, :]
-        M = otroGrupo.shape[0]
-        dist_otroGrupo = np.mean(np.sqrt(np.sum((otroGrupo - np.outer(np.ones(M),entradas[e,:]))**2, axis=1)))
-        
-        silhouette[e] = (dist_otroGrupo - dist_miGrupo)/max(dist_otroGrupo,dist_miGrupo)
+        masCercano[c] = dist[1]
+    c = asignaciones
+    otro = masCercano[c]
+
+    if simplificado:
+        dist_miGrupo = distC[todos, c]
+        dist_otroGrupo = distC[todos, otro]
+    else:
+        #-- ||x-z||^2 = ||x||^2 + ||z||^2 - 2 x.z sobre los datos centrados (menos cancelación) --
+        X = entradas - np.mean(entradas, axis=0)
+        normas = np.sum(X**2, axis=1)
+        grupos = np.zeros((CantEjemplos, k))
+        grupos[todos, asignaciones] = 1
+
+        def sumas(idx):
+            d2 = X[idx] @ X.T
+            d2 *= -2
+            d2 += normas[idx, None]
+            d2 += normas
+            np.maximum(d2, 0, out=d2)
+            d2[np.arange(len(idx)), idx] = 0     # distancia de cada ejemplo a sí mismo
+            np.sqrt(d2, out=d2)
+            return d2 @ grupos                   # suma de distancias a cada grupo
+        S = predecir_por_bloques(sumas, todos, filas, n_jobs)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            #-- como antes, un grupo vecino vacío deja el silhouette en NaN --
+            dist_miGrupo = S[todos, c] / N[c]
+            dist_otroGrupo = S[todos, otro] / N[otro]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        silhouette = (dist_otroGrupo - dist_miGrupo)/np.maximum(dist_otroGrupo,dist_miGrupo)
     silhouetteAVG = np.mean(silhouette)
 
-    return(silhouetteAVG)    
+    resultado = (silhouetteAVG,)
+    if n_bootstrap:
+        resultado += (_intervaloBootstrap(silhouette, n_bootstrap, nivel, rgen),)
+    if por_ejemplo:
+        resultado += (silhouette,)
+    return(resultado if (len(resultado) > 1) else silhouetteAVG)
 
+def _intervaloBootstrap(valores, n_bootstrap, nivel, rgen):
+    # intervalo percentil del promedio de valores remuestreando con reposición
+    n = len(valores)
+    medias = np.empty(n_bootstrap)
+    for r in range(n_bootstrap):
+        medias[r] = np.mean(valores[rgen.randint(0, n, n)])
+    cola = 100 * (1 - nivel) / 2
+    (inf, sup) = np.percentile(medias, [cola, 100 - cola])
+    return (inf, sup)
+
+
+def _usarKDTree(busqueda, centros):
+    # busqueda: 'bruta', 'kdtree' o 'auto' (KD-tree sólo donde conviene, ver _CRUCE_KDTREE)
+    if busqueda not in ('bruta', 'kdtree', 'auto'):
+        raise ValueError("busqueda debe ser 'bruta', 'kdtree' o 'auto'")
+    if (busqueda=='kdtree') and (cKDTree is None):
+        raise ImportError("busqueda='kdtree' necesita scipy (pip install scipy)")
+    if (busqueda=='bruta') or (cKDTree is None):
+        return False
+    if busqueda=='kdtree':
+        return True
+    (k, nAtrib) = centros.shape
+    return any((nAtrib <= dMax) and (k >= kMin) for (dMax, kMin) in _CRUCE_KDTREE)
+
+def _centroMasCercano(X, centros, memoria_mb=16, busqueda='bruta', raiz=True):
+    # índice del centro más cercano a cada ejemplo (un único argmin sobre
+    # las distancias, calculadas por bloques de filas de a lo sumo memoria_mb)
+    # o, según busqueda, una consulta a un KD-tree armado con los centros
+    # (ante distancias iguales puede elegir otro de los empatados).
+    # raiz=False compara las distancias al cuadrado, como SOM_entrena.
+    if _usarKDTree(busqueda, centros):
+        return cKDTree(centros).query(X)[1]
+    filas = max(1, int(memoria_mb * 2**20 / (8 * centros.size)))
+    def argmin(Xb):
+        dists = np.sum((centros[None, :, :] - Xb[:, None, :])**2, axis=2)
+        return np.argmin(np.sqrt(dists) if raiz else dists, axis=1)
+    return predecir_por_bloques(argmin, X, filas)
+
+def _epocaLotesCPN(X, centros, factor, alfa, asignaciones, batch_size, busqueda='bruta'):
+    # una pasada de aprendizaje competitivo por bloques de batch_size ejemplos:
+    # los ganadores de todo el bloque salen de una matriz (batch, k) de
+    # distancias y cada centro se acerca una sola vez al promedio de los
+    # ejemplos que ganó. Con m ejemplos ganados la tasa del centro es
+    # 1-(1-factor*alfa)**m, lo que avanzarían m pasos en línea de tasa
+    # factor*alfa hacia ese promedio (con m=1 es la regla en línea).
+    # Con KD-tree (ver _usarKDTree) se arma uno por bloque, ya que los
+    # centros no cambian mientras se buscan los ganadores del bloque.
+    (CantEjemplos, nAtrib) = X.shape
+    k = centros.shape[0]
+    tam = CantEjemplos if (batch_size==-1) else batch_size
+    suma = np.empty(centros.shape)
+    cuenta = np.empty(k)
+    kdtree = _usarKDTree(busqueda, centros)
+    for ini in range(0, CantEjemplos, tam):
+        Xb = X[ini:ini+tam]
+        if kdtree:
+            ganadores = cKDTree(centros).query(Xb)[1]
+        else:
+            #-- ||x-c||^2 sin el término ||x||^2, que no cambia el ganador --
+            dists = np.sum(centros**2, axis=1) - 2 * (Xb @ centros.T)
+            ganadores = np.argmin(dists, axis=1)
+        suma.fill(0)
+        cuenta.fill(0)
+        np.add.at(suma, ganadores, Xb)
+        np.add.at(cuenta, ganadores, 1)
+        hay = (cuenta > 0)
+        tasa = 1 - (1 - factor * alfa)**cuenta[hay]
+        centros[hay] += tasa[:, None] * (suma[hay] / cuenta[hay, None] - centros[hay])
+        asignaciones[ini:ini+tam] = ganadores
+
+def _pasadaGrossberg(W, T, asignaciones, restantes, N, tasa):
+    # una pasada de la capa de Grossberg en bloque: recorrer los ejemplos en
+    # orden haciendo W[c] += tasa*(T[e]-W[c]) deja en cada fila
+    #   W[c] = (1-tasa)**N[c] * W[c] + suma de tasa*(1-tasa)**r * T[e]
+    # donde r es la cantidad de ejemplos del grupo c que vienen después de e.
+    pesos = tasa * (1 - tasa)**restantes
+    suma = np.zeros(W.shape)
+    np.add.at(suma, asignaciones, pesos[:, None] * T)
+    W *= ((1 - tasa)**N)[:, None]
+    W += suma
 
 def CPN_entrena(X, k, alfa, MAX_ITE, usaF1=1, \
                 T=[], beta=0, usaF2=1, MAX_ITE2=300, \
-                dibuja=0,titulos=['X1','X2']):
+                dibuja=0,titulos=['X1','X2'], jit=False, batch_size=None, grossberg='secuencial', \
+                busqueda='bruta'):
     # k es la cantidad de grupos a formar
+    # jit=True recorre los ejemplos con el núcleo compilado (Numba) de rna.fuentes.nucleos
+    # batch_size=None actualiza los centros ejemplo a ejemplo; N los actualiza
+    # por bloques de N ejemplos y -1 con todos juntos (ver _epocaLotesCPN).
+    # usaF1 reduce la tasa de la misma forma en los dos modos.
+    # grossberg elige cómo se entrena la capa de salida (con T y beta):
+    # 'secuencial' ejemplo a ejemplo; 'vectorizado' hace las mismas MAX_ITE2
+    # pasadas con todos los ejemplos de cada grupo a la vez (ver
+    # _pasadaGrossberg); 'media' pone en W el promedio de T de cada grupo,
+    # al que tienden las pasadas con tasa decreciente, en una sola pasada.
+    # busqueda='kdtree' o 'auto' busca los ganadores de cada bloque (con
+    # batch_size) y la asignación final con un KD-tree de scipy; 'auto' sólo
+    # lo usa con pocos atributos y muchos centros (ver _CRUCE_KDTREE).
+    if grossberg not in ('secuencial', 'vectorizado', 'media'):
+        raise ValueError("grossberg debe ser 'secuencial', 'vectorizado' o 'media'")
+    _usarKDTree(busqueda, np.empty((k, X.shape[1])))
+    if (batch_size is not None) and (batch_size!=-1) and (batch_size<1):
+        raise ValueError("batch_size debe ser None, -1 o un entero positivo")
     
     (CantEjemplos,nAtrib) = X.shape
     
     # Tomamos al azar k ejemplos como centros iniciales
     mezcla = np.random.permutation(CantEjemplos)
     centros = X[mezcla[0:k],:]
+    jit = usar_jit(jit) and (batch_size is None)
+    if ((batch_size is not None) or jit) and not np.issubdtype(centros.dtype, np.floating):
+        centros = centros.astype(float)
+    if jit:
+        centros = np.ascontiguousarray(centros)
    
     centros_ant = np.zeros(centros.shape)
 
@@ -67,15 +243,20 @@ def CPN_entrena(X, k, alfa, MAX_ITE, usaF1=1, \
          
         centros_ant = centros.copy()
         #distribuir los ejemplos en los centros
-        for e in range(CantEjemplos):
-            #-- buscando el centro más cercano --
-            dists = np.sqrt(np.sum((centros - X[e,:])**2,axis=1))
-            cMin = np.argmin(dists)
-            #-- acercamos el centroide más cercano --
-            centros[cMin, :] = centros[cMin, :] + factor * alfa * (X[e,:]-centros[cMin, :])
+        if batch_size is not None:
+            _epocaLotesCPN(X, centros, factor, alfa, asignaciones, batch_size, busqueda)
+        elif jit:
+            cpn_epoca(X, centros, factor, alfa, asignaciones)
+        else:
+            for e in range(CantEjemplos):
+                #-- buscando el centro más cercano --
+                dists = np.sqrt(np.sum((centros - X[e,:])**2,axis=1))
+                cMin = np.argmin(dists)
+                #-- acercamos el centroide más cercano --
+                centros[cMin, :] = centros[cMin, :] + factor * alfa * (X[e,:]-centros[cMin, :])
             
-            # sóo para pintar
-            asignaciones[e] = cMin
+                # sóo para pintar
+                asignaciones[e] = cMin
 #            if dibuja and (e % 30 ==0):
 #                ph = dibuPtosColor(1, X, asignaciones, titulos, centros, ph)
             
@@ -87,30 +268,45 @@ def CPN_entrena(X, k, alfa, MAX_ITE, usaF1=1, \
             print(ite, cambioAVG)
                 
     #--- asignacion final de los ejemplos en los centros ---
-    asignaciones=[]
-    for e in range(CantEjemplos):
-        dists = np.sqrt(np.sum((centros - X[e,:])**2,axis=1))
-        asignaciones.append(int(np.argmin(dists)))
+    asignaciones = _centroMasCercano(X, centros, busqueda=busqueda).tolist()
     
     #=== la capa competitiva ya está entrenada y los ejemplos fueron asignados ===
-    if (T!=[]) and (beta>0):  #se indicó la clase    
+    if (len(T)>0) and (beta>0):  #se indicó la clase    
         ocultas = k
         salidas = T.shape[1]
 
         W = np.random.uniform(-0.5, 0.5, (ocultas,salidas))
         W_ant = np.zeros((ocultas,salidas))
         
+        if grossberg!='secuencial':
+            grupo = np.asarray(asignaciones)
+            N = np.bincount(grupo, minlength=ocultas)
+            #-- posición de cada ejemplo dentro de su grupo, en el orden de X --
+            orden = np.argsort(grupo, kind='stable')
+            posicion = np.empty(CantEjemplos, dtype=int)
+            posicion[orden] = np.arange(CantEjemplos) - np.repeat(np.cumsum(N) - N, N)
+            restantes = N[grupo] - 1 - posicion
+
         ErrorAVG = np.mean((W - W_ant)**2)
         ite2=0
         factor=1
-        while (ite2<MAX_ITE2):
+        if grossberg=='media':
+            suma = np.zeros((ocultas,salidas))
+            np.add.at(suma, grupo, T)
+            hay = (N > 0)    # un grupo sin ejemplos conserva sus pesos iniciales
+            W[hay] = suma[hay] / N[hay, None]
+            ite2 = 1
+        while (ite2<MAX_ITE2) and (grossberg!='media'):
             # para cada ejemplo calcular la neurona ganadora
             if usaF2:
                 factor = (MAX_ITE2-ite2)/MAX_ITE2
             W_ant = W.copy()
-            for e in range(CantEjemplos):
-                c = asignaciones[e]   
-                W[c,:] = W[c,:] + factor * beta * (T[e,:] - W[c,:])
+            if grossberg=='vectorizado':
+                _pasadaGrossberg(W, T, grupo, restantes, N, factor * beta)
+            else:
+                for e in range(CantEjemplos):
+                    c = asignaciones[e]   
+                    W[c,:] = W[c,:] + factor * beta * (T[e,:] - W[c,:])
             
             ErrorAVG = np.mean((W - W_ant)**2)    
             ite2 = ite2 + 1
@@ -122,7 +318,65 @@ def CPN_entrena(X, k, alfa, MAX_ITE, usaF1=1, \
         return(centros,asignaciones, ite) 
 
 
-def SOM_entrena(P, filas, columnas, alfa, vecindad, ite_reduce, dibuja):
+def _vecindario(pasos, vecindad, tipo):
+    # h[ganadora, n]: fracción del paso hacia el ejemplo que da la neurona n
+    # cuando gana 'ganadora'. 'escalon' mueve igual a todas las que están a
+    # lo sumo a vecindad pasos; 'gaussiano' usa exp(-pasos^2 / (2 vecindad^2))
+    # (con vecindad 0 sólo se mueve la ganadora).
+    if (tipo=='escalon') or (vecindad <= 0):
+        return (pasos <= vecindad) * 1.0
+    return np.exp(-pasos**2 / (2.0 * vecindad**2))
+
+def _epocaSOMVectorizada(P, w_O, pasos, vecindad, alfa, vecindario):
+    # una iteración en línea: cada ejemplo mueve a todas sus vecinas con una
+    # sola operación sobre las filas de w_O en lugar de recorrer las neuronas
+    if vecindario=='gaussiano':
+        tasas = alfa * _vecindario(pasos, vecindad, vecindario)
+    else:
+        vecinas = (pasos <= vecindad)
+    for p in range(P.shape[0]):
+        distancias = -np.sqrt(np.sum((w_O-P[p,:])**2, axis=1))
+        ganadora = np.argmax(distancias)
+        if vecindario=='gaussiano':
+            w_O += tasas[ganadora, :, None] * (P[p, :] - w_O)
+        else:
+            m = vecinas[ganadora]
+            w_O[m] = w_O[m] + alfa * (P[p, :] - w_O[m])
+
+def _epocaSOMLotes(P, w_O, pasos, vecindad, vecindario, busqueda):
+    # una iteración del SOM por lotes: se buscan todas las ganadoras con los
+    # pesos actuales y cada neurona pasa a ser el promedio de los ejemplos
+    # ponderados por el vecindario de su ganadora. Una neurona a la que no
+    # le toca ningún ejemplo conserva sus pesos.
+    ganadoras = _centroMasCercano(P, w_O, busqueda=busqueda, raiz=False)
+    h = _vecindario(pasos, vecindad, vecindario)
+    suma = np.zeros(w_O.shape)
+    np.add.at(suma, ganadoras, P)
+    cuenta = np.bincount(ganadoras, minlength=w_O.shape[0])
+    numerador = h.T @ suma
+    denominador = h.T @ cuenta
+    hay = (denominador > 0)
+    w_O[hay] = numerador[hay] / denominador[hay, None]
+
+def SOM_entrena(P, filas, columnas, alfa, vecindad, ite_reduce, dibuja, jit=False, busqueda='bruta',
+                modo='secuencial', vecindario='escalon'):
+    # jit=True recorre los ejemplos con el núcleo compilado (Numba) de rna.fuentes.nucleos
+    # modo: 'secuencial' recorre ejemplos y neuronas como siempre;
+    #       'vectorizado' hace lo mismo moviendo todas las vecinas de una vez
+    #       (ver _epocaSOMVectorizada); 'lotes' es el SOM por lotes (ver
+    #       _epocaSOMLotes), que no usa alfa.
+    # vecindario: 'escalon' (las neuronas a lo sumo a vecindad pasos) o
+    #       'gaussiano' (ver _vecindario); el gaussiano en línea siempre usa
+    #       la versión vectorizada.
+    # busqueda='kdtree' o 'auto' busca las ganadoras del modo 'lotes' y
+    # proyecta los ejemplos sobre el mapa entrenado con un KD-tree de scipy
+    # (ver _usarKDTree); el entrenamiento en línea mueve neuronas con cada
+    # ejemplo y sigue buscando por fuerza bruta.
+    if modo not in ('secuencial', 'vectorizado', 'lotes'):
+        raise ValueError("modo debe ser 'secuencial', 'vectorizado' o 'lotes'")
+    if vecindario not in ('escalon', 'gaussiano'):
+        raise ValueError("vecindario debe ser 'escalon' o 'gaussiano'")
+    _usarKDTree(busqueda, np.empty((filas * columnas, P.shape[1])))
     ocultas = filas * columnas
     
     # Entrenar SOM
@@ -144,14 +398,22 @@ def SOM_entrena(P, filas, columnas, alfa, vecindad, ite_reduce, dibuja):
         SOM_plot(P, w_O, pasos, title_fig= 'Iteración: ' + str(ite)\
              + '-- Vecindad: ' +str(vecindad) )
     
+    jit = usar_jit(jit) and (modo=='secuencial') and (vecindario=='escalon')
     while (ite < max_ite):
-        for p in range(CantEjemplos): 
-            distancias = -np.sqrt(np.sum((w_O-P[p,:])**2, axis=1))
-            ganadora = np.argmax(distancias)
+        if modo=='lotes':
+            _epocaSOMLotes(P, w_O, pasos, vecindad, vecindario, busqueda)
+        elif (modo=='vectorizado') or (vecindario=='gaussiano'):
+            _epocaSOMVectorizada(P, w_O, pasos, vecindad, alfa, vecindario)
+        elif jit:
+            som_epoca(P, w_O, pasos, vecindad, alfa)
+        else:
+            for p in range(CantEjemplos): 
+                distancias = -np.sqrt(np.sum((w_O-P[p,:])**2, axis=1))
+                ganadora = np.argmax(distancias)
     
-            for n in range(ocultas):
-                if (pasos[ganadora, n] <= vecindad):
-                       w_O[n,:] = w_O[n,:] + alfa * (P[p, :] - w_O[n,:]) 
+                for n in range(ocultas):
+                    if (pasos[ganadora, n] <= vecindad):
+                           w_O[n,:] = w_O[n,:] + alfa * (P[p, :] - w_O[n,:]) 
                        
     #        if (dibujar and (vecindad==1) and (p<250) and (p % 10 == 0) and ((ite % ite_reduce)==0)):
     #            SOM_plot(P, w_O, pasos, title_fig= 'Iteración: ' + str(ite) \
@@ -167,10 +429,11 @@ def SOM_entrena(P, filas, columnas, alfa, vecindad, ite_reduce, dibuja):
                      + '-- Vecindad: ' +str(vecindad) )
                 
     entradas2D = np.zeros([CantEjemplos, 2])
-    for e in range(CantEjemplos):
-        nroNeurona = np.argmin(np.sum((w_O-P[e,:])**2,axis=1))
-        (fil,col) = ubicacion(nroNeurona,filas,columnas)
-        entradas2D[e, 0] = col # columna dentro del mapa
-        entradas2D[e, 1] = filas-fil # fila dentro del mapa   
+    nroNeurona = _centroMasCercano(P, w_O, busqueda=busqueda, raiz=False)
+    #-- ubicacion() de todas las neuronas ganadoras a la vez --
+    fil = filas - nroNeurona // columnas - 1
+    col = nroNeurona % columnas
+    entradas2D[:, 0] = col # columna dentro del mapa
+    entradas2D[:, 1] = filas-fil # fila dentro del mapa   
           
     return(w_O, entradas2D)        
@@ -0,0 +1,246 @@
+import numpy as np
+
+#-- Registro de funciones de activación y de costo. Los estimadores resuelven
+#-- FUN y COSTO una sola vez al comenzar el fit y en los lazos llaman
+#-- directamente a los objetos resueltos, sin comparar cadenas por ejemplo.
+
+EPS = np.finfo(float).eps
+
+class Activacion(object):
+    """Función de activación de rna.fuentes.
+    Parameters
+    ------------
+    nombre : string
+    evaluar : callable(Z, out=None) -> A
+        salida para las netas Z. Con out (que puede ser el mismo Z) escribe
+        el resultado allí sin crear arreglos; sin out sirve también para
+        escalares.
+    derivar : callable(A, out=None) -> D
+        derivada expresada con la salida A (p.ej. 1-A**2 para tanh), con el
+        mismo uso de out.
+    lineal : bool
+        la derivada es 1 en todo punto; los lazos omiten multiplicar por ella.
+    por_filas : bool
+        cada salida depende de toda la fila de netas (softmax); evaluar
+        recibe arreglos 2d y la regla delta usa derivada 1 (exacta con 'EC').
+    umbral : float or None
+        valor de salida que separa las dos clases (0 para tanh, 0.5 para
+        sigmoid); None si la salida no es una etiqueta.
+    """
+    def __init__(self, nombre, evaluar, derivar, lineal=False, por_filas=False, umbral=None):
+        self.nombre = nombre
+        self.evaluar = evaluar
+        self.derivar = derivar
+        self.lineal = lineal
+        self.por_filas = por_filas
+        self.umbral = umbral
+
+    def evaluar_derivar(self, Z, D):
+        """Fusionada: deja la salida en Z y su derivada en D; retorna (Z, D).
+        Con una activación lineal D no se toca y se retorna None."""
+        self.evaluar(Z, out=Z)
+        if self.lineal:
+            return (Z, None)
+        return (Z, self.derivar(Z, out=D))
+
+
+class Costo(object):
+    """Función de costo de rna.fuentes.
+    Parameters
+    ------------
+    nombre : string
+    valor : callable(y, A) -> costo de cada elemento (sin sumar)
+    suma : callable(y, A, tmp=None) -> float, optional
+        costo total; con tmp (del tamaño de A) como espacio de trabajo no
+        crea arreglos. Por defecto np.sum(valor(y, A)).
+    gradiente : callable(y, A, out=None) -> G, optional
+        dirección con la que la regla delta corrige la salida antes de
+        multiplicar por la derivada de la activación. Por defecto y - A,
+        la que usan todos los costos incluidos.
+    """
+    def __init__(self, nombre, valor, suma=None, gradiente=None):
+        self.nombre = nombre
+        self.valor = valor
+        self.suma = suma if (suma is not None) else (lambda y, A, tmp=None: np.sum(valor(y, A)))
+        self.gradiente = gradiente if (gradiente is not None) else _error
+
+    def costo_gradiente(self, y, A, G=None, tmp=None):
+        """Fusionada: retorna (costo total, G) con G = gradiente(y, A).
+        Con G y tmp (del tamaño de A) no crea arreglos."""
+        G = self.gradiente(y, A, out=G)
+        return (self.suma(y, A, tmp), G)
+
+
+def _error(y, A, out=None):
+    return np.subtract(y, A, out=out)
+
+#====== activaciones incluidas ======
+
+def _tanh(Z, out=None):
+    #-- misma fórmula que usaban evaluar() de NeuronaGradiente y RNMulticlase --
+    if out is None:
+        return (2.0 / (1+np.exp(-2*Z)) - 1)
+    np.multiply(Z, -2, out=out)
+    np.exp(out, out=out)
+    out += 1
+    np.divide(2.0, out, out=out)
+    out -= 1
+    return out
+
+def _tanh_derivada(A, out=None):
+    if out is None:
+        return (1-A**2)
+    np.multiply(A, A, out=out)
+    np.subtract(1, out, out=out)
+    return out
+
+def _sigmoid(Z, out=None):
+    if out is None:
+        return (1.0/(1+np.exp(-Z)))
+    np.negative(Z, out=out)
+    np.exp(out, out=out)
+    out += 1
+    np.reciprocal(out, out=out)
+    return out
+
+def _sigmoid_derivada(A, out=None):
+    if out is None:
+        return (A*(1-A))
+    np.subtract(1, A, out=out)
+    out *= A
+    return out
+
+def _softmax(Z, out=None):
+    if out is None:
+        expo = np.exp(Z - np.max(Z,axis=1).reshape(-1,1))
+        return (expo/(np.sum(expo,axis=1).reshape(-1,1)))
+    np.subtract(Z, np.max(Z, axis=1, keepdims=True), out=out)
+    np.exp(out, out=out)
+    out /= np.sum(out, axis=1, keepdims=True)
+    return out
+
+def _identidad(Z, out=None):
+    if (out is None) or (out is Z):
+        return Z
+    np.copyto(out, Z)
+    return out
+
+def _uno(A, out=None):
+    if out is None:
+        return 1
+    out.fill(1)
+    return out
+
+#====== costos incluidos ======
+
+def _ecm(y, A):
+    return (y-A)**2
+
+def _ecm_suma(y, A, tmp=None):
+    if tmp is None:
+        return np.sum((y-A)**2)
+    np.subtract(y, A, out=tmp)
+    tmp *= tmp
+    return np.sum(tmp)
+
+def _ec_binaria(y, A):
+    return (-y*np.log(A+EPS)-(1-y)*np.log(1-A+EPS))
+
+def _ec_binaria_suma(y, A, tmp=None):
+    if tmp is None:
+        return np.sum(_ec_binaria(y, A))
+    np.add(A, EPS, out=tmp)
+    np.log(tmp, out=tmp)
+    tmp *= y
+    costo = -np.sum(tmp)
+    #-- (1-y)*log(1-A) = log(1-A) - y*log(1-A) --
+    np.subtract(1 + EPS, A, out=tmp)
+    np.log(tmp, out=tmp)
+    costo -= np.sum(tmp)
+    tmp *= y
+    costo += np.sum(tmp)
+    return costo
+
+def _ec(y, A):
+    return (-y*np.log(A+EPS))
+
+def _ec_suma(y, A, tmp=None):
+    if tmp is None:
+        return np.sum(_ec(y, A))
+    np.add(A, EPS, out=tmp)
+    np.log(tmp, out=tmp)
+    tmp *= y
+    return -np.sum(tmp)
+
+def _ea(y, A):
+    return np.absolute(y-A)
+
+
+class _CostoECM(Costo):
+    def costo_gradiente(self, y, A, G=None, tmp=None):
+        #-- el error y - A se calcula una sola vez y sirve para el costo y el gradiente --
+        G = np.subtract(y, A, out=G)
+        if tmp is None:
+            return (np.sum(G**2), G)
+        np.multiply(G, G, out=tmp)
+        return (np.sum(tmp), G)
+
+
+ACTIVACIONES = {}
+COSTOS = {}
+
+def registrar_activacion(nombre, evaluar, derivar, lineal=False, por_filas=False, umbral=None):
+    """Agrega (o reemplaza) una activación que luego se usa con FUN=nombre.
+    evaluar y derivar siguen el contrato de Activacion: reciben un arreglo
+    (o escalar) y un parámetro opcional out donde escribir el resultado.
+    Returns
+    -------
+    La Activacion registrada.
+    """
+    act = Activacion(nombre, evaluar, derivar, lineal, por_filas, umbral)
+    ACTIVACIONES[nombre] = act
+    return act
+
+def registrar_costo(nombre, valor, suma=None, gradiente=None):
+    """Agrega (o reemplaza) un costo que luego se usa con COSTO=nombre
+    (ver Costo para el contrato de valor, suma y gradiente).
+    Returns
+    -------
+    El Costo registrado.
+    """
+    cst = Costo(nombre, valor, suma, gradiente)
+    COSTOS[nombre] = cst
+    return cst
+
+def activacion(FUN):
+    """Activacion de FUN: un nombre registrado o una instancia de Activacion.
+    Cualquier otro nombre es la activación lineal, como hasta ahora."""
+    if isinstance(FUN, Activacion):
+        return FUN
+    return ACTIVACIONES.get(FUN, ACTIVACIONES['lineal'])
+
+def costo(COSTO, defecto=None):
+    """Costo de COSTO: un nombre registrado o una instancia de Costo. Un
+    nombre desconocido usa el costo defecto si se indica y si no es un error."""
+    if isinstance(COSTO, Costo):
+        return COSTO
+    if COSTO in COSTOS:
+        return COSTOS[COSTO]
+    if defecto is not None:
+        return COSTOS[defecto]
+    raise ValueError("COSTO debe ser uno de " + ", ".join(COSTOS))
+
+
+registrar_activacion('tanh', _tanh, _tanh_derivada, umbral=0.0)
+registrar_activacion('sigmoid', _sigmoid, _sigmoid_derivada, umbral=0.5)
+registrar_activacion('softmax', _softmax, _uno, por_filas=True)
+registrar_activacion('lineal', _identidad, _uno, lineal=True)
+#-- nombres de MATLAB que usan las funciones de grafica_Grad y grafica_CL --
+ACTIVACIONES['tansig'] = ACTIVACIONES['tanh']
+ACTIVACIONES['logsig'] = ACTIVACIONES['sigmoid']
+ACTIVACIONES['purelin'] = ACTIVACIONES['lineal']
+
+COSTOS['ECM'] = _CostoECM('ECM', _ecm, _ecm_suma)
+registrar_costo('EC_binaria', _ec_binaria, _ec_binaria_suma)
+registrar_costo('EC', _ec, _ec_suma)
+registrar_costo('EA', _ea)
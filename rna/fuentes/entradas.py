@@ -0,0 +1,58 @@
+import numpy as np
+
+#-- scipy es opcional: sin él sólo se aceptan arreglos densos --
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+def resolver_dtype(dtype, X):
+    """Tipo de punto flotante con el que se entrena y predice.
+    Si dtype es None se conserva el de X cuando ya es de punto flotante
+    (por ejemplo float32 entregado por DataLoader.load_array), si no float64.
+    """
+    if dtype is not None:
+        return np.dtype(dtype)
+    tipo = getattr(X, 'dtype', None)
+    if (tipo is not None) and np.issubdtype(tipo, np.floating):
+        return np.dtype(tipo)
+    return np.dtype(np.float64)
+
+def como_arreglo(X, dtype):
+    """X como ndarray de tipo dtype; no copia si ya lo es.
+    Una matriz de scipy.sparse se entrega como CSR de tipo dtype (sin
+    densificarla ni copiarla si ya lo es)."""
+    if es_dispersa(X):
+        X = X.tocsr()
+        return X if (X.dtype==dtype) else X.astype(dtype)
+    return np.asarray(X, dtype=dtype)
+
+def es_dispersa(X):
+    """True si X es una matriz de scipy.sparse"""
+    return (sparse is not None) and sparse.issparse(X)
+
+def fila_dispersa(X, e):
+    """(índices, valores) de los atributos no nulos del ejemplo e de la CSR X"""
+    (ini, fin) = (X.indptr[e], X.indptr[e+1])
+    return (X.indices[ini:fin], X.data[ini:fin])
+
+def separar_validacion(X, y, validation_split, validation_data, random_state, dtype):
+    """Retorna (X, y, Xv, yv). validation_data = (Xv, yv) tiene prioridad; si
+    no, validation_split separa esa fracción de los ejemplos elegidos al
+    azar con random_state. Sin validación Xv e yv son None."""
+    if validation_data is not None:
+        (Xv, yv) = validation_data
+        return (X, y, como_arreglo(Xv, dtype), como_arreglo(yv, dtype))
+    if not validation_split:
+        return (X, y, None, None)
+    if not (0.0 < validation_split < 1.0):
+        raise ValueError("validation_split debe estar entre 0 y 1")
+    nRow = X.shape[0]
+    nVal = int(round(validation_split * nRow))
+    if (nVal < 1) or (nVal >= nRow):
+        raise ValueError("validation_split deja vacío el conjunto de entrenamiento o el de validación")
+    orden = np.random.RandomState(random_state).permutation(nRow)
+    #-- se conserva el orden original dentro de cada parte --
+    idx_train = np.sort(orden[nVal:])
+    idx_val = np.sort(orden[:nVal])
+    return (X[idx_train], y[idx_train], X[idx_val], y[idx_val])
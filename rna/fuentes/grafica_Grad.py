@@ -9,6 +9,8 @@ from IPython import display
 import time
 import io
 
+from rna.fuentes.activaciones import activacion
+
 
 def dibuPtos(entradas, salida, titulos=['x1', 'x2'], borde=0.05, nroFig=1):
     if (entradas.shape[1]==2):
@@ -258,21 +260,10 @@ def crearAnimacion(nroFun, puntos):
         
 # ===== Neurona no lineal =====
 def evaluar(FUN, x):
-    if (FUN=='tansig'):
-        return (2.0 / (1+np.exp(np.dot(-2,x))) - 1)
-    elif (FUN=='logsig'):
-        return (1.0/(1+np.exp(np.dot(-1,x))))
-    else:
-        return(x)
+    return activacion(FUN).evaluar(x)
     
 def evaluarDerivada(FUN,x):
-    if (FUN=='tansig'):
-        return (1-x**2)
-    elif (FUN=='logsig'):
-        #return (x*(1+np.dot(-1,x)))
-        return (x*(1-x))
-    else:
-        return(1)
+    return activacion(FUN).derivar(x)
     
 def graficarFuncionActivacion(ptos, T2, W, b, FUN, ph=0, h=0):
     if (len(np.unique(T2))!=2) or (len(np.shape(T2))>1) or (len(np.shape(ptos))!=2):
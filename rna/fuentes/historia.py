@@ -0,0 +1,61 @@
+import numpy as np
+
+#-- errors_ y accuracy_ de NeuronaGradiente, RNMulticlase y RNMulticapa: con
+#-- history='array' son vistas de un arreglo reservado para n_iter épocas y
+#-- con accuracy_mode='fused' accuracy_ sale de los aciertos (_aciertos) que
+#-- contó la pasada de entrenamiento.
+
+class ConHistoria(object):
+    """Parte común de los estimadores con history, accuracy_mode,
+    accuracy_every y accuracy_sample; cada uno define accuracy(X, y) y
+    deja _fusionar y _aciertos en _preparar_estado."""
+
+    def _preparar_historia(self):
+        if self.history not in ('list', 'array'):
+            raise ValueError("history debe ser 'list' o 'array'")
+        if self.accuracy_mode not in ('full', 'fused'):
+            raise ValueError("accuracy_mode debe ser 'full' o 'fused'")
+        if self.history=='array':
+            self._hist = np.full((2, max(self.n_iter, 1)), np.nan)
+            self._epocas = 0
+            self.errors_ = self._hist[0, :0]
+            self.accuracy_ = self._hist[1, :0]
+        else:
+            self.errors_ = []
+            self.accuracy_ = []
+
+    def _registrar(self, error, acc):
+        """Agrega una época a errors_ y accuracy_"""
+        if self.history=='array':
+            n = self._epocas
+            if n==self._hist.shape[1]:
+                #-- más épocas que las reservadas (partial_fit): duplica el espacio --
+                self._hist = np.concatenate((self._hist, np.full_like(self._hist, np.nan)), axis=1)
+            self._hist[0, n] = error
+            self._hist[1, n] = acc
+            self._epocas = n + 1
+            self.errors_ = self._hist[0, :n+1]
+            self.accuracy_ = self._hist[1, :n+1]
+        else:
+            self.errors_.append(error)
+            self.accuracy_.append(acc)
+
+    def _muestra_accuracy(self, X, y):
+        """Ejemplos sobre los que se mide accuracy_ con accuracy_mode='full'"""
+        m = self.accuracy_sample
+        if (m is None) or self._fusionar:
+            return (X, y)
+        nRow = X.shape[0]
+        m = int(round(m * nRow)) if isinstance(m, float) else int(m)
+        if (m < 1) or (m > nRow):
+            raise ValueError("accuracy_sample fuera de rango")
+        idx = np.sort(self._rgen.choice(nRow, m, replace=False))
+        return (X[idx], y[idx])
+
+    def _accuracy_epoca(self, i, X, y, nRow):
+        """accuracy de la época i según accuracy_mode y accuracy_every"""
+        if self._fusionar:
+            return self._aciertos / nRow
+        if (i+1) % self.accuracy_every != 0:
+            return np.nan
+        return self.accuracy(X, y)
@@ -0,0 +1,146 @@
+import warnings
+
+import numpy as np
+
+#-- Numba es opcional: si no está instalado los entrenamientos usan los lazos de NumPy --
+try:
+    from numba import njit
+    HAY_NUMBA = True
+except ImportError:
+    HAY_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+_avisado = False
+
+def usar_jit(jit):
+    """True si se pidió el backend compilado y Numba está disponible"""
+    global _avisado
+    if jit and not HAY_NUMBA:
+        if not _avisado:
+            warnings.warn("numba no está instalado; se usa el entrenamiento en NumPy")
+            _avisado = True
+        return False
+    return bool(jit)
+
+# Los núcleos reproducen el orden de operaciones de los lazos originales
+# (mismo producto punto, misma suma por pares de np.sum y mismo orden de
+# actualización), por lo que los pesos coinciden bit a bit con NumPy.
+
+@njit(cache=True)
+def _suma(a):
+    """Suma de a con el mismo algoritmo por pares que usa np.sum"""
+    n = a.shape[0]
+    if n < 8:
+        #-- np.sum parte de 0; 0 + a[0] == a[0] para los valores que se suman aquí --
+        res = a[0]
+        for i in range(1, n):
+            res += a[i]
+        return res
+    elif n <= 128:
+        r0 = a[0]; r1 = a[1]; r2 = a[2]; r3 = a[3]
+        r4 = a[4]; r5 = a[5]; r6 = a[6]; r7 = a[7]
+        i = 8
+        while i < n - (n % 8):
+            r0 += a[i]; r1 += a[i+1]; r2 += a[i+2]; r3 += a[i+3]
+            r4 += a[i+4]; r5 += a[i+5]; r6 += a[i+6]; r7 += a[i+7]
+            i += 8
+        res = ((r0 + r1) + (r2 + r3)) + ((r4 + r5) + (r6 + r7))
+        while i < n:
+            res += a[i]
+            i += 1
+        return res
+    else:
+        n2 = n // 2
+        n2 -= n2 % 8
+        return _suma(a[:n2]) + _suma(a[n2:])
+
+@njit(cache=True)
+def _dist2(C, x, out):
+    """out[j] = np.sum((C[j] - x)**2)"""
+    dif = np.empty(C.shape[1], dtype=C.dtype)
+    for j in range(C.shape[0]):
+        for a in range(C.shape[1]):
+            d = C[j, a] - x[a]
+            dif[a] = d * d
+        out[j] = _suma(dif)
+
+@njit(cache=True)
+def _perceptron_epoca(X, y, w, b, alpha, uno, cero):
+    errors = 0
+    for e in range(X.shape[0]):
+        neta = np.dot(X[e], w) + b
+        pred = uno if neta >= 0.0 else cero
+        update = alpha * (y[e] - pred)
+        for a in range(w.shape[0]):
+            w[a] += update * X[e, a]
+        b += update
+        if update != 0.0:
+            errors += 1
+    return b, errors
+
+@njit(cache=True)
+def _lineal_epoca(X, y, w, b, alpha, cero, dos):
+    ErrorAct = cero
+    for e in range(X.shape[0]):
+        errorXi = y[e] - (np.dot(X[e], w) + b)
+        update = alpha * errorXi
+        for a in range(w.shape[0]):
+            w[a] += update * X[e, a]
+        b += update
+        #-- exponente del mismo tipo: np.float32**2 usa powf, no errorXi*errorXi --
+        ErrorAct += errorXi**dos
+    return b, ErrorAct
+
+@njit(cache=True)
+def _cpn_epoca(X, centros, paso, asignaciones):
+    dists = np.empty(centros.shape[0], dtype=centros.dtype)
+    for e in range(X.shape[0]):
+        _dist2(centros, X[e], dists)
+        cMin = np.argmin(np.sqrt(dists))
+        for a in range(centros.shape[1]):
+            centros[cMin, a] = centros[cMin, a] + paso * (X[e, a] - centros[cMin, a])
+        asignaciones[e] = cMin
+
+@njit(cache=True)
+def _som_epoca(P, w_O, pasos, vecindad, alfa):
+    dists = np.empty(w_O.shape[0], dtype=w_O.dtype)
+    for p in range(P.shape[0]):
+        _dist2(w_O, P[p], dists)
+        ganadora = np.argmax(-np.sqrt(dists))
+        for n in range(w_O.shape[0]):
+            if pasos[ganadora, n] <= vecindad:
+                for a in range(w_O.shape[1]):
+                    w_O[n, a] = w_O[n, a] + alfa * (P[p, a] - w_O[n, a])
+
+#-- envoltorios: preparan tipos y contigüidad y llaman al núcleo compilado --
+
+def perceptron_epoca(X, y, w, b, alpha):
+    """Una época de Perceptron.fit; modifica w y retorna (b, errores)"""
+    tipo = w.dtype.type
+    X = np.ascontiguousarray(X, dtype=w.dtype)
+    y = np.ascontiguousarray(y, dtype=w.dtype)
+    (b, errors) = _perceptron_epoca(X, y, w, tipo(b), tipo(alpha), tipo(1), tipo(0))
+    return tipo(b), int(errors)
+
+def lineal_epoca(X, y, w, b, alpha):
+    """Una época LMS de NeuronaLineal.fit; modifica w y retorna (b, error cuadrático)"""
+    tipo = w.dtype.type
+    X = np.ascontiguousarray(X, dtype=w.dtype)
+    y = np.ascontiguousarray(y, dtype=w.dtype)
+    (b, ErrorAct) = _lineal_epoca(X, y, w, tipo(b), tipo(alpha), tipo(0), tipo(2))
+    return tipo(b), tipo(ErrorAct)
+
+def cpn_epoca(X, centros, factor, alfa, asignaciones):
+    """Una pasada de la capa competitiva de CPN_entrena; modifica centros y asignaciones"""
+    X = np.ascontiguousarray(X, dtype=centros.dtype)
+    #-- como en NumPy, factor * alfa se redondea al tipo de los centros --
+    _cpn_epoca(X, centros, centros.dtype.type(factor * alfa), asignaciones)
+
+def som_epoca(P, w_O, pasos, vecindad, alfa):
+    """Una iteración de SOM_entrena; modifica w_O"""
+    P = np.ascontiguousarray(P, dtype=w_O.dtype)
+    _som_epoca(P, w_O, np.ascontiguousarray(pasos, dtype=np.float64), float(vecindad), alfa)
@@ -0,0 +1,75 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+def _cantidad_hilos(n_jobs):
+    """n_jobs como en scikit-learn: None es 1 y -1 todos los procesadores"""
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    if n_jobs == 0:
+        raise ValueError("n_jobs no puede ser 0")
+    return n_jobs
+
+def predecir_por_bloques(funcion, X, chunk_size=None, n_jobs=None, out=None):
+    """Aplica funcion (p.ej. el predict de un estimador) sobre X por bloques
+    de filas y junta los resultados en un único arreglo.
+    Cada bloque sólo ocupa memoria para chunk_size ejemplos, por lo que X
+    puede ser un np.memmap (o un np.load(..., mmap_mode='r')) más grande que
+    la memoria: sólo se leen las filas del bloque que se está procesando.
+    Parameters
+    ------------
+    funcion : callable(Xb) -> arreglo con una fila (o un valor) por ejemplo
+    X : {array-like, sparse matrix, memmap}, shape = [n_examples, n_features]
+    chunk_size : int or None
+        ejemplos por bloque. None usa un solo bloque, o uno por hilo si
+        n_jobs > 1.
+    n_jobs : int or None
+        hilos que procesan bloques a la vez (NumPy libera el GIL en los
+        productos y funciones elementales); -1 usa todos los procesadores.
+        Conviene limitar los hilos del BLAS (p.ej. OMP_NUM_THREADS) para
+        no repartir los procesadores dos veces.
+    out : ndarray, optional
+        arreglo ya reservado (puede ser un memmap abierto para escritura)
+        donde se escribe el resultado, fila por fila.
+    Returns
+    -------
+    out : el arreglo con el resultado de todos los bloques
+    """
+    hilos = _cantidad_hilos(n_jobs)
+    if (chunk_size is None) and (hilos == 1) and (out is None):
+        return funcion(X)
+    if not hasattr(X, 'shape'):
+        X = np.asarray(X)
+
+    nRow = X.shape[0]
+    if nRow == 0:
+        return funcion(X) if (out is None) else out
+    if chunk_size is None:
+        chunk_size = -(-nRow // hilos) if (hilos > 1) else nRow
+    if chunk_size < 1:
+        raise ValueError("chunk_size debe ser un entero positivo")
+    inicios = range(0, nRow, chunk_size)
+
+    #-- el primer bloque da la forma y el tipo del resultado cuando no hay out --
+    primero = funcion(X[0:chunk_size])
+    if out is None:
+        out = np.empty((nRow,) + np.shape(primero)[1:], dtype=np.result_type(primero))
+    elif out.shape[0] != nRow:
+        raise ValueError("out debe tener una fila por cada ejemplo de X")
+    out[0:chunk_size] = primero
+
+    def procesar(ini):
+        out[ini:ini+chunk_size] = funcion(X[ini:ini+chunk_size])
+
+    resto = inicios[1:]
+    if hilos == 1:
+        for ini in resto:
+            procesar(ini)
+    else:
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            #-- list() propaga la primera excepción de un bloque --
+            list(pool.map(procesar, resto))
+    return out
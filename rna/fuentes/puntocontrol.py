@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+
+def _guardar_pesos(datos, nombre, pesos):
+    #-- RNMulticapa guarda una lista con un arreglo por capa --
+    if isinstance(pesos, list):
+        datos['capas_' + nombre] = np.array(len(pesos))
+        for k, P in enumerate(pesos):
+            datos[nombre + str(k)] = P
+    else:
+        datos[nombre] = np.asarray(pesos)
+
+def _cargar_pesos(datos, nombre):
+    if ('capas_' + nombre) in datos:
+        return [datos[nombre + str(k)].copy() for k in range(int(datos['capas_' + nombre]))]
+    return datos[nombre].copy()
+
+def _restaurar_historias(modelo, errores, aciertos=None):
+    #-- errors_ (y accuracy_) de un modelo recién preparado con _preparar_estado --
+    if hasattr(modelo, '_registrar'):
+        if aciertos is None:
+            aciertos = np.full(len(errores), np.nan)
+        for (e, a) in zip(errores, aciertos):
+            modelo._registrar(e, a)
+    else:
+        #-- conserva el tipo guardado (enteros en el Perceptron) --
+        modelo.errors_ = np.asarray(errores).tolist()
+
+def guardar_punto_control(modelo, ruta):
+    """Guarda en el .npz ruta todo lo necesario para continuar el fit de
+    modelo: pesos, época, historias (errors_, accuracy_, val_errors_),
+    estado del optimizador, época de lr_schedule y generador aleatorio.
+    Se escribe primero un archivo temporal y luego se renombra, así un
+    proceso cortado durante la escritura no deja un punto de control roto.
+    """
+    datos = {'clase': np.array(type(modelo).__name__),
+             'errors_': np.asarray(modelo.errors_)}
+    _guardar_pesos(datos, 'w_', modelo.w_)
+    _guardar_pesos(datos, 'b_', modelo.b_)
+    for nombre in ('accuracy_', 'val_errors_'):
+        if hasattr(modelo, nombre):
+            datos[nombre] = np.asarray(getattr(modelo, nombre), dtype=np.float64)
+    if hasattr(modelo, '_t_epoca'):
+        datos['t_epoca'] = np.array(modelo._t_epoca)
+    opt = getattr(modelo, '_opt', None)
+    if opt is not None:
+        datos['optimizador'] = np.array(type(opt).__name__)
+        for nombre, valor in opt.estado().items():
+            datos['opt_' + nombre] = valor
+    if hasattr(modelo, '_rgen'):
+        (_, claves, pos, gauss, cache) = modelo._rgen.get_state()
+        datos['rgen_claves'] = claves
+        datos['rgen_pos'] = np.array([pos, gauss])
+        datos['rgen_cache'] = np.array(cache)
+
+    temporal = ruta + '.tmp'
+    with open(temporal, 'wb') as f:
+        np.savez_compressed(f, **datos)
+    os.replace(temporal, ruta)
+
+def cargar_punto_control(modelo, ruta):
+    """Restaura en modelo un punto control guardado con guardar_punto_control.
+    Luego fit con warm_start=True entrena n_iter épocas más a partir de ahí
+    (para terminar un entrenamiento cortado usar n_iter = total - epocas
+    ya hechas, que son len(modelo.errors_)).
+    Returns
+    -------
+    modelo : el mismo objeto, con los pesos y el estado restaurados
+    """
+    with np.load(ruta) as datos:
+        clase = str(datos['clase'])
+        if clase!=type(modelo).__name__:
+            raise ValueError("el punto de control es de un " + clase + ", no de un " + type(modelo).__name__)
+        modelo.w_ = _cargar_pesos(datos, 'w_')
+        b = _cargar_pesos(datos, 'b_')
+        modelo.b_ = modelo.w_.dtype.type(b) if (isinstance(b, np.ndarray) and (b.ndim==0)) else b
+        modelo._preparar_estado()
+
+        _restaurar_historias(modelo, datos['errors_'], datos['accuracy_'] if ('accuracy_' in datos) else None)
+        if 'val_errors_' in datos:
+            modelo.val_errors_ = datos['val_errors_'].tolist()
+        if 't_epoca' in datos:
+            modelo._t_epoca = int(datos['t_epoca'])
+
+        opt = getattr(modelo, '_opt', None)
+        guardado = str(datos['optimizador']) if ('optimizador' in datos) else None
+        if guardado!=(None if (opt is None) else type(opt).__name__):
+            raise ValueError("el punto de control usa otro optimizer que el modelo")
+        if opt is not None:
+            opt.cargar_estado({nombre[4:]: datos[nombre] for nombre in datos.files if nombre.startswith('opt_')})
+        if 'rgen_claves' in datos:
+            modelo._rgen = np.random.RandomState()
+            (pos, gauss) = datos['rgen_pos']
+            modelo._rgen.set_state(('MT19937', datos['rgen_claves'], int(pos), int(gauss), float(datos['rgen_cache'])))
+    return modelo
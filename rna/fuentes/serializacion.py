@@ -0,0 +1,228 @@
+import inspect
+import json
+import os
+import shutil
+
+import numpy as np
+
+from rna.fuentes.activaciones import Activacion, Costo, ACTIVACIONES, COSTOS
+from rna.fuentes.puntocontrol import _restaurar_historias
+
+#-- Un modelo guardado es una carpeta con modelo.json (clase, parámetros y
+#-- la lista de arreglos) y un .npy por arreglo. Los .npy se pueden abrir con
+#-- np.load(..., mmap_mode='r'): varios procesos que predicen con el mismo
+#-- modelo comparten las páginas de los pesos en lugar de tener una copia
+#-- cada uno.
+
+FORMATO = 1
+_ENCABEZADO = 'modelo.json'
+_HISTORIAS = ('errors_', 'accuracy_', 'val_errors_')
+#-- parámetros que nombran una función de los registros de activaciones.py --
+_FUNCIONES = {'FUN': ACTIVACIONES, 'FUN_hidden': ACTIVACIONES, 'COSTO': COSTOS}
+
+def ruta_modelo(ruta):
+    """Un nombre sin carpeta (p.ej. 'sonar_mlp') se ubica en la carpeta de
+    modelos de DataLoader; una ruta con carpeta se usa tal cual."""
+    if os.path.dirname(ruta):
+        return ruta
+    from rna.datos.ClassDataLoader import DataLoader
+    return DataLoader().model_path(ruta)
+
+def _valor_json(valor):
+    #-- parámetros del constructor que JSON no representa directamente --
+    if isinstance(valor, (Activacion, Costo)):
+        return valor.nombre
+    if isinstance(valor, (type, np.dtype)):
+        return np.dtype(valor).name
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, tuple):
+        return list(valor)
+    json.dumps(valor)
+    return valor
+
+def _parametros(modelo):
+    """(parámetros guardables, nombres de los que no se pudieron guardar)"""
+    (guardados, omitidos) = ({}, [])
+    for nombre in inspect.signature(type(modelo).__init__).parameters:
+        if (nombre=='self') or not hasattr(modelo, nombre):
+            continue
+        try:
+            guardados[nombre] = _valor_json(getattr(modelo, nombre))
+        except TypeError:
+            omitidos.append(nombre)
+    return (guardados, omitidos)
+
+def _funciones(modelo, parametros):
+    """Parámetros FUN, FUN_hidden y COSTO que usan una función registrada
+    (o una instancia de Activacion o Costo): sólo se guarda su nombre, así
+    que al cargar el modelo ese nombre tiene que estar registrado."""
+    return [nombre for (nombre, registro) in _FUNCIONES.items()
+            if (nombre in parametros) and (isinstance(getattr(modelo, nombre), (Activacion, Costo))
+                                           or (parametros[nombre] in registro))]
+
+def _verificar_funciones(encabezado):
+    for nombre in encabezado.get('funciones', []):
+        valor = encabezado['parametros'][nombre]
+        if valor not in _FUNCIONES[nombre]:
+            registrar = 'registrar_costo' if (nombre=='COSTO') else 'registrar_activacion'
+            raise KeyError("el modelo usa " + nombre + "='" + valor + "', que no está registrada; "
+                           "llamar a " + registrar + " antes de cargarlo")
+
+def _arreglos(modelo):
+    """{nombre de archivo: arreglo} y {atributo: capas} de un estimador"""
+    (arreglos, capas) = ({}, {})
+    for nombre in ('w_', 'b_'):
+        valor = getattr(modelo, nombre)
+        if isinstance(valor, list):
+            #-- RNMulticapa: un arreglo por capa --
+            capas[nombre] = len(valor)
+            for k, P in enumerate(valor):
+                arreglos[nombre + str(k)] = P
+        else:
+            arreglos[nombre] = valor
+    for nombre in _HISTORIAS:
+        if hasattr(modelo, nombre):
+            arreglos[nombre] = getattr(modelo, nombre)
+    return (arreglos, capas)
+
+def guardar_modelo(modelo, ruta):
+    """Guarda un modelo entrenado en la carpeta ruta (ver ruta_modelo).
+    Parameters
+    ------------
+    modelo : Perceptron, NeuronaLineal, NeuronaGradiente, RNMulticlase,
+        RNMulticapa, o un dict con los resultados de CPN_entrena o
+        SOM_entrena, p.ej. {'tipo': 'CPN', 'centros': centros, 'W': W}:
+        los arreglos van a .npy y los demás valores al encabezado.
+    Returns
+    -------
+    ruta : la carpeta donde quedó el modelo
+    """
+    ruta = ruta_modelo(ruta)
+    if isinstance(modelo, dict):
+        encabezado = {'clase': 'dict', 'parametros': {}}
+        arreglos = {}
+        for (nombre, valor) in modelo.items():
+            if isinstance(valor, np.ndarray):
+                arreglos[nombre] = valor
+            else:
+                encabezado['parametros'][nombre] = _valor_json(valor)
+        capas = {}
+    else:
+        (parametros, omitidos) = _parametros(modelo)
+        encabezado = {'clase': type(modelo).__name__, 'parametros': parametros}
+        if omitidos:
+            #-- p.ej. un lr_schedule que es una función: al cargar se usa el valor por defecto --
+            encabezado['omitidos'] = omitidos
+        encabezado['funciones'] = _funciones(modelo, parametros)
+        (arreglos, capas) = _arreglos(modelo)
+    encabezado['formato'] = FORMATO
+    encabezado['capas'] = capas
+    encabezado['arreglos'] = {}
+
+    #-- se escribe en una carpeta temporal que luego reemplaza a la anterior --
+    temporal = ruta.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+    for (nombre, valor) in arreglos.items():
+        valor = np.asarray(valor)
+        np.save(os.path.join(temporal, nombre + '.npy'), valor)
+        encabezado['arreglos'][nombre] = {'dtype': valor.dtype.str, 'shape': list(valor.shape)}
+    with open(os.path.join(temporal, _ENCABEZADO), 'w', encoding='utf-8') as f:
+        json.dump(encabezado, f, indent=1)
+    if os.path.exists(ruta):
+        shutil.rmtree(ruta)
+    os.replace(temporal, ruta)
+    return ruta
+
+def verificar_escritura(modelo):
+    """ValueError si los pesos de modelo son de sólo lectura (cargados con
+    mmap=True); fit con warm_start y partial_fit lo llaman antes de
+    modificarlos."""
+    for nombre in ('w_', 'b_'):
+        valor = getattr(modelo, nombre, None)
+        for P in (valor if isinstance(valor, list) else [valor]):
+            if isinstance(P, np.ndarray) and not P.flags.writeable:
+                raise ValueError("los pesos del modelo son de sólo lectura (cargar_modelo con mmap=True); "
+                                 "para seguir entrenando cargarlo con mmap='c' o mmap=False")
+
+def leer_encabezado(ruta):
+    """dict del modelo.json de un modelo guardado"""
+    with open(os.path.join(ruta_modelo(ruta), _ENCABEZADO), encoding='utf-8') as f:
+        return json.load(f)
+
+def cargar_modelo(ruta, mmap=True, clase=None):
+    """Carga un modelo guardado con guardar_modelo.
+    Parameters
+    ------------
+    ruta : carpeta o nombre dentro de la carpeta de modelos de DataLoader
+    mmap : bool or string
+        True abre los pesos con np.load(mmap_mode='r'): no se leen hasta
+        usarlos y los procesos que cargan el mismo modelo comparten la
+        memoria, pero son de sólo lectura (sirven para predecir; fit con
+        warm_start=True y partial_fit dan ValueError). 'c' los abre
+        copy-on-write y False los lee en memoria; con cualquiera de los dos
+        se puede seguir entrenando.
+        Un FUN o COSTO registrado al guardar debe estar registrado también
+        al cargar; si no, KeyError.
+    clase : class, optional
+        clase esperada; por defecto la del encabezado.
+    Returns
+    -------
+    El estimador, o el dict guardado (para CPN y SOM).
+    """
+    ruta = ruta_modelo(ruta)
+    encabezado = leer_encabezado(ruta)
+    if encabezado.get('formato', 0) > FORMATO:
+        raise ValueError("el modelo fue guardado con una versión más nueva de rna")
+    modo = 'r' if (mmap is True) else (mmap or None)
+
+    def cargar(nombre, modo=modo):
+        arreglo = np.load(os.path.join(ruta, nombre + '.npy'), mmap_mode=modo)
+        #-- los escalares (b_ de las neuronas de una salida) no se mapean --
+        return arreglo[()] if (arreglo.ndim==0) else arreglo
+
+    if encabezado['clase']=='dict':
+        modelo = dict(encabezado['parametros'])
+        for nombre in encabezado['arreglos']:
+            modelo[nombre] = cargar(nombre)
+        return modelo
+
+    if clase is None:
+        import rna.fuentes as fuentes
+        clase = getattr(fuentes, encabezado['clase'])
+    elif clase.__name__!=encabezado['clase']:
+        raise ValueError("el modelo guardado es un " + encabezado['clase'] + ", no un " + clase.__name__)
+    _verificar_funciones(encabezado)
+    modelo = clase(**encabezado['parametros'])
+    for nombre in ('w_', 'b_'):
+        if nombre in encabezado['capas']:
+            setattr(modelo, nombre, [cargar(nombre + str(k)) for k in range(encabezado['capas'][nombre])])
+        else:
+            setattr(modelo, nombre, cargar(nombre))
+    modelo._preparar_estado()
+    #-- el generador de shuffle y accuracy_sample, como lo crea fit (la
+    #-- secuencia no sigue la del fit original; para eso ver puntocontrol) --
+    modelo._rgen = np.random.RandomState(modelo.random_state)
+    #-- las historias son chicas y se leen en memoria --
+    if 'errors_' in encabezado['arreglos']:
+        aciertos = cargar('accuracy_', None) if ('accuracy_' in encabezado['arreglos']) else None
+        _restaurar_historias(modelo, cargar('errors_', None), aciertos)
+    if 'val_errors_' in encabezado['arreglos']:
+        modelo.val_errors_ = cargar('val_errors_', None).tolist()
+    return modelo
+
+
+class Guardable(object):
+    """save y load de los estimadores, sobre guardar_modelo y cargar_modelo"""
+
+    def save(self, ruta):
+        """Guarda el modelo entrenado en la carpeta ruta; un nombre sin
+        carpeta va a la carpeta de modelos de DataLoader (ver guardar_modelo)"""
+        return guardar_modelo(self, ruta)
+
+    @classmethod
+    def load(cls, ruta, mmap=True):
+        """Modelo guardado con save; con mmap=True los pesos se abren como
+        memmap de sólo lectura compartido entre procesos (ver cargar_modelo)"""
+        return cargar_modelo(ruta, mmap, clase=cls)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+sparse = pytest.importorskip("scipy.sparse")
+
+from rna.fuentes.ClassPerceptron import Perceptron
+from rna.fuentes.ClassNeuronaLineal import NeuronaLineal
+from rna.fuentes.ClassNeuronaGral import NeuronaGradiente
+from rna.fuentes.ClassRNMulticlase import RNMulticlase
+from rna.fuentes.ClassRNMulticapa import RNMulticapa
+
+#-- Con X en CSR cada camino (en línea, por lotes, con optimizer, lstsq) hace
+#-- las mismas actualizaciones que con X densa; sólo cambia el orden de las
+#-- sumas de los productos, así que los pesos coinciden salvo el redondeo y
+#-- las clases predichas son las mismas.
+
+def datos(n=150, atributos=12, semilla=0):
+    #-- alrededor del 70% de ceros --
+    rgen = np.random.RandomState(semilla)
+    X = rgen.normal(size=(n, atributos)) * (rgen.uniform(size=(n, atributos)) < 0.3)
+    y = ((X[:,0] + X[:,1] - X[:,2]) > 0) * 1.0
+    Y = np.eye(3)[np.digitize(X[:,0] + X[:,3], [-0.3, 0.3])]
+    return (X, y, Y)
+
+CASOS = [
+    (Perceptron, {}, False),
+    (NeuronaLineal, {}, False),
+    (NeuronaLineal, {'optimizer': 'adam'}, False),
+    (NeuronaLineal, {'solver': 'lstsq'}, False),
+    (NeuronaGradiente, {}, False),
+    (NeuronaGradiente, {'batch_size': 16}, False),
+    (NeuronaGradiente, {'optimizer': 'rmsprop'}, False),
+    (RNMulticlase, {'FUN': 'softmax', 'COSTO': 'EC'}, True),
+    (RNMulticlase, {'batch_size': 16}, True),
+    (RNMulticlase, {'optimizer': 'momentum'}, True),
+    (RNMulticapa, {'hidden_layers': (5,)}, True),
+    (RNMulticapa, {'hidden_layers': (5,), 'batch_size': 16}, True),
+]
+
+def pesos(modelo):
+    return [np.asarray(P) for P in (modelo.w_ + modelo.b_ if isinstance(modelo.w_, list)
+                                    else [modelo.w_, modelo.b_])]
+
+@pytest.mark.parametrize("clase, kw, onehot", CASOS)
+def test_densa_y_dispersa(clase, kw, onehot):
+    (X, y, Y) = datos()
+    t = Y if onehot else y
+    Xs = sparse.csr_matrix(X)
+    ref = clase(n_iter=5, random_state=1, **kw).fit(X, t)
+    comp = clase(n_iter=5, random_state=1, **kw).fit(Xs, t)
+    for (Pa, Pb) in zip(pesos(ref), pesos(comp)):
+        assert np.allclose(Pa, Pb, rtol=1e-12, atol=1e-12)
+    assert np.allclose(np.asarray(ref.errors_, dtype=float), np.asarray(comp.errors_, dtype=float),
+                       rtol=1e-12, atol=1e-12)
+    if clase is NeuronaLineal:
+        assert np.allclose(ref.predict(X), comp.predict(Xs), rtol=1e-12, atol=1e-12)
+    else:
+        assert np.array_equal(ref.predict(X), comp.predict(Xs))
+
+def test_partial_fit_disperso():
+    (X, y, _) = datos()
+    Xs = sparse.csr_matrix(X)
+    (ref, comp) = (NeuronaGradiente(random_state=1), NeuronaGradiente(random_state=1))
+    for ini in range(0, X.shape[0], 50):
+        ref.partial_fit(X[ini:ini+50], y[ini:ini+50])
+        comp.partial_fit(Xs[ini:ini+50], y[ini:ini+50])
+    assert np.allclose(ref.w_, comp.w_, rtol=1e-12, atol=1e-12)
+    assert np.allclose(ref.errors_, comp.errors_, rtol=1e-12, atol=1e-12)
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from rna.fuentes.ClassNeuronaGral import NeuronaGradiente
+from rna.fuentes.ClassRNMulticlase import RNMulticlase
+from rna.fuentes.ClassEntrenadorApilado import EntrenadorApilado
+
+#-- EntrenadorApilado da a cada modelo los pesos e historias que obtendría
+#-- con su propio fit, y los deja listos para seguir con partial_fit o
+#-- warm_start como si los hubiera entrenado fit.
+
+def datos(n=90, atributos=4, semilla=0):
+    rgen = np.random.RandomState(semilla)
+    X = rgen.normal(size=(n, atributos))
+    y = ((X @ rgen.normal(size=atributos) + rgen.normal(size=n)) > 0) * 1.0
+    return (X, y, np.eye(2)[y.astype(int)])
+
+CONFIGS = {
+    NeuronaGradiente: [
+        dict(alpha=0.1, n_iter=5, random_state=1),
+        dict(alpha=0.05, n_iter=3, random_state=2, FUN='tanh'),
+        dict(alpha=0.2, n_iter=4, random_state=3, COSTO='EA'),
+        dict(alpha=0.1, n_iter=5, random_state=4, history='array'),
+    ],
+    RNMulticlase: [
+        dict(alpha=0.1, n_iter=5, random_state=1, FUN='softmax', COSTO='EC'),
+        dict(alpha=0.05, n_iter=4, random_state=2, history='array'),
+    ],
+}
+
+def armar(clase, batch_size):
+    return [clase(batch_size=batch_size, cotaE=0, **kw) for kw in CONFIGS[clase]]
+
+def iguales(a, b):
+    assert np.allclose(a.w_, b.w_, rtol=1e-10, atol=1e-12)
+    assert np.allclose(a.b_, b.b_, rtol=1e-10, atol=1e-12)
+    assert type(a.errors_) is type(b.errors_)
+    for historia in ('errors_', 'accuracy_'):
+        assert np.allclose(np.asarray(getattr(a, historia)), np.asarray(getattr(b, historia)),
+                           rtol=1e-10, atol=1e-12, equal_nan=True)
+
+@pytest.mark.parametrize("batch_size", [None, 16])
+@pytest.mark.parametrize("clase", [NeuronaGradiente, RNMulticlase])
+def test_igual_que_por_separado(clase, batch_size):
+    (X, y, Y) = datos()
+    t = Y if clase is RNMulticlase else y
+    separados = [m.fit(X, t) for m in armar(clase, batch_size)]
+    apilados = EntrenadorApilado(armar(clase, batch_size)).fit(X, t).modelos_
+    for (a, b) in zip(separados, apilados):
+        iguales(a, b)
+
+@pytest.mark.parametrize("batch_size", [None, 16])
+@pytest.mark.parametrize("clase", [NeuronaGradiente, RNMulticlase])
+def test_siguen_entrenando(clase, batch_size):
+    (X, y, Y) = datos()
+    t = Y if clase is RNMulticlase else y
+    separados = [m.fit(X, t) for m in armar(clase, batch_size)]
+    apilados = EntrenadorApilado(armar(clase, batch_size)).fit(X, t).modelos_
+    for (a, b) in zip(separados, apilados):
+        a.partial_fit(X, t)
+        b.partial_fit(X, t)
+        for m in (a, b):
+            (m.warm_start, m.shuffle) = (True, True)
+            m.fit(X, t)
+        iguales(a, b)
+
+@pytest.mark.parametrize("kw", [
+    dict(patience=2), dict(validation_split=0.2), dict(accuracy_mode='fused'),
+    dict(accuracy_every=2), dict(accuracy_sample=0.5), dict(warm_start=True),
+    dict(shuffle=True), dict(optimizer='adam'), dict(draw=1),
+])
+def test_opciones_no_admitidas(kw):
+    (X, y, _) = datos()
+    modelos = [NeuronaGradiente(random_state=1), NeuronaGradiente(random_state=2, **kw)]
+    with pytest.raises(ValueError):
+        EntrenadorApilado(modelos).fit(X, y)
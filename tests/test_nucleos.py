@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("numba")
+
+from rna.fuentes.ClassPerceptron import Perceptron
+from rna.fuentes.ClassNeuronaLineal import NeuronaLineal
+from rna.fuentes.RN_Clustering import CPN_entrena, SOM_entrena
+
+#-- Los núcleos de rna.fuentes.nucleos deben dar los mismos pesos, bit a
+#-- bit, que los lazos de NumPy: _suma copia la suma por pares de np.sum y
+#-- un cambio de NumPy que la altere tiene que hacer fallar estas pruebas.
+
+TIPOS = [np.float64, np.float32]
+
+def datos(tipo, n=300, atributos=5, semilla=0):
+    rgen = np.random.RandomState(semilla)
+    X = rgen.normal(size=(n, atributos)).astype(tipo)
+    y = (X @ rgen.normal(size=atributos) > 0).astype(tipo)
+    return (X, y)
+
+def grupos(tipo, semilla=0):
+    #-- tres nubes y más de 128 atributos, para que _suma también divida --
+    rgen = np.random.RandomState(semilla)
+    centros = rgen.uniform(-5, 5, size=(3, 140))
+    X = np.vstack([c + rgen.normal(size=(40, 140)) for c in centros]).astype(tipo)
+    T = np.repeat(np.eye(3), 40, axis=0)
+    return (X, T)
+
+def mismos_pesos(a, b):
+    assert a.w_.dtype == b.w_.dtype
+    assert np.array_equal(a.w_, b.w_)
+    assert np.array_equal(a.b_, b.b_)
+    assert np.array_equal(a.errors_, b.errors_)
+
+@pytest.mark.parametrize("tipo", TIPOS)
+def test_perceptron(tipo):
+    (X, y) = datos(tipo)
+    (ref, comp) = [Perceptron(alpha=0.05, n_iter=20, random_state=1, jit=jit).fit(X, y)
+                   for jit in (False, True)]
+    mismos_pesos(ref, comp)
+
+@pytest.mark.parametrize("tipo", TIPOS)
+def test_neurona_lineal(tipo):
+    (X, y) = datos(tipo)
+    (ref, comp) = [NeuronaLineal(alpha=0.01, n_iter=20, random_state=1, jit=jit).fit(X, y)
+                   for jit in (False, True)]
+    mismos_pesos(ref, comp)
+
+@pytest.mark.parametrize("tipo", TIPOS)
+def test_cpn(tipo):
+    (X, T) = grupos(tipo)
+    res = []
+    for jit in (False, True):
+        np.random.seed(3)
+        res.append(CPN_entrena(X, 3, 0.3, 10, T=T, beta=0.1, MAX_ITE2=20, jit=jit))
+    (ref, comp) = res
+    assert ref[0].dtype == comp[0].dtype
+    assert np.array_equal(ref[0], comp[0])      # centros
+    assert ref[1] == comp[1]                    # asignaciones
+    assert ref[2] == comp[2]
+    assert np.array_equal(ref[3], comp[3])      # W
+
+@pytest.mark.parametrize("tipo", TIPOS)
+def test_som(tipo):
+    (X, T) = grupos(tipo)
+    res = []
+    for jit in (False, True):
+        np.random.seed(3)
+        res.append(SOM_entrena(X, 3, 3, 0.2, 2, 2, 0, jit=jit))
+    (ref, comp) = res
+    assert np.array_equal(ref[0], comp[0])      # pesos del mapa
+    assert np.array_equal(ref[1], comp[1])
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from rna.fuentes.ClassPerceptron import Perceptron
+from rna.fuentes.ClassNeuronaLineal import NeuronaLineal
+from rna.fuentes.ClassNeuronaGral import NeuronaGradiente
+from rna.fuentes.ClassRNMulticlase import RNMulticlase
+from rna.fuentes.ClassRNMulticapa import RNMulticapa
+
+#-- partial_fit hace una pasada con la misma _epoca que fit: n llamadas sobre
+#-- los mismos datos dan los pesos de fit con n_iter=n, y después de un fit
+#-- sigue desde sus pesos.
+
+def datos(n=120, atributos=4, semilla=0):
+    #-- con ruido, para que el Perceptron no se detenga por no tener errores --
+    rgen = np.random.RandomState(semilla)
+    X = rgen.normal(size=(n, atributos))
+    y = ((X @ rgen.normal(size=atributos) + rgen.normal(size=n)) > 0) * 1.0
+    return (X, y, np.eye(2)[y.astype(int)])
+
+MODELOS = {
+    'perceptron': (lambda n: Perceptron(alpha=0.05, n_iter=n, random_state=1), False),
+    'lineal': (lambda n: NeuronaLineal(alpha=0.01, n_iter=n, cotaE=0, random_state=1), False),
+    'lineal_adam': (lambda n: NeuronaLineal(alpha=0.01, n_iter=n, cotaE=0, random_state=1,
+                                            optimizer='adam', lr_schedule='step'), False),
+    'gradiente': (lambda n: NeuronaGradiente(alpha=0.1, n_iter=n, cotaE=0, random_state=1,
+                                             shuffle=True), False),
+    'gradiente_lotes': (lambda n: NeuronaGradiente(alpha=0.1, n_iter=n, cotaE=0, random_state=1,
+                                                   batch_size=16, optimizer='momentum'), False),
+    'multiclase': (lambda n: RNMulticlase(alpha=0.1, n_iter=n, cotaE=0, random_state=1, FUN='softmax',
+                                          COSTO='EC', shuffle=True), True),
+    'multicapa': (lambda n: RNMulticapa(hidden_layers=(4,), alpha=0.1, n_iter=n, cotaE=0, random_state=1,
+                                        batch_size=16, shuffle=True), True),
+}
+
+def pesos(modelo):
+    return [np.asarray(P) for P in (modelo.w_ + modelo.b_ if isinstance(modelo.w_, list)
+                                    else [modelo.w_, modelo.b_])]
+
+def mismos_pesos(a, b):
+    for (Pa, Pb) in zip(pesos(a), pesos(b)):
+        assert np.array_equal(Pa, Pb)
+    assert np.array_equal(np.asarray(a.errors_), np.asarray(b.errors_))
+
+@pytest.mark.parametrize("nombre", MODELOS)
+def test_partial_fit_reproduce_fit(nombre):
+    (fabrica, onehot) = MODELOS[nombre]
+    (X, y, Y) = datos()
+    t = Y if onehot else y
+    ref = fabrica(6).fit(X, t)
+    comp = fabrica(6)
+    for _ in range(6):
+        comp.partial_fit(X, t)
+    mismos_pesos(ref, comp)
+
+@pytest.mark.parametrize("nombre", MODELOS)
+def test_partial_fit_continua_desde_fit(nombre):
+    (fabrica, onehot) = MODELOS[nombre]
+    (X, y, Y) = datos()
+    t = Y if onehot else y
+    ref = fabrica(6).fit(X, t)
+    comp = fabrica(3).fit(X, t)
+    for _ in range(3):
+        comp.partial_fit(X, t)
+    mismos_pesos(ref, comp)
+
+def test_streaming_por_bloques_es_minimos_cuadrados():
+    (X, y, _) = datos(n=300)
+    ref = NeuronaLineal(solver='lstsq').fit(X, y)
+    comp = NeuronaLineal(solver='streaming')
+    for ini in range(0, X.shape[0], 70):
+        comp.partial_fit(X[ini:ini+70], y[ini:ini+70])
+    assert np.allclose(comp.w_, ref.w_)
+    assert np.isclose(comp.b_, ref.b_)
+    assert np.isclose(comp.errors_[-1], ref.errors_[-1])
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from rna.fuentes.ClassPerceptron import Perceptron
+from rna.fuentes.ClassNeuronaLineal import NeuronaLineal
+from rna.fuentes.ClassNeuronaGral import NeuronaGradiente
+from rna.fuentes.ClassRNMulticlase import RNMulticlase
+from rna.fuentes.ClassRNMulticapa import RNMulticapa
+from rna.fuentes.ClassOptimizador import TasaCoseno
+from rna.fuentes.ClassCallbackEntrenamiento import PuntoControl
+from rna.fuentes.puntocontrol import cargar_punto_control
+
+#-- Un fit cortado tras 5 épocas, guardado con PuntoControl y retomado en un
+#-- modelo nuevo con cargar_punto_control y warm_start=True tiene que dar,
+#-- bit a bit, lo mismo que 12 épocas seguidas: pesos, historias, estado del
+#-- optimizador, época de lr_schedule y generador de shuffle.
+
+def datos(n=100, atributos=4, semilla=0):
+    rgen = np.random.RandomState(semilla)
+    X = rgen.normal(size=(n, atributos))
+    y = ((X @ rgen.normal(size=atributos) + rgen.normal(size=n)) > 0) * 1.0
+    return (X, y, np.eye(2)[y.astype(int)])
+
+#-- TasaCoseno necesita n_epocas fijo: por defecto toma el n_iter de cada fit --
+MODELOS = {
+    'perceptron': (lambda **kw: Perceptron(alpha=0.05, random_state=1, **kw), False),
+    'lineal': (lambda **kw: NeuronaLineal(alpha=0.01, cotaE=0, random_state=1, optimizer='adam',
+                                          lr_schedule=TasaCoseno(n_epocas=12), **kw), False),
+    'gradiente': (lambda **kw: NeuronaGradiente(alpha=0.1, cotaE=0, random_state=1, shuffle=True,
+                                                optimizer='adam', lr_schedule=TasaCoseno(n_epocas=12),
+                                                history='array', **kw), False),
+    'multiclase': (lambda **kw: RNMulticlase(alpha=0.1, cotaE=0, random_state=1, FUN='softmax', COSTO='EC',
+                                             shuffle=True, batch_size=16, optimizer='rmsprop',
+                                             lr_schedule='step', validation_split=0.2, **kw), True),
+    'multicapa': (lambda **kw: RNMulticapa(hidden_layers=(4,), alpha=0.1, cotaE=0, random_state=1,
+                                           shuffle=True, batch_size=16, optimizer='momentum', **kw), True),
+}
+
+def pesos(modelo):
+    return [np.asarray(P) for P in (modelo.w_ + modelo.b_ if isinstance(modelo.w_, list)
+                                    else [modelo.w_, modelo.b_])]
+
+@pytest.mark.parametrize("nombre", MODELOS)
+def test_retomar_es_identico(nombre, tmp_path):
+    (fabrica, onehot) = MODELOS[nombre]
+    (X, y, Y) = datos()
+    t = Y if onehot else y
+    ruta = str(tmp_path / 'punto.npz')
+
+    ref = fabrica(n_iter=12).fit(X, t)
+    fabrica(n_iter=5).fit(X, t, callbacks=[PuntoControl(ruta)])
+    comp = cargar_punto_control(fabrica(n_iter=7, warm_start=True), ruta).fit(X, t)
+
+    for (Pa, Pb) in zip(pesos(ref), pesos(comp)):
+        assert np.array_equal(Pa, Pb)
+    for historia in ('errors_', 'accuracy_', 'val_errors_'):
+        if hasattr(ref, historia):
+            assert np.array_equal(np.asarray(getattr(ref, historia)), np.asarray(getattr(comp, historia)),
+                                  equal_nan=True)
+
+def test_otra_clase_es_error(tmp_path):
+    (X, y, _) = datos()
+    ruta = str(tmp_path / 'punto.npz')
+    NeuronaGradiente(n_iter=2).fit(X, y, callbacks=[PuntoControl(ruta)])
+    with pytest.raises(ValueError):
+        cargar_punto_control(NeuronaLineal(), ruta)